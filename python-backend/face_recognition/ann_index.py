@@ -0,0 +1,276 @@
+"""
+Approximate nearest-neighbour index for face encodings
+An inverted-file (IVF) index in plain numpy: k-means centroids partition
+the encodings into lists, and a search only scans the `nprobe` lists
+closest to the query. Full vectors are kept, so every shortlisted
+candidate gets its exact Euclidean distance (same as face_distance).
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means on float32 vectors; returns (k, dim) centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    norms = (vectors * vectors).sum(axis=1)
+
+    for _ in range(iterations):
+        assignment = nearest(vectors, centroids, norms)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Re-seed empty lists with random vectors
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+    return centroids
+
+
+def squared_distances(queries: np.ndarray, vectors: np.ndarray, vector_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """(queries x vectors) squared Euclidean distances via one matrix product"""
+    if vector_norms is None:
+        vector_norms = (vectors * vectors).sum(axis=1)
+    squared = (queries * queries).sum(axis=1)[:, None] + vector_norms[None, :] - 2.0 * (queries @ vectors.T)
+    return np.maximum(squared, 0.0)
+
+
+def nearest(vectors: np.ndarray, centroids: np.ndarray, vector_norms: Optional[np.ndarray] = None) -> np.ndarray:
+    """Index of the nearest centroid for each vector, in chunks to bound memory"""
+    result = np.empty(len(vectors), dtype=np.int64)
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    for start in range(0, len(vectors), 8192):
+        chunk = vectors[start:start + 8192]
+        norms = vector_norms[start:start + 8192] if vector_norms is not None else (chunk * chunk).sum(axis=1)
+        scores = centroid_norms[None, :] - 2.0 * (chunk @ centroids.T) + norms[:, None]
+        result[start:start + 8192] = scores.argmin(axis=1)
+    return result
+
+
+class IVFIndex:
+    """
+    Incremental IVF index over string ids
+
+    Until `min_train` vectors are stored the index is untrained and every
+    search is exact. It then trains `nlist` centroids (default about
+    4 x sqrt(N)) and retrains whenever the index has doubled since. `add`
+    assigns new vectors to their nearest list, `remove` drops them. `nprobe`
+    trades recall for speed and can be changed at any time.
+    """
+
+    def __init__(self, dim: int = 128, nlist: int = 0, nprobe: int = 16, min_train: int = 2048, train_sample: int = 20000):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.train_sample = train_sample
+
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._ids: List[Optional[str]] = []  # Row -> id, None for free rows
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._assignment = np.empty(0, dtype=np.int64)  # Row -> list
+
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}  # Cached row arrays, dropped when a list changes
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def trained_size(self) -> int:
+        """Vectors stored when the index was last trained"""
+        return self._trained_size
+
+    def ids(self) -> List[str]:
+        return list(self._rows)
+
+    def vectors(self, item_ids: List[str]) -> np.ndarray:
+        """Copy of the stored vectors of `item_ids`, in that order"""
+        return self._vectors[np.array([self._rows[item_id] for item_id in item_ids], dtype=np.int64)]
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._vectors))
+        extra = capacity - len(self._vectors)
+        self._vectors = np.concatenate([self._vectors, np.empty((extra, self.dim), dtype=np.float32)])
+        self._norms = np.concatenate([self._norms, np.zeros(extra, dtype=np.float32)])
+        self._assignment = np.concatenate([self._assignment, np.full(extra, -1, dtype=np.int64)])
+
+    def add(self, item_id: str, vector, train: bool = True) -> None:
+        """Insert or replace one vector; `train=False` defers (re)training"""
+        self.remove(item_id)
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self._ids)
+            if row == len(self._vectors):
+                self._grow()
+            self._ids.append(None)
+
+        self._vectors[row] = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        self._norms[row] = self._vectors[row] @ self._vectors[row]
+        self._ids[row] = item_id
+        self._rows[item_id] = row
+
+        if self.trained:
+            list_id = int(nearest(self._vectors[row:row + 1], self.centroids)[0])
+            self._assignment[row] = list_id
+            self._lists[list_id].append(row)
+            self._list_arrays.pop(list_id, None)
+
+        if train:
+            self._maybe_train()
+
+    def needs_training(self) -> bool:
+        """Whether the index has reached min_train, or doubled since it was last trained"""
+        return len(self._rows) >= max(self.min_train, 2 * self._trained_size)
+
+    def _maybe_train(self):
+        if self.needs_training():
+            self.train()
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]) -> None:
+        """Insert vectors in bulk, training once at the end"""
+        for item_id, vector in items:
+            self.add(item_id, vector, train=False)
+        self._maybe_train()
+
+    def remove(self, item_id: str) -> bool:
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+        if self.trained:
+            list_id = int(self._assignment[row])
+            self._lists[list_id].remove(row)
+            self._list_arrays.pop(list_id, None)
+        self._assignment[row] = -1
+        self._ids[row] = None
+        self._free.append(row)
+        return True
+
+    def _live_rows(self) -> np.ndarray:
+        return np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+
+    def train(self) -> None:
+        """(Re)compute centroids from the stored vectors and reassign every vector"""
+        rows = self._live_rows()
+        if len(rows) == 0:
+            return
+        nlist = self.nlist or int(4 * np.sqrt(len(rows)))
+        nlist = max(1, min(nlist, len(rows)))
+
+        sample = rows
+        if len(rows) > self.train_sample:
+            sample = np.random.default_rng(0).choice(rows, size=self.train_sample, replace=False)
+        self.centroids = kmeans(self._vectors[sample], nlist)
+
+        assignment = nearest(self._vectors[rows], self.centroids, self._norms[rows])
+        self._assignment[rows] = assignment
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self._lists = [rows[order[bounds[i]:bounds[i + 1]]].tolist() for i in range(nlist)]
+        self._list_arrays = {}
+        self._trained_size = len(rows)
+        logger.info(f"Trained IVF index: {len(rows)} vectors in {nlist} lists")
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays.get(list_id)
+        if rows is None:
+            rows = self._list_arrays[list_id] = np.array(self._lists[list_id], dtype=np.int64)
+        return rows
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows in the lists nearest to the query (all rows when untrained)"""
+        if not self.trained:
+            return self._live_rows()
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        scores = squared_distances(query[None, :], self.centroids)[0]
+        probe = np.argpartition(scores, nprobe - 1)[:nprobe] if nprobe < len(scores) else np.arange(len(scores))
+        return np.concatenate([self._list_rows(int(list_id)) for list_id in probe])
+
+    def search(
+        self,
+        queries,
+        k: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Nearest ids per query as (id, exact distance), closest first
+        Returns at most k results, and only those within max_distance if given
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        results = []
+        for query in queries:
+            rows = self.candidates(query, nprobe)
+            if len(rows) == 0:
+                results.append([])
+                continue
+            distances = np.sqrt(squared_distances(query[None, :], self._vectors[rows], self._norms[rows])[0])
+            keep = np.arange(len(rows)) if max_distance is None else np.flatnonzero(distances <= max_distance)
+            if k is not None and len(keep) > k:
+                keep = keep[np.argpartition(distances[keep], k - 1)[:k]]
+            keep = keep[np.argsort(distances[keep])]
+            results.append([(self._ids[rows[i]], float(distances[i])) for i in keep])
+        return results
+
+    def save(self, path: str) -> None:
+        """Write the index to an .npz file (atomically replaced)"""
+        rows = self._live_rows()
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array([self._ids[row] for row in rows], dtype=object).astype(str),
+                vectors=self._vectors[rows],
+                assignment=self._assignment[rows],
+                centroids=self.centroids if self.trained else np.empty((0, self.dim), dtype=np.float32),
+                trained_size=np.array(self._trained_size),
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IVFIndex":
+        """Load an index written by save(); settings come from kwargs, and a changed nlist retrains"""
+        with np.load(path) as data:
+            index = cls(dim=data["vectors"].shape[1], **kwargs)
+            ids = data["ids"].tolist()
+            count = len(ids)
+            while len(index._vectors) < count:
+                index._grow()
+            index._vectors[:count] = data["vectors"]
+            index._norms[:count] = (data["vectors"] * data["vectors"]).sum(axis=1)
+            index._ids = list(ids)
+            index._rows = {item_id: row for row, item_id in enumerate(ids)}
+
+            if len(data["centroids"]):
+                index.centroids = data["centroids"].astype(np.float32)
+                assignment = data["assignment"]
+                index._assignment[:count] = assignment
+                index._lists = [[] for _ in range(len(index.centroids))]
+                for row, list_id in enumerate(assignment.tolist()):
+                    index._lists[list_id].append(row)
+                index._trained_size = int(data["trained_size"])
+                lists = max(1, min(index.nlist, count))
+                if index.nlist and len(index.centroids) != lists:
+                    logger.info(f"{path} has {len(index.centroids)} lists, {lists} configured: retraining")
+                    index.train()
+        return index
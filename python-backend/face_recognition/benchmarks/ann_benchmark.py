@@ -0,0 +1,152 @@
+"""
+Recall and latency of the IVF face index against brute force
+Enrols synthetic 128-d encodings, then queries with noisy copies of
+enrolled faces (the camera-frame case) and with unrelated faces. Brute
+force is the exact matrix scan FaceRecognitionService uses without the
+index.
+
+Usage:
+    python benchmarks/ann_benchmark.py --size 100000
+    python benchmarks/ann_benchmark.py --size 100000 --nprobe 4 8 16 32 --json --output ivf.json
+
+`enrolled` is the fraction of enrolled-face queries whose own encoding is
+returned within tolerance; recall@k compares the top k with brute force,
+which also covers the unknown faces.
+
+The encodings are synthetic: identities are spread around a few hundred
+"population" centres, so the data has some cluster structure like real
+face encodings, and a query lies about 0.3 from its enrolled face, well
+within the default 0.6 tolerance.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import IVFIndex, squared_distances  # noqa: E402
+
+
+def make_encodings(rng: np.random.Generator, size: int, centres: int, dim: int = 128) -> np.ndarray:
+    population = rng.normal(0, 0.06, size=(centres, dim))
+    return (population[rng.integers(centres, size=size)] + rng.normal(0, 0.06, size=(size, dim))).astype(np.float32)
+
+
+def brute_force(encodings: np.ndarray, norms: np.ndarray, query: np.ndarray, k: int, tolerance: float):
+    distances = np.sqrt(squared_distances(query[None, :], encodings, norms)[0])
+    within = np.flatnonzero(distances <= tolerance)
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.argsort(distances[top])].tolist(), set(within.tolist())
+
+
+def summarize(samples: List[float]) -> Dict:
+    ms = np.array(samples) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+
+def run(args) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    encodings = make_encodings(rng, args.size, args.centres)
+    norms = (encodings * encodings).sum(axis=1)
+    ids = [f"MP-{i}" for i in range(args.size)]
+
+    enrolled = rng.integers(args.size, size=args.queries).tolist()
+    queries = np.concatenate([
+        encodings[enrolled] + rng.normal(0, 0.025, size=(args.queries, encodings.shape[1])).astype(np.float32),
+        make_encodings(rng, args.queries // 4, args.centres),  # Faces that are not enrolled
+    ])
+
+    started = time.perf_counter()
+    index = IVFIndex(nlist=args.nlist, min_train=0, train_sample=args.train_sample)
+    index.add_many(zip(ids, encodings))
+    build_seconds = time.perf_counter() - started
+
+    # Index rows equal encoding rows here, since ids were added in order
+    exact = []
+    brute_samples = []
+    for query in queries:
+        started = time.perf_counter()
+        exact.append(brute_force(encodings, norms, query, args.k, args.tolerance))
+        brute_samples.append(time.perf_counter() - started)
+
+    results = []
+    for nprobe in args.nprobe:
+        samples = []
+        top_hits = nearest_hits = within_hits = within_total = enrolled_hits = 0
+        for query_index, (query, (top, within)) in enumerate(zip(queries, exact)):
+            started = time.perf_counter()
+            found = index.search(query, k=args.k, nprobe=nprobe)[0]
+            samples.append(time.perf_counter() - started)
+            found_rows = [int(item_id[3:]) for item_id, _ in found]
+
+            nearest_hits += bool(found_rows) and found_rows[0] == top[0]
+            top_hits += len(set(top) & set(found_rows))
+            within_found = {row for row, (_, distance) in zip(found_rows, found) if distance <= args.tolerance}
+            within_hits += len(within & within_found)
+            within_total += len(within & set(top))  # Matches a top-k search can return at all
+            if query_index < len(enrolled):
+                enrolled_hits += enrolled[query_index] in within_found
+
+        results.append({
+            "nprobe": nprobe,
+            "enrolled_found": round(enrolled_hits / len(enrolled), 4),
+            "recall_at_1": round(nearest_hits / len(queries), 4),
+            f"recall_at_{args.k}": round(top_hits / (len(queries) * args.k), 4),
+            "recall_within_tolerance": round(within_hits / within_total, 4) if within_total else None,
+            "latency": summarize(samples),
+        })
+
+    return {
+        "config": vars(args),
+        "lists": len(index.centroids),
+        "build_seconds": round(build_seconds, 3),
+        "brute_force": summarize(brute_samples),
+        "ivf": results,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Compare the IVF face index with brute force")
+    parser.add_argument("--size", type=int, default=100000, help="Enrolled encodings")
+    parser.add_argument("--queries", type=int, default=400, help="Queries of enrolled faces (plus 25%% unknown faces)")
+    parser.add_argument("--centres", type=int, default=300, help="Population centres in the synthetic data")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 = about 4 x sqrt(size))")
+    parser.add_argument("--train-sample", type=int, default=IVFIndex().train_sample, help="Encodings used for k-means")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32, 64])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.size} encodings, {report['lists']} lists, built in {report['build_seconds']}s")
+    print(f"brute force: p50 {report['brute_force']['p50_ms']:7.3f} ms  p95 {report['brute_force']['p95_ms']:7.3f} ms")
+    for result in report["ivf"]:
+        print(f"nprobe {result['nprobe']:>3}: p50 {result['latency']['p50_ms']:7.3f} ms  p95 {result['latency']['p95_ms']:7.3f} ms"
+              f"  enrolled {result['enrolled_found']:.3f}  recall@1 {result['recall_at_1']:.3f}  recall@{args.k} {result[f'recall_at_{args.k}']:.3f}"
+              f"  within tolerance {result['recall_within_tolerance']}")
+
+
+if __name__ == "__main__":
+    main_cli()
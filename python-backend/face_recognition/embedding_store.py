@@ -0,0 +1,119 @@
+"""
+Binary snapshot of the face embeddings
+A snapshot is a float32 `.npy` block (one 128-d row per person) that is
+memory-mapped at startup, plus a compact JSON sidecar with the person
+metadata and the personId of every row. The sidecar names its block and is
+the commit point: a new block is written first, then the sidecar is
+atomically replaced, so a crash in between leaves the old snapshot intact.
+"""
+
+import glob
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mutation_log import _fsync_dir
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class EmbeddingSnapshot:
+    """The memory-mapped embedding block of a snapshot; a person's row is `rows[personId]`"""
+
+    def __init__(self, ids: List[str], embeddings: np.ndarray, block: Optional[str] = None):
+        self.embeddings = embeddings
+        self.rows: Dict[str, int] = {person_id: row for row, person_id in enumerate(ids)}
+        self.block = block
+
+    @classmethod
+    def empty(cls, dim: int) -> "EmbeddingSnapshot":
+        return cls([], np.empty((0, dim), dtype=np.float32))
+
+    @classmethod
+    def map(cls, ids: List[str], block: str) -> "EmbeddingSnapshot":
+        embeddings = np.load(block, mmap_mode="r")
+        if embeddings.dtype != np.float32 or len(embeddings) != len(ids):
+            raise ValueError(f"{block} does not match its metadata")
+        return cls(ids, embeddings, block)
+
+
+def load_snapshot(meta_path: str) -> Tuple[List[Dict], EmbeddingSnapshot]:
+    """Person metadata (without embeddings) and the mapped embedding block"""
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')} in {meta_path}")
+    block = os.path.join(os.path.dirname(meta_path), meta["embeddings"])
+    return meta["persons"], EmbeddingSnapshot.map(meta["ids"], block)
+
+
+def _block_pattern(meta_path: str) -> str:
+    base = meta_path[:-len(".meta.json")] if meta_path.endswith(".meta.json") else os.path.splitext(meta_path)[0]
+    return f"{base}.*.npy"
+
+
+def write_snapshot(meta_path: str, persons: List[Dict], ids: List[str], embeddings: np.ndarray) -> str:
+    """
+    Write `embeddings` (rows in `ids` order) to a new block, then point the
+    sidecar at it; returns the block path
+    """
+    pattern = _block_pattern(meta_path)
+    prefix = pattern[:-len("*.npy")]
+    generations = [path[len(prefix):-len(".npy")] for path in glob.glob(pattern)]
+    generation = 1 + max((int(g) for g in generations if g.isdigit()), default=0)
+    block = f"{prefix}{generation}.npy"
+
+    with open(block, "wb") as f:
+        np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        f.flush()
+        os.fsync(f.fileno())
+
+    temp_path = f"{meta_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(
+            {"version": SNAPSHOT_VERSION, "embeddings": os.path.basename(block), "ids": ids, "persons": persons},
+            f,
+            separators=(",", ":")
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, meta_path)
+    _fsync_dir(meta_path)
+    return block
+
+
+def remove_stale_blocks(meta_path: str, keep: Optional[str]):
+    """Delete blocks the sidecar no longer points to (skips files still mapped on Windows)"""
+    for path in glob.glob(_block_pattern(meta_path)):
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def migrate_json(json_path: str, meta_path: str, dim: int = 128) -> int:
+    """Convert a JSON embeddings file (list of person records) into a snapshot; returns the person count"""
+    with open(json_path, "r") as f:
+        records = json.load(f)
+
+    persons, ids, vectors = [], [], []
+    for record in records:
+        person = dict(record)
+        embedding = person.pop("embedding", None)
+        persons.append(person)
+        if embedding:
+            ids.append(person["personId"])
+            vectors.append(embedding)
+
+    embeddings = np.array(vectors, dtype=np.float32).reshape(-1, dim)
+    block = write_snapshot(meta_path, persons, ids, embeddings)
+    remove_stale_blocks(meta_path, keep=block)
+    logger.info(f"Migrated {len(persons)} persons from {json_path} to {meta_path}")
+    return len(persons)
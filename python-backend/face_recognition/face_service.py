@@ -3,15 +3,20 @@ Face Recognition Service
 Handles face detection, embedding extraction, and matching
 """
 
+import io
 import os
-import json
 import logging
-from typing import List, Dict, Optional, Tuple
+import threading
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import datetime
 import numpy as np
 from PIL import Image
 import cv2
 
+from ann_index import IVFIndex
+from embedding_store import EmbeddingSnapshot, load_snapshot, migrate_json, remove_stale_blocks, write_snapshot
+from mutation_log import MutationLog
+
 # Try to import face_recognition, but make it optional
 try:
     import face_recognition
@@ -22,50 +27,405 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIM = 128  # face_recognition encodings
+
+# Cases with these statuses are no longer matched against camera frames
+CLOSED_STATUSES = ("found", "closed")
+
+# An image file path, encoded image bytes (JPEG/PNG, e.g. an upload) or an RGB uint8 array
+ImageInput = Union[str, bytes, np.ndarray]
+
+
+def load_image(image: ImageInput) -> np.ndarray:
+    """Decode an image to an RGB array like face_recognition.load_image_file, without touching disk for bytes"""
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        with Image.open(io.BytesIO(image)) as decoded:
+            return np.array(decoded.convert("RGB"))
+    return face_recognition.load_image_file(image)
+
+
+def _describe(image: ImageInput) -> str:
+    return image if isinstance(image, str) else "image"
+
 class FaceRecognitionService:
     """Service for face recognition operations"""
     
-    def __init__(self, embeddings_file: str = "data/face_embeddings.json", uploads_dir: str = "uploads/missing_persons"):
-        self.embeddings_file = embeddings_file
+    def __init__(
+        self,
+        embeddings_file: str = "data/face_embeddings.json",
+        snapshot_file: str = "data/face_embeddings.meta.json",
+        log_file: str = "data/face_embeddings.log",
+        uploads_dir: str = "uploads/missing_persons",
+        use_ann_index: bool = False,
+        ann_nlist: int = 0,
+        ann_nprobe: int = 16,
+        index_file: str = "data/face_index.npz",
+        log_fsync_interval: float = 0.05,
+        compact_bytes: int = 16 * 1024 * 1024
+    ):
+        self.embeddings_file = embeddings_file  # Legacy JSON store, migrated on first start
+        self.snapshot_file = snapshot_file
         self.uploads_dir = uploads_dir
+        self.index_file = index_file
         self.embeddings_cache: Dict[str, Dict] = {}
+        self.ann_index: Optional[IVFIndex] = None  # Optional IVF index over the open cases
+        self._ann_training: Optional[threading.Thread] = None
+        self._ann_trained: Optional[IVFIndex] = None  # Set by the training thread
+        self._ann_queue: List[Tuple[str, Optional[np.ndarray]]] = []  # Changes made while it trains
+        
+        # Changes are appended to a log; the snapshot is rewritten only by compaction
+        self.log = MutationLog(log_file, fsync_interval=log_fsync_interval)
+        self.compact_bytes = compact_bytes
+        self._compaction: Optional[threading.Thread] = None
+        self._compacted: Optional[Tuple[EmbeddingSnapshot, Dict[str, np.ndarray]]] = None  # Set by the compaction thread
+        
+        # Embeddings live in the memory-mapped snapshot block, or in _pending when newer than it;
+        # embeddings_cache only holds person metadata
+        self._snapshot = EmbeddingSnapshot.empty(EMBEDDING_DIM)
+        self._pending: Dict[str, np.ndarray] = {}
+        
+        # Encodings of open cases as one contiguous float32 matrix (the first len(_encoding_ids)
+        # rows are live), with the matching person ids and squared row norms for vectorized distances
+        self._encodings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._encoding_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        
+        # Guards the store and the encodings; requests run face detection outside it
+        self._lock = threading.Lock()
         
         # Ensure directories exist
-        os.makedirs(os.path.dirname(embeddings_file), exist_ok=True)
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
         os.makedirs(uploads_dir, exist_ok=True)
         
         # Load existing embeddings
         self.load_embeddings()
+        self.log.open()
+        if self.log.compaction_pending or self.log.size >= self.compact_bytes:
+            self.compact()  # Finish a compaction interrupted by a restart
+        if use_ann_index:
+            self.load_ann_index(nlist=ann_nlist, nprobe=ann_nprobe)
     
     def load_embeddings(self):
-        """Load face embeddings from JSON file"""
-        if os.path.exists(self.embeddings_file):
-            try:
-                with open(self.embeddings_file, 'r') as f:
-                    data = json.load(f)
-                    self.embeddings_cache = {item['personId']: item for item in data}
+        """Map the face embeddings snapshot, then replay the mutation log on top"""
+        self.embeddings_cache = {}
+        self._snapshot = EmbeddingSnapshot.empty(EMBEDDING_DIM)
+        self._pending = {}
+        try:
+            if not os.path.exists(self.snapshot_file) and os.path.exists(self.embeddings_file):
+                migrate_json(self.embeddings_file, self.snapshot_file, dim=EMBEDDING_DIM)
+            if os.path.exists(self.snapshot_file):
+                persons, self._snapshot = load_snapshot(self.snapshot_file)
+                self.embeddings_cache = {person['personId']: person for person in persons}
+                remove_stale_blocks(self.snapshot_file, keep=self._snapshot.block)
                 logger.info(f"Loaded {len(self.embeddings_cache)} face embeddings")
+            else:
+                logger.info("No existing embeddings file found, starting fresh")
+        except Exception as e:
+            # Starting empty would let compaction overwrite the snapshot and delete its blocks
+            logger.error(f"Error loading embeddings, refusing to start: {e}")
+            raise
+        
+        replayed = 0
+        for record in self.log.replay():
+            self._apply_mutation(record)
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} logged changes")
+        self._rebuild_encodings()
+    
+    def _apply_mutation(self, record: Dict):
+        if record["op"] == "upsert":
+            person_data = dict(record["person"])
+            embedding = person_data.pop("embedding", None)
+            self.embeddings_cache[person_data["personId"]] = person_data
+            if embedding:
+                self._pending[person_data["personId"]] = np.asarray(embedding, dtype=np.float32)
+        elif record["op"] == "status" and record["personId"] in self.embeddings_cache:
+            self.embeddings_cache[record["personId"]]["status"] = record["status"]
+    
+    def _log_mutation(self, record: Dict):
+        """Append a change to the log, compacting in the background once the log is large"""
+        self.log.append(record)
+        self._adopt_compaction()
+        if self.log.size >= self.compact_bytes:
+            self.compact()
+    
+    def get_embedding(self, person_id: str) -> Optional[np.ndarray]:
+        """A person's encoding (a read-only view when it comes from the snapshot)"""
+        embedding = self._pending.get(person_id)
+        if embedding is None:
+            row = self._snapshot.rows.get(person_id)
+            if row is not None:
+                embedding = self._snapshot.embeddings[row]
+        return embedding
+    
+    def compact(self, wait: bool = False):
+        """
+        Fold the mutation log into a new snapshot
+        The log is rotated right away; the snapshot is written from a copy on
+        a background thread, and the rotated segment is dropped once it is durable.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._adopt_compaction()
+        
+        persons = [dict(person) for person in self.embeddings_cache.values()]
+        pending = dict(self._pending)
+        snapshot = self._snapshot
+        self.log.rotate()
+        
+        def run():
+            try:
+                ids = [p["personId"] for p in persons if p["personId"] in pending or p["personId"] in snapshot.rows]
+                embeddings = np.empty((len(ids), EMBEDDING_DIM), dtype=np.float32)
+                snapshot_rows = np.array([-1 if pid in pending else snapshot.rows[pid] for pid in ids], dtype=np.int64)
+                mapped = snapshot_rows >= 0
+                embeddings[mapped] = snapshot.embeddings[snapshot_rows[mapped]]
+                for i in np.flatnonzero(~mapped):
+                    embeddings[i] = pending[ids[i]]
+                
+                block = write_snapshot(self.snapshot_file, persons, ids, embeddings)
+                self.log.finish_compaction()
+                self._compacted = (EmbeddingSnapshot.map(ids, block), pending)
+                logger.info(f"Compacted the mutation log into a snapshot of {len(persons)} persons")
             except Exception as e:
-                logger.error(f"Error loading embeddings: {e}")
-                self.embeddings_cache = {}
-        else:
-            logger.info("No existing embeddings file found, starting fresh")
-            self.embeddings_cache = {}
+                logger.error(f"Compaction failed, will retry: {e}")
+        
+        self._compaction = threading.Thread(target=run, name="embeddings-compaction", daemon=True)
+        self._compaction.start()
+        if wait:
+            self._compaction.join()
+            self._adopt_compaction()
+    
+    def _adopt_compaction(self):
+        """Switch to the snapshot a finished compaction wrote, and drop the embeddings it now covers"""
+        if self._compacted is None:
+            return
+        (self._snapshot, covered), self._compacted = self._compacted, None
+        for person_id, embedding in covered.items():
+            if self._pending.get(person_id) is embedding:
+                del self._pending[person_id]
+        remove_stale_blocks(self.snapshot_file, keep=self._snapshot.block)
+    
+    def close(self):
+        """Wait for compaction, flush the log and persist the ANN index"""
+        if self._compaction is not None:
+            self._compaction.join()
+        if self._ann_training is not None:
+            self._ann_training.join()
+            self._adopt_ann_index()
+        self.log.close()
+        self.save_ann_index()
+    
+    def store_stats(self) -> Dict:
+        return {
+            **self.log.stats(),
+            "compacting": self._compaction is not None and self._compaction.is_alive(),
+            "mapped_embeddings": len(self._snapshot.rows),
+            "pending_embeddings": len(self._pending)
+        }
+    
+    def load_ann_index(self, nlist: int = 0, nprobe: int = 16):
+        """
+        Load the ANN index from index_file, or build it, and bring it in line
+        with the open cases (the file may predate the latest changes)
+        """
+        index = None
+        if os.path.exists(self.index_file):
+            try:
+                index = IVFIndex.load(self.index_file, nlist=nlist, nprobe=nprobe)
+            except Exception as e:
+                logger.error(f"Error loading ANN index, rebuilding: {e}")
+        if index is None:
+            index = IVFIndex(dim=EMBEDDING_DIM, nlist=nlist, nprobe=nprobe)
+        
+        for person_id in [pid for pid in index.ids() if pid not in self._rows]:
+            index.remove(person_id)
+        # Re-add cases that are missing, or whose encoding changed since the file was saved
+        stale = [pid for pid in self._rows if pid not in index]
+        stored = [pid for pid in self._rows if pid in index]
+        if stored:
+            rows = np.array([self._rows[pid] for pid in stored], dtype=np.int64)
+            changed = np.any(index.vectors(stored) != self._encodings[rows], axis=1)
+            stale.extend(stored[i] for i in np.flatnonzero(changed))
+        index.add_many((person_id, self._encodings[self._rows[person_id]]) for person_id in stale)
+        self.ann_index = index
+        self.save_ann_index()
+        logger.info(f"ANN index ready: {len(index)} encodings, trained={index.trained}")
     
-    def save_embeddings(self):
-        """Save face embeddings to JSON file"""
+    def save_ann_index(self):
+        """Persist the ANN index (startup reconciles whatever changed since)"""
+        if self.ann_index is None:
+            return
         try:
-            embeddings_list = list(self.embeddings_cache.values())
-            with open(self.embeddings_file, 'w') as f:
-                json.dump(embeddings_list, f, indent=2)
-            logger.info(f"Saved {len(embeddings_list)} embeddings to file")
+            self.ann_index.save(self.index_file)
         except Exception as e:
-            logger.error(f"Error saving embeddings: {e}")
-            raise
+            logger.error(f"Error saving ANN index: {e}")
     
-    def extract_face_embedding(self, image_path: str) -> Optional[np.ndarray]:
+    def _update_ann_index(self, person_id: str, vector: Optional[np.ndarray]):
+        """Add (or with no vector, remove) a case in the live ANN index, retraining in the background once due"""
+        self._adopt_ann_index()
+        if vector is None:
+            self.ann_index.remove(person_id)
+        else:
+            self.ann_index.add(person_id, vector, train=False)
+        
+        if self._ann_training is not None:
+            self._ann_queue.append((person_id, None if vector is None else vector.copy()))
+        elif self.ann_index.needs_training():
+            self._train_ann_index()
+    
+    def _train_ann_index(self):
+        """
+        Train a copy of the ANN index on a background thread and save it
+        The live index keeps serving searches and taking changes, which are
+        queued and replayed onto the copy when it is adopted.
         """
-        Extract face embedding from image
+        live = self.ann_index
+        ids = live.ids()
+        vectors = live.vectors(ids)
+        
+        def run():
+            try:
+                index = IVFIndex(
+                    dim=EMBEDDING_DIM, nlist=live.nlist, nprobe=live.nprobe,
+                    min_train=live.min_train, train_sample=live.train_sample
+                )
+                index.add_many(zip(ids, vectors))
+                if not index.trained:
+                    index.train()
+                index.save(self.index_file)
+                self._ann_trained = index
+            except Exception as e:
+                logger.error(f"ANN index training failed: {e}")
+        
+        self._ann_training = threading.Thread(target=run, name="ann-index-training", daemon=True)
+        self._ann_training.start()
+    
+    def _adopt_ann_index(self):
+        """Switch to the index a finished training built, replaying the changes made meanwhile"""
+        if self._ann_training is None or self._ann_training.is_alive():
+            return
+        index, self._ann_trained, self._ann_training = self._ann_trained, None, None
+        queue, self._ann_queue = self._ann_queue, []
+        if index is None:
+            return  # Training failed; the live index already holds every change
+        for person_id, vector in queue:
+            if vector is None:
+                index.remove(person_id)
+            else:
+                index.add(person_id, vector, train=False)
+        self.ann_index = index
+    
+    def ann_index_stats(self) -> Optional[Dict]:
+        if self.ann_index is None:
+            return None
+        return {
+            "size": len(self.ann_index),
+            "trained": self.ann_index.trained,
+            "lists": len(self.ann_index.centroids) if self.ann_index.trained else 0,
+            "training": self._ann_training is not None,
+            "nprobe": self.ann_index.nprobe
+        }
+    
+    def _rebuild_encodings(self):
+        """Rebuild the encoding matrix of open cases, copying snapshot rows in one gather"""
+        ids = [
+            person_id for person_id, person_data in self.embeddings_cache.items()
+            if person_data.get("status") not in CLOSED_STATUSES
+            and (person_id in self._pending or person_id in self._snapshot.rows)
+        ]
+        self._encodings = np.empty((max(16, len(ids)), EMBEDDING_DIM), dtype=np.float32)
+        
+        snapshot_rows = np.array([-1 if pid in self._pending else self._snapshot.rows[pid] for pid in ids], dtype=np.int64)
+        mapped = np.flatnonzero(snapshot_rows >= 0)
+        self._encodings[mapped] = self._snapshot.embeddings[snapshot_rows[mapped]]
+        for row in np.flatnonzero(snapshot_rows < 0):
+            self._encodings[row] = self._pending[ids[row]]
+        
+        self._norms = np.einsum("ij,ij->i", self._encodings, self._encodings)
+        self._encoding_ids = ids
+        self._rows = {person_id: row for row, person_id in enumerate(ids)}
+    
+    def _sync_encoding(self, person_id: str, person_data: Dict):
+        """Add, replace or remove a person's row to match its embedding and status"""
+        embedding = self.get_embedding(person_id)
+        if person_data.get("status") in CLOSED_STATUSES or embedding is None:
+            self._remove_encoding(person_id)
+            return
+        
+        row = self._rows.get(person_id)
+        if row is None:
+            row = len(self._encoding_ids)
+            if row == len(self._encodings):
+                # Grow by doubling so uploads stay amortized O(1)
+                capacity = max(16, 2 * len(self._encodings))
+                self._encodings = np.concatenate([self._encodings, np.empty((capacity - row, EMBEDDING_DIM), dtype=np.float32)])
+                self._norms = np.concatenate([self._norms, np.empty(capacity - row, dtype=np.float32)])
+            self._encoding_ids.append(person_id)
+            self._rows[person_id] = row
+        
+        self._encodings[row] = embedding
+        self._norms[row] = self._encodings[row] @ self._encodings[row]
+        
+        if self.ann_index is not None:
+            self._update_ann_index(person_id, self._encodings[row])
+    
+    def _remove_encoding(self, person_id: str):
+        """Drop a person's row by moving the last row into its place"""
+        row = self._rows.pop(person_id, None)
+        if row is None:
+            return
+        if self.ann_index is not None:
+            self._update_ann_index(person_id, None)
+        last = len(self._encoding_ids) - 1
+        if row != last:
+            moved_id = self._encoding_ids[last]
+            self._encodings[row] = self._encodings[last]
+            self._norms[row] = self._norms[last]
+            self._encoding_ids[row] = moved_id
+            self._rows[moved_id] = row
+        self._encoding_ids.pop()
+    
+    def nearest_persons(self, face_encodings: np.ndarray, tolerance: float, top_k: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Per detected face, the (personId, face distance) pairs within tolerance,
+        closest first and at most top_k. Uses the ANN index once it is trained
+        (exact distances over its shortlist), otherwise scans every open case.
+        """
+        if self.ann_index is not None:
+            self._adopt_ann_index()
+        if self.ann_index is not None and self.ann_index.trained:
+            return self.ann_index.search(face_encodings, k=top_k, max_distance=tolerance)
+        
+        results = []
+        for face_row in self.face_distances(face_encodings):
+            candidates = np.flatnonzero(face_row <= tolerance)
+            if top_k and len(candidates) > top_k:
+                candidates = candidates[np.argpartition(face_row[candidates], top_k - 1)[:top_k]]
+            candidates = candidates[np.argsort(face_row[candidates])]
+            results.append([(self._encoding_ids[row], float(face_row[row])) for row in candidates])
+        return results
+    
+    def face_distances(self, face_encodings: np.ndarray) -> np.ndarray:
+        """
+        Euclidean distances (faces x enrolled persons), as face_recognition.face_distance
+        computes them, for all open cases at once
+        """
+        count = len(self._encoding_ids)
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+        if count == 0:
+            return np.empty((len(queries), 0), dtype=np.float32)
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, one matrix product for all pairs
+        squared = (queries * queries).sum(axis=1)[:, None] + self._norms[:count][None, :] - 2.0 * (queries @ self._encodings[:count].T)
+        return np.sqrt(np.maximum(squared, 0.0))
+    
+    def extract_face_embedding(self, image: ImageInput) -> Optional[np.ndarray]:
+        """
+        Extract face embedding from an image path, bytes or RGB array
         Returns 128-dimensional face encoding or None if no face found
         """
         if not FACE_RECOGNITION_AVAILABLE:
@@ -74,20 +434,20 @@ class FaceRecognitionService:
             
         try:
             # Load image
-            image = face_recognition.load_image_file(image_path)
+            pixels = load_image(image)
             
             # Find face locations
-            face_locations = face_recognition.face_locations(image)
+            face_locations = face_recognition.face_locations(pixels)
             
             if not face_locations:
-                logger.warning(f"No face detected in {image_path}")
+                logger.warning(f"No face detected in {_describe(image)}")
                 return None
             
             # Get face encodings (128-dimensional vector)
-            face_encodings = face_recognition.face_encodings(image, face_locations)
+            face_encodings = face_recognition.face_encodings(pixels, face_locations)
             
             if not face_encodings:
-                logger.warning(f"Could not extract encoding from {image_path}")
+                logger.warning(f"Could not extract encoding from {_describe(image)}")
                 return None
             
             # Return the first face encoding
@@ -103,17 +463,21 @@ class FaceRecognitionService:
         name: str,
         age: int,
         description: str,
-        image_path: str,
+        image: ImageInput,
         last_seen: Optional[str] = None,
-        reported_by: Optional[str] = None
+        reported_by: Optional[str] = None,
+        photo_path: Optional[str] = None
     ) -> Dict:
         """
         Upload missing person photo and extract face embedding
+        `photo_path` is where the photo is stored; defaults to `image` when that is a path
         Returns: {success, personId, embedding_created, photo_path}
         """
+        if photo_path is None and isinstance(image, str):
+            photo_path = image
         try:
             # Extract face embedding
-            embedding = self.extract_face_embedding(image_path)
+            embedding = self.extract_face_embedding(image)
             
             if embedding is None:
                 return {
@@ -123,25 +487,24 @@ class FaceRecognitionService:
                     "error": "No face detected in image"
                 }
             
-            # Convert numpy array to list for JSON storage
-            embedding_list = embedding.tolist()
-            
-            # Store embedding
-            self.embeddings_cache[person_id] = {
-                "personId": person_id,
-                "name": name,
-                "age": age,
-                "description": description,
-                "embedding": embedding_list,
-                "photo_path": image_path,
-                "last_seen": last_seen,
-                "reported_by": reported_by,
-                "timestamp": datetime.now().isoformat(),
-                "status": "searching"
-            }
-            
-            # Save to file
-            self.save_embeddings()
+            with self._lock:
+                # Store embedding (until the next compaction moves it into the snapshot)
+                self._pending[person_id] = embedding.astype(np.float32)
+                self.embeddings_cache[person_id] = person_data = {
+                    "personId": person_id,
+                    "name": name,
+                    "age": age,
+                    "description": description,
+                    "photo_path": photo_path,
+                    "last_seen": last_seen,
+                    "reported_by": reported_by,
+                    "timestamp": datetime.now().isoformat(),
+                    "status": "searching"
+                }
+                self._sync_encoding(person_id, person_data)
+                
+                # Append to the mutation log
+                self._log_mutation({"op": "upsert", "person": {**person_data, "embedding": embedding.tolist()}})
             
             logger.info(f"Successfully uploaded missing person: {person_id} ({name})")
             
@@ -149,7 +512,7 @@ class FaceRecognitionService:
                 "success": True,
                 "personId": person_id,
                 "embedding_created": True,
-                "photo_path": image_path
+                "photo_path": photo_path
             }
             
         except Exception as e:
@@ -161,10 +524,11 @@ class FaceRecognitionService:
                 "error": str(e)
             }
     
-    def match_faces(self, image_path: str, tolerance: float = 0.6) -> List[Dict]:
+    def match_faces(self, image: ImageInput, tolerance: float = 0.6, top_k: Optional[int] = None) -> List[Dict]:
         """
-        Compare camera frame against all stored face embeddings
+        Compare camera frame (path, bytes or RGB array) against all stored face embeddings of open cases
         Returns: List of matches with personId, confidence, and location
+        (at most top_k per detected face if given)
         """
         matches = []
         
@@ -174,35 +538,33 @@ class FaceRecognitionService:
         
         try:
             # Load and detect faces in the image
-            image = face_recognition.load_image_file(image_path)
-            face_locations = face_recognition.face_locations(image)
-            face_encodings = face_recognition.face_encodings(image, face_locations)
+            pixels = load_image(image)
+            face_locations = face_recognition.face_locations(pixels)
+            face_encodings = face_recognition.face_encodings(pixels, face_locations)
             
             if not face_encodings:
                 return matches
             
-            # Compare each detected face with stored embeddings
-            for face_encoding in face_encodings:
-                for person_id, person_data in self.embeddings_cache.items():
-                    stored_embedding = np.array(person_data['embedding'])
-                    
-                    # Calculate face distance (lower = more similar)
-                    face_distance = face_recognition.face_distance([stored_embedding], face_encoding)[0]
+            # Compare all detected faces with the stored embeddings at once (lower = more similar)
+            with self._lock:
+                nearest = self.nearest_persons(np.array(face_encodings), tolerance, top_k)
+                names = {person_id: self.embeddings_cache[person_id].get("name", "Unknown")
+                         for face_matches in nearest for person_id, _ in face_matches}
+            for face_matches in nearest:
+                for person_id, face_distance in face_matches:
                     
                     # Convert distance to confidence (0-100%)
                     # face_distance ranges from 0 (identical) to ~1.0 (very different)
-                    # We'll use tolerance to determine match
-                    if face_distance <= tolerance:
-                        confidence = max(0, min(100, (1 - face_distance) * 100))
-                        
-                        matches.append({
-                            "personId": person_id,
-                            "name": person_data.get("name", "Unknown"),
-                            "confidence": round(confidence, 2),
-                            "face_distance": round(float(face_distance), 4),
-                            "location": "Camera Feed",  # Can be enhanced with camera metadata
-                            "timestamp": datetime.now().isoformat()
-                        })
+                    confidence = max(0, min(100, (1 - face_distance) * 100))
+                    
+                    matches.append({
+                        "personId": person_id,
+                        "name": names[person_id],
+                        "confidence": round(confidence, 2),
+                        "face_distance": round(face_distance, 4),
+                        "location": "Camera Feed",  # Can be enhanced with camera metadata
+                        "timestamp": datetime.now().isoformat()
+                    })
             
             # Sort by confidence (highest first)
             matches.sort(key=lambda x: x['confidence'], reverse=True)
@@ -271,10 +633,12 @@ class FaceRecognitionService:
     
     def update_case_status(self, person_id: str, status: str):
         """Update the status of a missing person case"""
-        if person_id in self.embeddings_cache:
-            self.embeddings_cache[person_id]["status"] = status
-            self.save_embeddings()
-            logger.info(f"Updated status for {person_id} to {status}")
-            return True
-        return False
+        with self._lock:
+            if person_id in self.embeddings_cache:
+                self.embeddings_cache[person_id]["status"] = status
+                self._sync_encoding(person_id, self.embeddings_cache[person_id])
+                self._log_mutation({"op": "status", "personId": person_id, "status": status})
+                logger.info(f"Updated status for {person_id} to {status}")
+                return True
+            return False
 
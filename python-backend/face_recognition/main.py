@@ -11,6 +11,7 @@ from datetime import datetime
 from pathlib import Path
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -32,10 +33,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Approximate nearest-neighbour index for large enrolments (IVF; exact matching when off)
+FACE_ANN_INDEX = os.getenv("FACE_ANN_INDEX", "0").lower() not in ("0", "false", "no")
+FACE_ANN_NLIST = int(os.getenv("FACE_ANN_NLIST", "0"))  # 0 = about 4 x sqrt(enrolled faces)
+FACE_ANN_NPROBE = int(os.getenv("FACE_ANN_NPROBE", "16"))  # Lists scanned per face: higher = better recall, slower
+
+# Mutation log: fsync at most this often (0 = on every change) and compact past this size
+FACE_LOG_FSYNC_INTERVAL = float(os.getenv("FACE_LOG_FSYNC_INTERVAL", "0.05"))  # seconds
+FACE_LOG_COMPACT_MB = float(os.getenv("FACE_LOG_COMPACT_MB", "16"))
+
 # Initialize face recognition service
 face_service = FaceRecognitionService(
     embeddings_file="data/face_embeddings.json",
-    uploads_dir="uploads/missing_persons"
+    snapshot_file="data/face_embeddings.meta.json",
+    log_file="data/face_embeddings.log",
+    uploads_dir="uploads/missing_persons",
+    use_ann_index=FACE_ANN_INDEX,
+    ann_nlist=FACE_ANN_NLIST,
+    ann_nprobe=FACE_ANN_NPROBE,
+    index_file="data/face_index.npz",
+    log_fsync_interval=FACE_LOG_FSYNC_INTERVAL,
+    compact_bytes=int(FACE_LOG_COMPACT_MB * 1024 * 1024)
 )
 
 # Request/Response models
@@ -78,10 +96,26 @@ async def health_check():
     return {
         "status": "healthy",
         "embeddings_loaded": len(face_service.embeddings_cache),
+        "ann_index": face_service.ann_index_stats(),
+        "store": face_service.store_stats(),
         "service": "face_recognition"
     }
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush the mutation log and persist the ANN index"""
+    face_service.close()
+
+
+def save_photo(file_path: str, content: bytes):
+    """Persist an uploaded photo before its record is committed"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as buffer:
+        buffer.write(content)
+    logger.info(f"Saved uploaded file: {file_path}")
+
+
 @app.post("/api/face/upload", response_model=UploadResponse)
 async def upload_missing_person(
     photo: UploadFile = File(...),
@@ -115,30 +149,26 @@ async def upload_missing_person(
         if not photo.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Save uploaded file
+        # Where the original photo will be stored
         file_extension = Path(photo.filename).suffix or '.jpg'
         filename = f"{person_id}{file_extension}"
         file_path = os.path.join(face_service.uploads_dir, filename)
         
-        # Ensure uploads directory exists
-        os.makedirs(face_service.uploads_dir, exist_ok=True)
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            content = await photo.read()
-            buffer.write(content)
-        
-        logger.info(f"Saved uploaded file: {file_path}")
+        # Write the photo off the event loop before the record that points to it is logged
+        content = await photo.read()
+        await run_in_threadpool(save_photo, file_path, content)
         
-        # Extract face embedding and store
-        result = face_service.upload_missing_person(
+        # Extract face embedding from the uploaded bytes and store (decode and dlib run in the threadpool)
+        result = await run_in_threadpool(
+            face_service.upload_missing_person,
             person_id=person_id,
             name=name,
             age=age,
             description=description,
-            image_path=file_path,
+            image=content,
             last_seen=last_seen,
-            reported_by=reported_by
+            reported_by=reported_by,
+            photo_path=file_path
         )
         
         if not result["success"]:
@@ -159,7 +189,8 @@ async def upload_missing_person(
 @app.post("/api/face/match", response_model=List[MatchResult])
 async def match_faces(
     photo: UploadFile = File(...),
-    tolerance: float = Form(0.6)
+    tolerance: float = Form(0.6),
+    top_k: int = Form(0)
 ):
     """
     Compare camera frame against stored face embeddings
@@ -167,6 +198,7 @@ async def match_faces(
     Accepts:
     - photo: Camera frame image
     - tolerance: Face distance tolerance (default 0.6, lower = stricter)
+    - top_k: Best matches to return per detected face (default 0 = all within tolerance)
     
     Returns:
     - List of matches with personId, confidence, location
@@ -176,29 +208,16 @@ async def match_faces(
         if not photo.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Save temporary file for processing
-        temp_file = f"temp_{uuid.uuid4().hex}.jpg"
-        temp_path = os.path.join(face_service.uploads_dir, temp_file)
+        # Match faces in the threadpool, decoding the frame in memory
+        content = await photo.read()
+        matches = await run_in_threadpool(face_service.match_faces, content, tolerance=tolerance, top_k=top_k or None)
         
-        with open(temp_path, "wb") as buffer:
-            content = await photo.read()
-            buffer.write(content)
+        # Convert to response format
+        results = [
+            MatchResult(**match) for match in matches
+        ]
         
-        try:
-            # Match faces
-            matches = face_service.match_faces(temp_path, tolerance=tolerance)
-            
-            # Convert to response format
-            results = [
-                MatchResult(**match) for match in matches
-            ]
-            
-            return results
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        return results
         
     except HTTPException:
         raise
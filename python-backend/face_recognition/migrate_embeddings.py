@@ -0,0 +1,43 @@
+"""
+Convert the JSON embeddings store into the binary snapshot format
+Run it with the service stopped. The service also migrates automatically
+on its first start, but a large store is faster to convert ahead of time.
+
+    python migrate_embeddings.py --json data/face_embeddings.json --snapshot data/face_embeddings.meta.json
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from embedding_store import load_snapshot, migrate_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate face embeddings from JSON to the binary snapshot format")
+    parser.add_argument("--json", default="data/face_embeddings.json", help="Existing JSON embeddings file")
+    parser.add_argument("--snapshot", default="data/face_embeddings.meta.json", help="Snapshot metadata file to write")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing snapshot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not os.path.exists(args.json):
+        sys.exit(f"{args.json} not found")
+    if os.path.exists(args.snapshot) and not args.force:
+        # The mutation log holds changes relative to the existing snapshot, not to the JSON file
+        sys.exit(f"{args.snapshot} already exists; pass --force to replace it with {args.json}")
+
+    started = time.perf_counter()
+    count = migrate_json(args.json, args.snapshot)
+    persons, snapshot = load_snapshot(args.snapshot)
+    if len(persons) != count:
+        sys.exit(f"Snapshot check failed: wrote {count} persons, read back {len(persons)}")
+    print(f"Migrated {count} persons ({len(snapshot.rows)} embeddings) to {args.snapshot} "
+          f"in {time.perf_counter() - started:.1f}s")
+    print(f"{args.json} is no longer read and can be archived")
+
+
+if __name__ == "__main__":
+    main()
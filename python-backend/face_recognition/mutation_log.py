@@ -0,0 +1,163 @@
+"""
+Append-only mutation log for the face embeddings store
+Every upsert and status change is appended as one JSON line instead of
+rewriting the whole embeddings file. fsync is batched by a background
+flusher. Compaction rotates the log to a ".compacting" segment while a new
+snapshot is written; recovery replays both segments on top of the last
+snapshot and drops a torn last line left by a crash mid-write.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_dir(path: str):
+    """Make a rename or new file in `path`'s directory durable (no-op where unsupported)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class MutationLog:
+    """
+    JSON-lines write-ahead log with group fsync
+
+    `append` writes the record and returns; the flusher thread fsyncs at most
+    every `fsync_interval` seconds, so a crash loses at most that window of
+    acknowledged writes. With `fsync_interval=0` every append is fsynced
+    before it returns.
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.05):
+        self.path = path
+        self.compacting_path = f"{path}.compacting"
+        self.fsync_interval = fsync_interval
+        self.size = 0
+        self.appended = 0
+        self.fsyncs = 0
+
+        self._file = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def compaction_pending(self) -> bool:
+        """A rotated segment exists whose snapshot has not been completed"""
+        return os.path.exists(self.compacting_path)
+
+    def replay(self) -> Iterator[Dict]:
+        """Records from the rotated segment (if any), then the active log, in order"""
+        for path in (self.compacting_path, self.path):
+            if os.path.exists(path):
+                yield from self._read(path)
+
+    def _read(self, path: str) -> Iterator[Dict]:
+        good_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write at the tail
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_bytes += len(line)
+                yield record
+
+        if good_bytes < os.path.getsize(path):
+            logger.warning(f"Ignoring {os.path.getsize(path) - good_bytes} bytes of incomplete records at the end of {path}")
+            with open(path, "r+b") as f:
+                f.truncate(good_bytes)
+
+    def open(self):
+        """Open the active log for appending and start the flusher"""
+        self._file = open(self.path, "ab")
+        self.size = self._file.tell()
+        _fsync_dir(self.path)
+        if self.fsync_interval > 0:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="mutation-log-fsync", daemon=True)
+            self._flusher.start()
+
+    def append(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self.size += len(line)
+            self.appended += 1
+            self._dirty = True
+            if self.fsync_interval <= 0:
+                self._sync()
+
+    def _sync(self):
+        # Caller holds the lock
+        if self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+            self.fsyncs += 1
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                try:
+                    self._sync()
+                except OSError as e:
+                    logger.error(f"Mutation log fsync failed: {e}")
+
+    def rotate(self):
+        """Move the active log aside for compaction and start a new one"""
+        with self._lock:
+            self._sync()
+            self._file.close()
+            if self.compaction_pending:
+                # An earlier compaction failed: keep its records, followed by these
+                with open(self.compacting_path, "ab") as segment, open(self.path, "rb") as active:
+                    segment.write(active.read())
+                    segment.flush()
+                    os.fsync(segment.fileno())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.compacting_path)
+            self._file = open(self.path, "ab")
+            self.size = 0
+        _fsync_dir(self.path)
+
+    def finish_compaction(self):
+        """The snapshot now covers the rotated segment; drop it"""
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)
+            _fsync_dir(self.path)
+
+    def close(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict:
+        return {
+            "log_bytes": self.size,
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "compaction_pending": self.compaction_pending
+        }
@@ -458,8 +458,8 @@ const LostAndFound: React.FC = () => {
             }
             
             // Also send to video processing service (for color matching)
-            const frameData = await lostAndFoundService.captureFrame(videoRef.current);
-            lostAndFoundService.sendFrame(frameData);
+            const frameBlob = await lostAndFoundService.captureFrameBlob(videoRef.current);
+            await lostAndFoundService.sendFrameBinary(frameBlob);
           } catch (error) {
             console.error('Error capturing frame:', error);
           }
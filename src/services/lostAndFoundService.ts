@@ -26,11 +26,128 @@ export interface MatchResult {
   timestamp: string;
   imageUrl?: string;
   location?: string;
+  bbox?: [number, number, number, number];
+  frameIndex?: number;
+  videoTimestamp?: number;
+  frameId?: number;  // Binary stream frames: from the frame header
+  captureTimestamp?: number;
+  cameraId?: string;
+  streamId?: string;
+  zone?: string;
+}
+
+export interface MatchSubscriptionFilters {
+  streams?: string[];
+  zones?: string[];
+  profiles?: string[];
 }
 
 export interface VideoStreamConfig {
   streamId: string;
+  zone?: string;
   missingPersons: MissingPersonProfile[];
+  targetLatencyMs?: number;
+  maxFps?: number;
+  motionGate?: boolean;
+  decodeScale?: 'auto' | '1' | '2' | '4' | '8';
+  detectImgsz?: number;
+}
+
+export interface VideoStreamStats {
+  streamId: string;
+  received: number;
+  processed: number;
+  dropped: number;
+  droppedStale: number;
+  skippedStride: number;
+  rejectedBusy: number;
+  stride: number;
+  latencyMs: number | null;
+  inputFps: number | null;
+  motionSkipped?: number;
+  motionCropped?: number;
+  motionSkipRate?: number;
+  activeTracks: number;
+  lastFrameId?: number;  // Binary frames only
+  lastCaptureTimestamp?: number;
+  notificationsSent: number;
+  notificationsSuppressed: number;
+}
+
+export interface CameraConfig {
+  id?: string;
+  source: string;  // RTSP/HTTP URL, device index or local video file
+  name?: string;
+  location?: string;
+  zone?: string;
+  missingPersons: MissingPersonProfile[];
+  maxFps?: number;
+  loop?: boolean;  // Replay local files, for testing
+  motionGate?: boolean;
+  detectImgsz?: number;
+}
+
+export interface CameraInfo {
+  id: string;
+  name: string;
+  source: string;
+  location: string | null;
+  zone: string | null;
+  maxFps: number;
+  loop: boolean;
+  profiles: number;
+  healthy: boolean;
+  state: 'connecting' | 'running' | 'reconnecting' | 'ended' | 'stopped';
+  fps: number | null;
+  framesRead: number;
+  framesDelivered: number;
+  droppedStale: number;
+  skippedFps: number;
+  reconnects: number;
+  lastFrameAgeSeconds: number | null;
+  lastError: string | null;
+  framesProcessed: number;
+  processingFps: number | null;
+  latencyMs: number | null;
+  rejectedBusy: number;
+  errors: number;
+  motionSkipped?: number;
+  motionCropped?: number;
+  motionSkipRate?: number;
+  activeTracks: number;
+  notificationsSent: number;
+  notificationsSuppressed: number;
+  subscribers: number;
+}
+
+// Binary frame protocol: 40-byte little-endian header followed by JPEG/PNG bytes
+// magic "EPXF" | version u8 | flags u8 | pad u16 | frame id u64 | timestamp ms f64 | camera id 16 bytes
+const FRAME_MAGIC = [0x45, 0x50, 0x58, 0x46];
+const FRAME_VERSION = 1;
+const FRAME_HEADER_SIZE = 40;
+const CAMERA_ID_BYTES = 16;
+
+/**
+ * Prefix encoded image bytes with the binary frame header
+ */
+export function encodeFrameMessage(
+  image: ArrayBuffer,
+  frameId: number,
+  timestampMs: number,
+  cameraId: string
+): ArrayBuffer {
+  const message = new Uint8Array(FRAME_HEADER_SIZE + image.byteLength);
+  const view = new DataView(message.buffer);
+
+  message.set(FRAME_MAGIC, 0);
+  view.setUint8(4, FRAME_VERSION);
+  view.setUint8(5, 0);
+  view.setBigUint64(8, BigInt(frameId), true);
+  view.setFloat64(16, timestampMs, true);
+  message.set(new TextEncoder().encode(cameraId).slice(0, CAMERA_ID_BYTES), 24);
+  message.set(new Uint8Array(image), FRAME_HEADER_SIZE);
+
+  return message.buffer;
 }
 
 class LostAndFoundService {
@@ -39,6 +156,10 @@ class LostAndFoundService {
   private wsConnection: WebSocket | null = null;
   private reconnectAttempts = 0;
   private maxReconnectAttempts = 5;
+  private streamId = '';
+  private frameCounter = 0;
+  private cameraSubscriptions = new Map<string, WebSocket>();
+  private matchSubscriptions = new Set<WebSocket>();
 
   constructor() {
     // Use environment variable or default to localhost
@@ -99,7 +220,8 @@ class LostAndFoundService {
     onMatch: (match: MatchResult) => void,
     onError?: (error: Error) => void,
     onConnect?: () => void,
-    onDisconnect?: () => void
+    onDisconnect?: () => void,
+    onStats?: (stats: VideoStreamStats) => void
   ): void {
     if (this.wsConnection && this.wsConnection.readyState === WebSocket.OPEN) {
       console.warn('WebSocket already connected');
@@ -108,6 +230,8 @@ class LostAndFoundService {
 
     try {
       this.wsConnection = new WebSocket(`${this.wsUrl}/ws/video-stream`);
+      this.wsConnection.binaryType = 'arraybuffer';
+      this.streamId = config.streamId;
 
       this.wsConnection.onopen = () => {
         console.log('Video stream WebSocket connected');
@@ -116,7 +240,13 @@ class LostAndFoundService {
         // Send configuration
         this.wsConnection?.send(JSON.stringify({
           streamId: config.streamId,
+          zone: config.zone,
           missingPersons: config.missingPersons,
+          targetLatencyMs: config.targetLatencyMs,
+          maxFps: config.maxFps,
+          motionGate: config.motionGate,
+          decodeScale: config.decodeScale,
+          detectImgsz: config.detectImgsz,
         }));
 
         onConnect?.();
@@ -124,8 +254,22 @@ class LostAndFoundService {
 
       this.wsConnection.onmessage = (event) => {
         try {
-          const match: MatchResult = JSON.parse(event.data);
-          onMatch(match);
+          const message = JSON.parse(event.data);
+
+          // Control messages carry a type; match results do not
+          if (message.type === 'busy') {
+            console.warn('Video processing service busy, frame dropped');
+            return;
+          }
+          if (message.type === 'stats') {
+            onStats?.(message as VideoStreamStats);
+            return;
+          }
+          if (message.type) {
+            return;
+          }
+
+          onMatch(message as MatchResult);
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }
@@ -147,7 +291,7 @@ class LostAndFoundService {
           console.log(`Reconnecting in ${delay}ms... (attempt ${this.reconnectAttempts})`);
           
           setTimeout(() => {
-            this.startVideoStream(config, onMatch, onError, onConnect, onDisconnect);
+            this.startVideoStream(config, onMatch, onError, onConnect, onDisconnect, onStats);
           }, delay);
         }
       };
@@ -171,6 +315,23 @@ class LostAndFoundService {
     }
   }
 
+  /**
+   * Send frame to WebSocket stream as raw image bytes (binary protocol, no base64)
+   */
+  async sendFrameBinary(image: Blob): Promise<void> {
+    if (this.wsConnection && this.wsConnection.readyState === WebSocket.OPEN) {
+      const message = encodeFrameMessage(
+        await image.arrayBuffer(),
+        this.frameCounter++,
+        Date.now(),
+        this.streamId
+      );
+      this.wsConnection.send(message);
+    } else {
+      console.warn('WebSocket not connected');
+    }
+  }
+
   /**
    * Update missing persons list in active stream
    */
@@ -183,6 +344,32 @@ class LostAndFoundService {
     }
   }
 
+  /**
+   * Add or update individual missing persons in the active stream
+   */
+  upsertMissingPersons(missingPersons: MissingPersonProfile[]): void {
+    if (this.wsConnection && this.wsConnection.readyState === WebSocket.OPEN) {
+      this.wsConnection.send(JSON.stringify({
+        type: 'update_profiles',
+        mode: 'upsert',
+        missingPersons: missingPersons,
+      }));
+    }
+  }
+
+  /**
+   * Remove individual missing persons from the active stream
+   */
+  removeMissingPersons(ids: string[]): void {
+    if (this.wsConnection && this.wsConnection.readyState === WebSocket.OPEN) {
+      this.wsConnection.send(JSON.stringify({
+        type: 'update_profiles',
+        mode: 'remove',
+        ids: ids,
+      }));
+    }
+  }
+
   /**
    * Stop video stream
    */
@@ -196,6 +383,157 @@ class LostAndFoundService {
     }
   }
 
+  /**
+   * Start a camera pulled by the video service itself (no browser frames)
+   */
+  async addCamera(config: CameraConfig): Promise<CameraInfo> {
+    return this.cameraRequest('/api/cameras', 'POST', config);
+  }
+
+  /**
+   * Cameras with their FPS and health stats
+   */
+  async listCameras(): Promise<CameraInfo[]> {
+    const data = await this.cameraRequest('/api/cameras', 'GET');
+    return data.cameras || [];
+  }
+
+  /**
+   * Replace (default), upsert or remove a camera's missing persons
+   */
+  async updateCameraProfiles(
+    cameraId: string,
+    missingPersons: MissingPersonProfile[],
+    mode: 'replace' | 'upsert' | 'remove' = 'replace',
+    ids: string[] = []
+  ): Promise<CameraInfo> {
+    return this.cameraRequest(`/api/cameras/${encodeURIComponent(cameraId)}/profiles`, 'POST', {
+      mode,
+      missingPersons,
+      ids,
+    });
+  }
+
+  /**
+   * Stop a camera and close its subscriptions
+   */
+  async removeCamera(cameraId: string): Promise<void> {
+    await this.cameraRequest(`/api/cameras/${encodeURIComponent(cameraId)}`, 'DELETE');
+  }
+
+  private async cameraRequest(path: string, method: string, body?: unknown): Promise<any> {
+    const response = await fetch(`${this.baseUrl}${path}`, {
+      method,
+      headers: body ? { 'Content-Type': 'application/json' } : undefined,
+      body: body ? JSON.stringify(body) : undefined,
+    });
+
+    if (!response.ok) {
+      const data = await response.json().catch(() => ({}));
+      throw new Error(data.detail || `HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+  }
+
+  /**
+   * Receive a camera's match results and periodic stats
+   */
+  subscribeToCamera(
+    cameraId: string,
+    onMatch: (match: MatchResult) => void,
+    onStats?: (stats: CameraInfo) => void,
+    onError?: (error: Error) => void
+  ): void {
+    this.unsubscribeFromCamera(cameraId);
+
+    const socket = new WebSocket(`${this.wsUrl}/ws/cameras/${encodeURIComponent(cameraId)}`);
+    this.cameraSubscriptions.set(cameraId, socket);
+
+    socket.onmessage = (event) => {
+      try {
+        const message = JSON.parse(event.data);
+        if (message.type === 'stats') {
+          onStats?.(message as CameraInfo);
+          return;
+        }
+        if (message.type === 'error') {
+          onError?.(new Error(message.detail));
+          return;
+        }
+        if (message.type) {
+          return;
+        }
+        onMatch(message as MatchResult);
+      } catch (error) {
+        console.error('Error parsing camera message:', error);
+      }
+    };
+
+    socket.onerror = () => {
+      onError?.(new Error('Camera subscription error'));
+    };
+
+    socket.onclose = () => {
+      if (this.cameraSubscriptions.get(cameraId) === socket) {
+        this.cameraSubscriptions.delete(cameraId);
+      }
+    };
+  }
+
+  unsubscribeFromCamera(cameraId: string): void {
+    this.cameraSubscriptions.get(cameraId)?.close();
+    this.cameraSubscriptions.delete(cameraId);
+  }
+
+  /**
+   * Receive match results from all streams and cameras, optionally filtered;
+   * returns a function that closes the subscription
+   */
+  subscribeToMatches(
+    filters: MatchSubscriptionFilters,
+    onMatch: (match: MatchResult) => void,
+    onError?: (error: Error) => void
+  ): () => void {
+    const params = new URLSearchParams();
+    if (filters.streams?.length) params.set('streams', filters.streams.join(','));
+    if (filters.zones?.length) params.set('zones', filters.zones.join(','));
+    if (filters.profiles?.length) params.set('profiles', filters.profiles.join(','));
+    const query = params.toString();
+
+    const socket = new WebSocket(`${this.wsUrl}/ws/matches${query ? `?${query}` : ''}`);
+    this.matchSubscriptions.add(socket);
+
+    socket.onmessage = (event) => {
+      try {
+        const message = JSON.parse(event.data);
+        if (message.type === 'error') {
+          // Sent before the server drops a subscriber that fell behind
+          onError?.(new Error(message.detail));
+          return;
+        }
+        if (message.type) {
+          return;
+        }
+        onMatch(message as MatchResult);
+      } catch (error) {
+        console.error('Error parsing match message:', error);
+      }
+    };
+
+    socket.onerror = () => {
+      onError?.(new Error('Match subscription error'));
+    };
+
+    socket.onclose = () => {
+      this.matchSubscriptions.delete(socket);
+    };
+
+    return () => {
+      socket.close();
+      this.matchSubscriptions.delete(socket);
+    };
+  }
+
   /**
    * Convert canvas or video element to base64
    */
@@ -230,6 +568,36 @@ class LostAndFoundService {
     });
   }
 
+  /**
+   * Capture a video element or canvas as a JPEG blob (for the binary protocol)
+   */
+  async captureFrameBlob(source: HTMLVideoElement | HTMLCanvasElement): Promise<Blob> {
+    let canvas: HTMLCanvasElement;
+
+    if (source instanceof HTMLVideoElement) {
+      canvas = document.createElement('canvas');
+      canvas.width = source.videoWidth || source.clientWidth;
+      canvas.height = source.videoHeight || source.clientHeight;
+      const ctx = canvas.getContext('2d');
+
+      if (!ctx) {
+        throw new Error('Could not get canvas context');
+      }
+
+      ctx.drawImage(source, 0, 0, canvas.width, canvas.height);
+    } else {
+      canvas = source;
+    }
+
+    return new Promise((resolve, reject) => {
+      canvas.toBlob(
+        (blob) => (blob ? resolve(blob) : reject(new Error('Could not encode frame'))),
+        'image/jpeg',
+        0.8
+      );
+    });
+  }
+
   /**
    * Extract color from description text (simple heuristic)
    */
@@ -0,0 +1,175 @@
+"""
+Cross-stream detection batching
+Frames from every caller share one queue and are run through the detector together
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionBatcher:
+    """
+    Shared inference scheduler for person detection
+
+    Callers submit single frames and get a Future back. A background thread
+    waits until either `max_batch_size` frames are queued or the oldest frame
+    has waited `max_wait_ms`, then runs `detect_fn` once over the whole batch.
+    `detect_fn` takes a list of frames and returns one detections array per frame.
+    Frames submitted with a detector input size run in one call per size,
+    as `detect_fn(frames, imgsz=size)`.
+    """
+
+    def __init__(
+        self,
+        detect_fn: Callable[[List[np.ndarray]], List[np.ndarray]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0
+    ):
+        self.detect_fn = detect_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+
+        self._queue: Deque[Tuple[np.ndarray, Future, float, Optional[int]]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Tuning statistics
+        self._batches = 0
+        self._frames = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_inference = 0.0
+        self._batch_size_counts: Dict[int, int] = {}
+
+    def start(self):
+        """Start the batching thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="detection-batcher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Detection batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait_ms})"
+        )
+
+    def stop(self):
+        """Stop the batching thread and fail any frames still queued"""
+        with self._condition:
+            self._running = False
+            pending = list(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+
+        for _, future, _, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Detection batcher stopped"))
+
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def submit(self, frame: np.ndarray, imgsz: Optional[int] = None) -> Future:
+        """Queue a frame for detection; the Future resolves to its detections array"""
+        future: Future = Future()
+        with self._condition:
+            if not self._running:
+                future.set_exception(RuntimeError("Detection batcher is not running"))
+                return future
+            self._queue.append((frame, future, time.perf_counter(), imgsz))
+            self._condition.notify()
+        return future
+
+    def _next_batch(self) -> List[Tuple[np.ndarray, Future, float, Optional[int]]]:
+        """Block until a batch is ready (full, or oldest frame waited long enough)"""
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+
+            if not self._running:
+                return []
+
+            deadline = self._queue[0][2] + self.max_wait_ms / 1000.0
+            while self._running and len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch_size = min(self.max_batch_size, len(self._queue))
+            return [self._queue.popleft() for _ in range(batch_size)]
+
+    def _run(self):
+        while self._running:
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            groups: Dict[Optional[int], List[int]] = {}
+            for i, (_, _, _, imgsz) in enumerate(batch):
+                groups.setdefault(imgsz, []).append(i)
+
+            results: List = [None] * len(batch)
+            errors: List[Optional[Exception]] = [None] * len(batch)
+            for imgsz, indices in groups.items():
+                frames = [batch[i][0] for i in indices]
+                try:
+                    detections = self.detect_fn(frames) if imgsz is None else self.detect_fn(frames, imgsz=imgsz)
+                    for i, result in zip(indices, detections):
+                        results[i] = result
+                except Exception as e:
+                    logger.error(f"Batched detection failed: {e}")
+                    for i in indices:
+                        errors[i] = e
+
+            finished = time.perf_counter()
+            self._record(batch, started, finished)
+
+            for i, (_, future, _, _) in enumerate(batch):
+                if future.set_running_or_notify_cancel():
+                    if errors[i] is not None:
+                        future.set_exception(errors[i])
+                    else:
+                        future.set_result(results[i])
+
+    def _record(self, batch: List[Tuple[np.ndarray, Future, float, Optional[int]]], started: float, finished: float):
+        with self._condition:
+            size = len(batch)
+            self._batches += 1
+            self._frames += size
+            self._total_inference += finished - started
+            self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+            for _, _, enqueued_at, _ in batch:
+                wait = started - enqueued_at
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+    def stats(self) -> Dict:
+        """Batch size and queue wait statistics for tuning"""
+        with self._condition:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": len(self._queue),
+                "batches": self._batches,
+                "frames": self._frames,
+                "avg_batch_size": round(self._frames / self._batches, 2) if self._batches else 0.0,
+                "batch_size_counts": dict(sorted(self._batch_size_counts.items())),
+                "avg_queue_wait_ms": round(self._total_wait / self._frames * 1000, 2) if self._frames else 0.0,
+                "max_queue_wait_ms": round(self._max_wait * 1000, 2),
+                "avg_batch_inference_ms": round(self._total_inference / self._batches * 1000, 2) if self._batches else 0.0,
+            }
@@ -0,0 +1,142 @@
+"""
+Colour extraction benchmark
+Compares K-Means ("accurate") colour naming with the lookup-table namer on
+synthetic crowded frames
+
+Usage:
+    python benchmarks/color_benchmark.py --persons 40 --frames 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colors import COLOR_RANGES, ColorNamer, kmeans_dominant_color  # noqa: E402
+
+
+def make_crowd_crops(
+    rng: np.random.Generator,
+    persons: int,
+    noise: float,
+    clutter: float
+) -> Tuple[List[np.ndarray], List[str]]:
+    """
+    Torso and leg crops for one crowded frame
+    Each crop is a clothing colour drawn from COLOR_RANGES plus pixel noise,
+    with a fraction of the area covered by random background clutter
+    """
+    names = list(COLOR_RANGES.keys())
+    crops, truth = [], []
+
+    for _ in range(persons * 2):
+        name = names[rng.integers(len(names))]
+        lower, upper = (np.array(bound) for bound in COLOR_RANGES[name])
+        base = (lower + upper) / 2
+
+        height, width = int(rng.integers(60, 160)), int(rng.integers(40, 100))
+        crop = base + rng.normal(0, noise, size=(height, width, 3))
+
+        # Background clutter (arms, bags, other people) in a vertical band
+        band = int(width * clutter)
+        if band > 0:
+            start = int(rng.integers(0, width - band + 1))
+            crop[:, start:start + band] = rng.integers(0, 256, size=(height, band, 3))
+
+        crops.append(np.clip(crop, 0, 255).astype(np.uint8))
+        truth.append(name)
+
+    return crops, truth
+
+
+def time_method(frames: List[List[np.ndarray]], method) -> Tuple[float, List[List[str]]]:
+    """Average milliseconds per frame and the names produced"""
+    outputs = []
+    started = time.perf_counter()
+    for crops in frames:
+        outputs.append(method(crops))
+    elapsed = time.perf_counter() - started
+    return elapsed / len(frames) * 1000, outputs
+
+
+def agreement(a: List[List[str]], b: List[List[str]]) -> float:
+    flat_a = [name for frame in a for name in frame]
+    flat_b = [name for frame in b for name in frame]
+    return sum(x == y for x, y in zip(flat_a, flat_b)) / max(1, len(flat_a))
+
+
+def run(args) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    frames, truth = [], []
+    for _ in range(args.frames):
+        crops, names = make_crowd_crops(rng, args.persons, args.noise, args.clutter)
+        frames.append(crops)
+        truth.append(names)
+
+    namer = ColorNamer(bits=args.bits)
+
+    methods = {
+        "kmeans_per_crop": lambda crops: [kmeans_dominant_color(crop) for crop in crops],
+        "lut_per_crop": lambda crops: [namer.name(crop) for crop in crops],
+        "lut_per_frame": namer.name_many,
+    }
+
+    report = {
+        "config": vars(args),
+        "crops_per_frame": args.persons * 2,
+        "methods": {},
+    }
+    outputs = {}
+    for name, method in methods.items():
+        ms_per_frame, outputs[name] = time_method(frames, method)
+        report["methods"][name] = {
+            "ms_per_frame": round(ms_per_frame, 3),
+            "accuracy_vs_truth": round(agreement(outputs[name], truth), 4),
+        }
+
+    for name in ("lut_per_crop", "lut_per_frame"):
+        report["methods"][name]["agreement_with_kmeans"] = round(
+            agreement(outputs[name], outputs["kmeans_per_crop"]), 4
+        )
+        report["methods"][name]["speedup_vs_kmeans"] = round(
+            report["methods"]["kmeans_per_crop"]["ms_per_frame"] / max(report["methods"][name]["ms_per_frame"], 1e-9), 1
+        )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark colour extraction on crowded frames")
+    parser.add_argument("--persons", type=int, default=40, help="Persons per frame (2 crops each)")
+    parser.add_argument("--frames", type=int, default=20, help="Number of frames")
+    parser.add_argument("--noise", type=float, default=12.0, help="Per-pixel noise std-dev")
+    parser.add_argument("--clutter", type=float, default=0.2, help="Fraction of each crop covered by clutter")
+    parser.add_argument("--bits", type=int, default=5, help="Lookup-table bits per channel")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.frames} frames x {report['crops_per_frame']} crops")
+    for name, result in report["methods"].items():
+        extras = ""
+        if "speedup_vs_kmeans" in result:
+            extras = (f"  agreement_with_kmeans={result['agreement_with_kmeans']:.2%}"
+                      f"  speedup={result['speedup_vs_kmeans']}x")
+        print(f"{name:>16}: {result['ms_per_frame']:9.2f} ms/frame"
+              f"  accuracy={result['accuracy_vs_truth']:.2%}{extras}")
+
+
+if __name__ == "__main__":
+    main()
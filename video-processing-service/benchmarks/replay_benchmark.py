@@ -0,0 +1,262 @@
+"""
+Offline replay benchmark for the video pipeline
+Replays a local video file or synthetic crowd frames through decode and
+process_frame, and reports throughput plus p50/p95/p99 latency per stage
+(decode, detect, pose, color, candidates, clip, match)
+
+Usage:
+    python benchmarks/replay_benchmark.py --persons 20 --profiles 500 --frames 100
+    python benchmarks/replay_benchmark.py --video lobby.mp4 --frames 300 --json
+    python benchmarks/replay_benchmark.py --random-weights --json --output run.json
+
+Models are loaded like the service does (MODEL_BACKEND, DETECTOR_MODEL, ...),
+so weights must already be on disk to run offline. `--random-weights` builds
+the YOLO architectures from their .yaml configs instead: detect and pose
+costs are representative, but the untrained models find nothing. Synthetic
+frames then fall back to their ground-truth boxes. Persons the pose model
+misses get keypoints laid out on the box (the synthetic figures'
+proportions), so color, CLIP and match still do real work.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+import stage_timing  # noqa: E402
+from colors import COLOR_RANGES  # noqa: E402
+from decoding import DECODE_SCALES, DecodedFrame, decode_for_detection, detection_image  # noqa: E402
+from frame_protocol import encode_frame_message, parse_frame_message  # noqa: E402
+from tracker import PersonTracker  # noqa: E402
+
+
+def make_crowd_frame(
+    rng: np.random.Generator,
+    width: int,
+    height: int,
+    persons: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A noisy background with `persons` simple figures (head, torso, legs)
+    Returns the frame and the figures' [x1, y1, x2, y2, conf] boxes
+    """
+    frame = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+    names = list(COLOR_RANGES.keys())
+    boxes = []
+
+    for _ in range(persons):
+        box_h = int(rng.integers(height // 6, height // 2))
+        box_w = max(8, box_h // 3)
+        x1 = int(rng.integers(0, max(1, width - box_w)))
+        y1 = int(rng.integers(0, max(1, height - box_h)))
+        x2, y2 = x1 + box_w, y1 + box_h
+
+        top, bottom = (np.array(COLOR_RANGES[names[rng.integers(len(names))]]).mean(axis=0) for _ in range(2))
+        head = y1 + box_h // 6
+        hips = y1 + box_h // 2
+        cv2.ellipse(frame, ((x1 + x2) // 2, (y1 + head) // 2), (box_w // 3, box_h // 12), 0, 0, 360, (150, 170, 200), -1)
+        frame[head:hips, x1:x2] = top
+        frame[hips:y2, x1 + box_w // 8:x2 - box_w // 8] = bottom
+        boxes.append([x1, y1, x2, y2, 0.9])
+
+    return frame, np.array(boxes, dtype=np.float32).reshape(-1, 5)
+
+
+def make_profiles(rng: np.random.Generator, count: int) -> List[main.MissingPersonProfile]:
+    names = list(COLOR_RANGES.keys())
+    return [
+        main.MissingPersonProfile(
+            id=f"profile_{i}",
+            name=f"Person {i}",
+            age=int(rng.integers(4, 80)),
+            description=f"wearing a {names[i % len(names)].lower()} jacket",
+            topColor=names[rng.integers(len(names))],
+            bottomColor=names[rng.integers(len(names))],
+        )
+        for i in range(count)
+    ]
+
+
+def synthetic_frames(args, rng: np.random.Generator) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    for _ in range(args.frames):
+        yield make_crowd_frame(rng, args.width, args.height, args.persons)
+
+
+def video_frames(args) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray]]]:
+    capture = cv2.VideoCapture(args.video)
+    if not capture.isOpened():
+        raise SystemExit(f"Cannot open video {args.video}")
+    try:
+        for _ in range(args.frames):
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame, None
+    finally:
+        capture.release()
+
+
+def box_keypoints(box: Tuple[int, int, int, int]) -> np.ndarray:
+    """
+    Flattened keypoints in crop coordinates for a figure filling `box`:
+    shoulders below the head (1/6), hips at 1/2, ankles at the bottom,
+    at the positions crop_torso / crop_legs read them from
+    """
+    x1, y1, x2, y2 = box
+    width, height = x2 - x1, y2 - y1
+    left, right = width * 0.2, width * 0.8
+    keypoints = np.zeros(17 * 3, dtype=np.float32)
+    keypoints[5:9] = [left, height / 6, right, height / 6]  # Shoulders
+    keypoints[11:15] = [left, height / 2, right, height / 2]  # Hips
+    keypoints[15:19] = [left, height - 1, right, height - 1]  # Ankles
+    return keypoints
+
+
+def load_models(args):
+    if args.random_weights:
+        from ultralytics import YOLO
+        main.detector_model = YOLO(f"{main.DETECTOR_MODEL}.yaml")
+        main.pose_model = YOLO(f"{main.POSE_MODEL}.yaml")
+
+        # Still run (and time) the untrained pose model, then lay out keypoints where it found none
+        estimate_poses = main.estimate_poses
+
+        def estimate_poses_or_box(pose_model, frame, boxes, **kwargs):
+            poses = estimate_poses(pose_model, frame, boxes, **kwargs)
+            return [keypoints if keypoints is not None else box_keypoints(tuple(box)) for keypoints, box in zip(poses, boxes)]
+
+        main.estimate_poses = estimate_poses_or_box
+    else:
+        main.load_models()
+
+
+def summarize(samples: List[float]) -> Dict:
+    if not samples:
+        return {"count": 0}
+    ms = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def run(args) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    load_models(args)
+
+    profiles = main.ProfileIndex(make_profiles(rng, args.profiles))
+    if main.clip_matcher is not None:
+        main.clip_matcher.warm(profiles.profiles())
+    tracker = PersonTracker(refresh_interval=main.TRACK_REFRESH_INTERVAL) if args.tracker else None
+
+    # Encode up front so the decode stage measures what the service does per frame
+    frames = synthetic_frames(args, rng) if args.video is None else video_frames(args)
+    messages = []
+    for frame_id, (frame, truth) in enumerate(frames):
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, args.jpeg_quality])
+        messages.append((encode_frame_message(encoded.tobytes(), frame_id, time.time() * 1000), truth))
+
+    # Per-frame stage totals (a stage may be timed more than once per frame)
+    current: Dict[str, float] = defaultdict(float)
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    frame_samples: List[float] = []
+    stage_timing.add_observer(lambda stage, seconds: current.__setitem__(stage, current[stage] + seconds))
+
+    total_matches = 0
+    started = None
+    for index, (message, truth) in enumerate(messages):
+        if index == args.warmup:
+            started = time.perf_counter()
+        current.clear()
+        frame_started = time.perf_counter()
+
+        _, payload = parse_frame_message(message)
+        with stage_timing.timed("decode"):
+            frame = decode_for_detection(payload, args.decode_scale, args.imgsz)
+        detections = main.detect_persons([detection_image(frame)], imgsz=args.imgsz)[0]
+        if isinstance(frame, DecodedFrame):
+            detections = frame.to_full_resolution(detections)
+        if truth is not None and (args.ground_truth_boxes or len(detections) == 0):
+            detections = truth
+        matches = main.process_frame(frame, profiles, detections=detections, tracker=tracker)
+
+        if index < args.warmup:
+            continue
+        frame_samples.append(time.perf_counter() - frame_started)
+        total_matches += len(matches)
+        for stage, seconds in current.items():
+            stage_samples[stage].append(seconds)
+
+    wall_seconds = time.perf_counter() - started if started is not None else 0.0
+    measured = len(frame_samples)
+
+    return {
+        "config": vars(args),
+        "backend": "random-weights" if args.random_weights else main.model_backend,
+        "clip_loaded": main.clip_matcher is not None,
+        "frames": measured,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_fps": round(measured / wall_seconds, 2) if wall_seconds > 0 else None,
+        "matches": total_matches,
+        "end_to_end": summarize(frame_samples),
+        "stages": {stage: summarize(stage_samples.get(stage, [])) for stage in stage_timing.STAGES},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay frames through the video pipeline and time each stage")
+    parser.add_argument("--video", help="Local video file to replay (default: synthetic crowd frames)")
+    parser.add_argument("--frames", type=int, default=100, help="Frames to replay")
+    parser.add_argument("--warmup", type=int, default=5, help="Leading frames excluded from the statistics")
+    parser.add_argument("--persons", type=int, default=20, help="Persons per synthetic frame")
+    parser.add_argument("--profiles", type=int, default=100, help="Missing-person profiles to match against")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--jpeg-quality", type=int, default=85)
+    parser.add_argument("--decode-scale", choices=DECODE_SCALES, default=main.DECODE_SCALE,
+                        help="Reduced JPEG decoding for detection (1 = always full resolution)")
+    parser.add_argument("--imgsz", type=int, default=main.DETECT_IMGSZ, help="Detector input size")
+    parser.add_argument("--tracker", action="store_true", help="Reuse per-track results like live streams do")
+    parser.add_argument("--ground-truth-boxes", action="store_true",
+                        help="Always use synthetic boxes downstream of detection")
+    parser.add_argument("--random-weights", action="store_true",
+                        help="Build untrained models from .yaml configs (no weights needed)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['frames']} frames in {report['wall_seconds']}s: {report['throughput_fps']} FPS, "
+          f"{report['matches']} matches")
+    for name, result in [("end_to_end", report["end_to_end"])] + list(report["stages"].items()):
+        if result["count"] == 0:
+            print(f"{name:>10}: not run")
+            continue
+        print(f"{name:>10}: p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms"
+              f"  p99 {result['p99_ms']:8.2f} ms  (n={result['count']})")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,214 @@
+"""
+Native camera ingestion
+One reader thread per camera pulls frames with cv2.VideoCapture (RTSP/HTTP
+URLs, device indexes or local files) and hands the newest frame to the
+inference pipeline, so browsers no longer have to push frames
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NETWORK_TIMEOUT_MS = 10000  # Open / read timeout for network sources, so stop() is never stuck
+
+# URL schemes accepted for network cameras; file:// and other FFmpeg protocols could read local files
+NETWORK_SCHEMES = ("rtsp", "rtsps", "rtmp", "rtmps", "http", "https", "udp", "tcp", "srt")
+
+
+def check_network_source(source: str):
+    """Raise ValueError unless `source` is a URL with one of NETWORK_SCHEMES"""
+    scheme = urlsplit(source).scheme.lower()
+    if scheme not in NETWORK_SCHEMES:
+        raise ValueError(f"Unsupported camera URL scheme {scheme!r}; use one of {', '.join(NETWORK_SCHEMES)}")
+
+
+def redact_source(source: str) -> str:
+    """Camera source with any URL password masked, for API responses and logs"""
+    parts = urlsplit(source)
+    if parts.password is None:
+        return source
+    netloc = f"{parts.username}:***@{parts.hostname}" + (f":{parts.port}" if parts.port else "")
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+class CameraReader:
+    """
+    Background capture for one camera
+
+    The thread reads continuously (so RTSP buffers never fill up) and keeps
+    only the newest frame; `next()` hands it to the processor. Local files
+    are paced at their own frame rate and can loop, which makes them usable
+    as test cameras. Lost connections are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        camera_id: str,
+        source: str,
+        max_fps: float = 0.0,
+        loop: bool = False,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.camera_id = camera_id
+        self.source = source
+        self.max_fps = max_fps
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._frame: Optional[Tuple[np.ndarray, float]] = None
+        self._lock = threading.Lock()
+        self._ready: Optional[asyncio.Event] = None
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.state = "stopped"
+        self.frames_read = 0
+        self.frames_delivered = 0
+        self.dropped_stale = 0
+        self.skipped_fps = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self._interval: Optional[float] = None  # Moving average of seconds between frames
+        self._last_frame_at: Optional[float] = None
+        self._last_accepted_at = 0.0
+
+    @property
+    def is_file(self) -> bool:
+        return os.path.isfile(self.source)
+
+    def start(self, event_loop: asyncio.AbstractEventLoop):
+        self._event_loop = event_loop
+        self._ready = asyncio.Event()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.state = "stopped"
+
+    def _open(self) -> cv2.VideoCapture:
+        if self.source.isdigit():
+            return cv2.VideoCapture(int(self.source))
+        if "://" in self.source:
+            return cv2.VideoCapture(self.source, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, NETWORK_TIMEOUT_MS,
+                cv2.CAP_PROP_READ_TIMEOUT_MSEC, NETWORK_TIMEOUT_MS
+            ])
+        return cv2.VideoCapture(self.source)
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            self.state = "connecting"
+            capture = self._open()
+            if not capture.isOpened():
+                capture.release()
+                self._retry(f"Cannot open {redact_source(self.source)}", delay)
+                delay = min(self.max_reconnect_delay, delay * 2)
+                continue
+
+            self.state = "running"
+            delay = self.reconnect_delay
+            try:
+                ended = self._read(capture)
+            finally:
+                capture.release()
+
+            if ended:
+                self.state = "ended"
+                return
+            if not self._stop.is_set():
+                self._retry("Stream interrupted", delay)
+
+    def _retry(self, error: str, delay: float):
+        self.last_error = error
+        self.state = "reconnecting"
+        self.reconnects += 1
+        logger.warning(f"Camera {self.camera_id}: {error}, retrying in {delay:.0f}s")
+        self._stop.wait(delay)
+
+    def _read(self, capture: cv2.VideoCapture) -> bool:
+        """Read until stopped or the stream breaks; returns True when a file has ended"""
+        is_file = self.is_file
+        file_interval = 1.0 / capture.get(cv2.CAP_PROP_FPS) if is_file and capture.get(cv2.CAP_PROP_FPS) > 0 else 0.0
+        next_due = time.perf_counter()
+
+        while not self._stop.is_set():
+            ok, frame = capture.read()
+            if not ok:
+                if is_file and self.loop:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                return is_file
+
+            now = time.perf_counter()
+            self._on_frame(frame, now)
+
+            # Play files back in real time, like a live camera
+            if file_interval > 0:
+                next_due = max(next_due + file_interval, now - file_interval)
+                self._stop.wait(max(0.0, next_due - time.perf_counter()))
+        return False
+
+    def _on_frame(self, frame: np.ndarray, now: float):
+        self.frames_read += 1
+        if self._last_frame_at is not None:
+            sample = now - self._last_frame_at
+            self._interval = sample if self._interval is None else self._interval + 0.1 * (sample - self._interval)
+        self._last_frame_at = now
+
+        if self.max_fps > 0 and now - self._last_accepted_at < 1.0 / self.max_fps:
+            self.skipped_fps += 1
+            return
+        self._last_accepted_at = now
+
+        with self._lock:
+            if self._frame is not None:
+                self.dropped_stale += 1
+            self._frame = (frame, now)
+        self._event_loop.call_soon_threadsafe(self._ready.set)
+
+    @property
+    def fps(self) -> Optional[float]:
+        return 1.0 / self._interval if self._interval else None
+
+    async def next(self) -> Tuple[np.ndarray, float]:
+        """Wait for the newest frame; returns (frame, captured_at)"""
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            with self._lock:
+                item, self._frame = self._frame, None
+            if item is not None:
+                self.frames_delivered += 1
+                return item
+
+    def stats(self) -> Dict:
+        age = time.perf_counter() - self._last_frame_at if self._last_frame_at is not None else None
+        return {
+            "state": self.state,
+            "fps": round(self.fps, 1) if self.fps is not None else None,
+            "framesRead": self.frames_read,
+            "framesDelivered": self.frames_delivered,
+            "droppedStale": self.dropped_stale,
+            "skippedFps": self.skipped_fps,
+            "reconnects": self.reconnects,
+            "lastFrameAgeSeconds": round(age, 2) if age is not None else None,
+            "lastError": self.last_error,
+        }
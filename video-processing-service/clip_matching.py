@@ -0,0 +1,149 @@
+"""
+CLIP description matching
+Caches text features per missing-person profile and scores all person crops
+of a frame against all profiles with one image batch and one matrix multiply
+"""
+
+import hashlib
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+
+def description_hash(description: str) -> str:
+    """Stable hash of a profile description for cache keys"""
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+class ClipMatcher:
+    """
+    Wraps a loaded CLIP model with a text-feature cache
+
+    Text features are keyed by (profile id, description hash), so they are
+    encoded once per profile and re-encoded only when the description changes.
+    Profiles are any objects with `id` and `description` attributes.
+    """
+
+    def __init__(self, model, preprocess, clip_module, torch_module, device: str):
+        self.model = model
+        self.preprocess = preprocess
+        self.clip = clip_module
+        self.torch = torch_module
+        self.device = device
+
+        self._text_cache: Dict[Tuple[str, str], "torch.Tensor"] = {}
+        # Last stacked text matrix, reused while the profile list is unchanged
+        self._stacked: Optional[Tuple[Tuple, "torch.Tensor", List[int]]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(profile) -> Tuple[str, str]:
+        return (profile.id, description_hash(profile.description))
+
+    def cache_size(self) -> int:
+        with self._lock:
+            return len(self._text_cache)
+
+    def warm(self, profiles: Sequence) -> None:
+        """
+        Encode and cache text features for any profiles not cached yet
+        Stale entries for the same profile id (old descriptions) are dropped
+        """
+        wanted = {self._key(profile): profile for profile in profiles if profile.description}
+
+        with self._lock:
+            missing = [key for key in wanted if key not in self._text_cache]
+
+        if not missing:
+            return
+
+        prompts = [f"A person {wanted[key].description}" for key in missing]
+        with self.torch.no_grad():
+            tokens = self.clip.tokenize(prompts, truncate=True).to(self.device)
+            features = self.model.encode_text(tokens).float()
+            features = features / features.norm(dim=-1, keepdim=True)
+
+        refreshed_ids = {profile_id for profile_id, _ in missing}
+        with self._lock:
+            for key in [key for key in self._text_cache if key[0] in refreshed_ids]:
+                del self._text_cache[key]
+            for i, key in enumerate(missing):
+                self._text_cache[key] = features[i]
+            self._stacked = None
+
+        logger.info(f"Cached CLIP text features for {len(missing)} profile(s)")
+
+    def forget(self, profile_ids: Sequence[str]) -> None:
+        """Drop cached text features for removed profiles"""
+        profile_ids = set(profile_ids)
+        with self._lock:
+            for key in [key for key in self._text_cache if key[0] in profile_ids]:
+                del self._text_cache[key]
+            self._stacked = None
+
+    def _text_matrix(self, profiles: Sequence) -> Tuple[Optional["torch.Tensor"], List[int]]:
+        """Stacked cached text features and the profile columns they belong to"""
+        self.warm(profiles)
+        keys = tuple(self._key(profile) if profile.description else None for profile in profiles)
+
+        with self._lock:
+            if self._stacked is not None and self._stacked[0] == keys:
+                return self._stacked[1], self._stacked[2]
+
+            columns, rows = [], []
+            for j, key in enumerate(keys):
+                features = self._text_cache.get(key) if key else None
+                if features is not None:
+                    columns.append(j)
+                    rows.append(features)
+
+            if not rows:
+                return None, []
+            stacked = self.torch.stack(rows)
+            self._stacked = (keys, stacked, columns)
+            return stacked, columns
+
+    def encode_images(self, images: Sequence[np.ndarray]) -> "torch.Tensor":
+        """Normalised image features for a batch of BGR crops, in one forward pass"""
+        batch = self.torch.stack([
+            self.preprocess(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+            for image in images
+        ]).to(self.device)
+
+        with self.torch.no_grad():
+            features = self.model.encode_image(batch).float()
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def similarity(self, images: Sequence[np.ndarray], profiles: Sequence) -> np.ndarray:
+        """
+        Cosine similarity of every crop against every profile description
+        Returns an (images, profiles) matrix; profiles without a description are NaN
+        """
+        scores = np.full((len(images), len(profiles)), np.nan, dtype=np.float32)
+        if len(images) == 0 or len(profiles) == 0:
+            return scores
+
+        try:
+            text_features, columns = self._text_matrix(profiles)
+            if text_features is None:
+                return scores
+
+            image_features = self.encode_images(images)
+            scores[:, columns] = (image_features @ text_features.T).cpu().numpy()
+        except Exception as e:
+            logger.error(f"CLIP matching error: {e}")
+            # Same as a failed per-pair match: described profiles score 0
+            for j, profile in enumerate(profiles):
+                if profile.description:
+                    scores[:, j] = 0.0
+
+        return scores
@@ -0,0 +1,155 @@
+"""
+Colour attribute extraction
+Fast lookup-table colour naming plus the original K-Means "accurate" path
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Color name mapping (simplified - can use webcolors library for more accuracy)
+# Order matters: the first range containing a colour wins
+COLOR_RANGES: Dict[str, Tuple[Tuple[int, int, int], Tuple[int, int, int]]] = {
+    "Red": ((200, 0, 0), (255, 100, 100)),
+    "Pink": ((200, 100, 150), (255, 200, 220)),
+    "Blue": ((0, 0, 150), (100, 100, 255)),
+    "Green": ((0, 150, 0), (100, 255, 100)),
+    "Yellow": ((200, 200, 0), (255, 255, 150)),
+    "Orange": ((200, 100, 0), (255, 200, 100)),
+    "Purple": ((100, 0, 150), (200, 100, 255)),
+    "Black": ((0, 0, 0), (50, 50, 50)),
+    "White": ((200, 200, 200), (255, 255, 255)),
+    "Gray": ((100, 100, 100), (150, 150, 150)),
+    "Brown": ((100, 50, 0), (150, 100, 50)),
+    "Khaki": ((180, 180, 120), (220, 220, 160)),
+}
+
+UNKNOWN_COLOR = "Unknown"
+
+
+def rgb_to_color_name(rgb: np.ndarray) -> str:
+    """Map RGB values to color names"""
+    r, g, b = rgb[0], rgb[1], rgb[2]
+
+    for color_name, (lower, upper) in COLOR_RANGES.items():
+        if (lower[0] <= r <= upper[0] and
+            lower[1] <= g <= upper[1] and
+            lower[2] <= b <= upper[2]):
+            return color_name
+
+    return UNKNOWN_COLOR
+
+
+def kmeans_dominant_color(image: np.ndarray, k: int = 3) -> str:
+    """
+    Extract dominant color from image using K-Means clustering
+    Returns color name (e.g., "Red", "Blue", "Pink")
+    """
+    # Reshape image to be a list of pixels
+    pixels = image.reshape(-1, 3)
+
+    # Convert to float32
+    pixels = np.float32(pixels)
+
+    # Apply K-Means
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+    _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+
+    # Get the most common cluster
+    unique, counts = np.unique(labels, return_counts=True)
+    dominant_cluster = unique[np.argmax(counts)]
+    dominant_color = centers[dominant_cluster].astype(int)
+
+    # Map RGB to color name (simplified - can be enhanced)
+    return rgb_to_color_name(dominant_color)
+
+
+class ColorNamer:
+    """
+    Lookup-table colour namer
+
+    Every channel is quantized to `bits` bits and the resulting colour cube is
+    named once with COLOR_RANGES. Naming a crop is then a table lookup per
+    pixel followed by a histogram over colour names; the most frequent named
+    colour wins. Crops whose named pixels cover less than `min_coverage` of
+    the area are reported as "Unknown". Only every `sample_step`-th row and
+    column is sampled, which is plenty for a dominant colour.
+
+    Pixels are interpreted in the same channel order as rgb_to_color_name.
+    """
+
+    def __init__(self, bits: int = 5, min_coverage: float = 0.2, sample_step: int = 2):
+        if not 1 <= bits <= 8:
+            raise ValueError("bits must be between 1 and 8")
+
+        self.bits = bits
+        self.shift = 8 - bits
+        self.index_dtype = np.uint16 if 3 * bits <= 16 else np.uint32
+        self.min_coverage = min_coverage
+        self.sample_step = max(1, int(sample_step))
+        self.names: List[str] = list(COLOR_RANGES.keys()) + [UNKNOWN_COLOR]
+        self.unknown_code = len(self.names) - 1
+        self.lut = self._build_lut()
+
+    def _build_lut(self) -> np.ndarray:
+        levels = 1 << self.bits
+        # Centre of each quantization bin
+        centers = (np.arange(levels, dtype=np.int32) << self.shift) + ((1 << self.shift) >> 1)
+        c0, c1, c2 = np.meshgrid(centers, centers, centers, indexing="ij")
+
+        lut = np.full((levels, levels, levels), self.unknown_code, dtype=np.uint8)
+        for code, (lower, upper) in enumerate(COLOR_RANGES.values()):
+            inside = (
+                (lut == self.unknown_code) &
+                (c0 >= lower[0]) & (c0 <= upper[0]) &
+                (c1 >= lower[1]) & (c1 <= upper[1]) &
+                (c2 >= lower[2]) & (c2 <= upper[2])
+            )
+            lut[inside] = code
+
+        return lut.reshape(-1)
+
+    def _pixels(self, image: np.ndarray) -> np.ndarray:
+        """Sampled pixels of a crop as an (N, 3) uint8 array"""
+        step = self.sample_step
+        return np.asarray(image[::step, ::step], dtype=np.uint8).reshape(-1, 3)
+
+    def _codes(self, pixels: np.ndarray) -> np.ndarray:
+        """Colour-name code for each pixel of an (N, 3) uint8 array"""
+        quantized = pixels >> self.shift
+        index = quantized[:, 0].astype(self.index_dtype) << (2 * self.bits)
+        index |= quantized[:, 1].astype(self.index_dtype) << self.bits
+        index |= quantized[:, 2]
+        return np.take(self.lut, index)
+
+    def _pick(self, counts: np.ndarray) -> str:
+        known = counts[:self.unknown_code]
+        total = counts.sum()
+        if total == 0 or known.sum() < self.min_coverage * total:
+            return UNKNOWN_COLOR
+        return self.names[int(np.argmax(known))]
+
+    def name(self, image: np.ndarray) -> str:
+        """Dominant colour name of a single crop"""
+        counts = np.bincount(self._codes(self._pixels(image)), minlength=len(self.names))
+        return self._pick(counts)
+
+    def name_many(self, images: Sequence[Optional[np.ndarray]]) -> List[Optional[str]]:
+        """
+        Dominant colour names for many crops in one histogram pass
+        Empty or missing crops yield None
+        """
+        valid = [i for i, image in enumerate(images) if image is not None and image.size > 0]
+        results: List[Optional[str]] = [None] * len(images)
+        if not valid:
+            return results
+
+        # One lookup pass over the sampled pixels of every crop
+        sampled = [self._pixels(images[i]) for i in valid]
+        codes = self._codes(np.concatenate(sampled))
+        bounds = np.cumsum([len(pixels) for pixels in sampled])[:-1]
+
+        for i, crop_codes in zip(valid, np.split(codes, bounds)):
+            results[i] = self._pick(np.bincount(crop_codes, minlength=len(self.names)))
+        return results
@@ -0,0 +1,119 @@
+"""
+Resolution-aware frame decoding
+JPEGs are decoded at 1/2, 1/4 or 1/8 scale for detection (libjpeg scales
+inside the IDCT, far cheaper than a full decode plus resize). The
+full-resolution image is decoded only when person crops are needed.
+"""
+
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from stage_timing import timed
+
+DECODE_SCALES = ("auto", "1", "2", "4", "8")
+
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Start-of-frame markers carry the image size; C4 (DHT), C8 (JPG) and CC (DAC) are not frames
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(encoded: np.ndarray) -> Optional[Tuple[int, int]]:
+    """(width, height) from a JPEG header without decoding, or None if not a JPEG"""
+    data = memoryview(encoded).cast("B")
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    offset = 2
+    while offset + 9 < len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        if marker in _SOF_MARKERS:
+            height = (data[offset + 5] << 8) | data[offset + 6]
+            width = (data[offset + 7] << 8) | data[offset + 8]
+            return width, height
+        offset += 2 + ((data[offset + 2] << 8) | data[offset + 3])
+    return None
+
+
+def choose_scale(width: int, height: int, target_size: int) -> int:
+    """Largest JPEG reduction that keeps the long side at or above the detector input size"""
+    for scale in (8, 4, 2):
+        if max(width, height) / scale >= target_size:
+            return scale
+    return 1
+
+
+class DecodedFrame:
+    """
+    A frame decoded at reduced scale for detection
+
+    `shape` is the full-resolution shape; `full` decodes the full-resolution
+    image on first use. `scale_x` / `scale_y` map detection coordinates
+    back to full resolution.
+    """
+
+    def __init__(self, encoded: np.ndarray, detect_image: np.ndarray, width: int, height: int):
+        self._encoded = encoded
+        self._full: Optional[np.ndarray] = None
+        self.detect_image = detect_image
+        self.shape = (height, width, 3)
+        self.scale_x = width / detect_image.shape[1]
+        self.scale_y = height / detect_image.shape[0]
+
+    @property
+    def full(self) -> Optional[np.ndarray]:
+        if self._full is None:
+            with timed("decode"):
+                self._full = cv2.imdecode(self._encoded, cv2.IMREAD_COLOR)
+            self._encoded = None
+        return self._full
+
+    def to_full_resolution(self, detections: np.ndarray) -> np.ndarray:
+        """Scale [x1, y1, x2, y2, ...] rows from detection to full-resolution coordinates"""
+        detections = detections.copy()
+        detections[:, [0, 2]] *= self.scale_x
+        detections[:, [1, 3]] *= self.scale_y
+        return detections
+
+
+Frame = Union[np.ndarray, DecodedFrame]
+
+
+def decode_for_detection(encoded: np.ndarray, scale: Union[str, int] = "auto", target_size: int = 640) -> Optional[Frame]:
+    """
+    Decode an encoded image, at reduced scale when possible
+    Returns a DecodedFrame for reduced JPEG decodes, a full BGR array
+    otherwise, or None if the image cannot be decoded
+    """
+    size = jpeg_size(encoded) if str(scale) != "1" else None
+    if size is None:
+        return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+    width, height = size
+    factor = choose_scale(width, height, target_size) if scale == "auto" else int(scale)
+    if factor not in REDUCED_FLAGS:
+        return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+    detect_image = cv2.imdecode(encoded, REDUCED_FLAGS[factor])
+    if detect_image is None:
+        return None
+    return DecodedFrame(encoded, detect_image, width, height)
+
+
+def detection_image(frame: Frame) -> np.ndarray:
+    return frame.detect_image if isinstance(frame, DecodedFrame) else frame
+
+
+def full_resolution(frame: Frame) -> Optional[np.ndarray]:
+    return frame.full if isinstance(frame, DecodedFrame) else frame
@@ -0,0 +1,64 @@
+"""
+Match notification deduplication
+Time-windowed, size-capped store of recently sent notifications
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+class MatchDeduplicator:
+    """
+    Suppresses repeat notifications for the same (profile, subject) pair
+
+    A subject is whatever identifies the person on camera: a track id, or a
+    spatial bucket for untracked detections. Entries are kept in last-sent
+    order, so expired entries are popped from the front in O(1) and the
+    oldest entries are evicted once `max_entries` is reached. Memory stays
+    flat however long the stream runs.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._last_sent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.sent = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._last_sent)
+
+    def _expire(self, now: float):
+        while self._last_sent:
+            sent_at = next(iter(self._last_sent.values()))
+            if now - sent_at < self.ttl_seconds:
+                break
+            self._last_sent.popitem(last=False)
+
+    def should_send(self, profile_id: str, subject: Hashable, now: Optional[float] = None) -> bool:
+        """Record and allow a notification, or count it as suppressed"""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        key = (profile_id, subject)
+        if key in self._last_sent:
+            self.suppressed += 1
+            return False
+
+        self._last_sent[key] = now
+        if len(self._last_sent) > self.max_entries:
+            self._last_sent.popitem(last=False)
+            self.evicted += 1
+
+        self.sent += 1
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "evicted": self.evicted,
+            "entries": len(self._last_sent),
+        }
@@ -0,0 +1,102 @@
+"""
+In-process match event bus
+Match results are published once and fanned out to any number of
+subscribers (dashboard sockets), each filtered by event fields such as
+stream, zone or profile. Every subscriber has a bounded queue; one that
+falls behind is dropped instead of slowing the pipeline down.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    One subscriber's queue and filters
+
+    `filters` maps an event field to the accepted values; an event matches
+    when every filtered field holds one of them. `get()` returns None once
+    the subscription is closed, either by the subscriber or because it fell
+    behind (`dropped`).
+    """
+
+    def __init__(self, filters: Dict[str, Set[str]], max_queue: int):
+        self.filters = filters
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self.delivered = 0
+        self.closed = False
+        self.dropped = False
+
+    def accepts(self, event: Dict) -> bool:
+        return all(event.get(field) in values for field, values in self.filters.items())
+
+    def _close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Make room for the end marker, whatever is still queued
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[Dict]:
+        return await self.queue.get()
+
+
+class EventBus:
+    """
+    Publish/subscribe fan-out on the event loop
+
+    `publish` and `subscribe` must be called from the event loop thread;
+    publishing never blocks, it only enqueues to subscribers.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, max_queue: Optional[int] = None, **filters: Optional[Iterable[str]]) -> Subscription:
+        """Subscribe to events; each keyword filters an event field (None or empty = any value)"""
+        active = {field: set(values) for field, values in filters.items() if values}
+        subscription = Subscription(active, max_queue or self.max_queue)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+        subscription._close()
+
+    def publish(self, event: Dict) -> int:
+        """Queue an event for every matching subscriber; returns how many received it"""
+        self.published += 1
+        delivered = 0
+        for subscription in list(self._subscriptions):
+            if not subscription.accepts(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._subscriptions.discard(subscription)
+                subscription.dropped = True
+                subscription._close()
+                self.dropped_subscribers += 1
+                logger.warning("Dropped a slow event subscriber")
+                continue
+            subscription.delivered += 1
+            delivered += 1
+        return delivered
+
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers
+        }
@@ -0,0 +1,134 @@
+"""
+One-off export of the YOLO models for the ONNX Runtime / OpenVINO backends
+Writes the graphs to the paths model_backends.model_path expects
+
+Usage:
+    python export_models.py --backend onnx
+    python export_models.py --backend onnx --int8 --data coco128.yaml
+    python export_models.py --backend openvino --int8 --data coco128.yaml
+
+Requires `pip install onnx onnxruntime` (ONNX) or `pip install openvino nncf`
+(OpenVINO). Graphs are exported with dynamic shapes so batched detection
+keeps working. INT8 is static (calibrated) quantization for both backends.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+from typing import List
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from model_backends import model_path
+
+DEFAULT_MODELS = ["yolov8n", "yolov8n-pose"]
+
+
+def _move(source: str, target: str):
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    shutil.move(source, target)
+
+
+def calibration_images(data: str, count: int) -> List[str]:
+    """Up to `count` image paths from a directory or an ultralytics dataset YAML (validation split)"""
+    if os.path.isdir(data):
+        directory = data
+    else:
+        from ultralytics.data.utils import check_det_dataset
+
+        split = check_det_dataset(data)["val"]
+        directory = split[0] if isinstance(split, list) else split
+    paths = sorted(
+        path for path in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+        if path.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
+    )
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found for {data}")
+    return paths[:count]
+
+
+def preprocess(path: str, imgsz: int) -> np.ndarray:
+    """Letterbox to imgsz x imgsz like ultralytics: RGB, 0-1, NCHW float32"""
+    image = cv2.imread(path)
+    scale = imgsz / max(image.shape[:2])
+    resized = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def export_onnx(name: str, model_dir: str, imgsz: int, int8: bool, data: str, calibration_count: int) -> str:
+    exported = YOLO(f"{name}.pt").export(format="onnx", dynamic=True, imgsz=imgsz, simplify=True)
+    fp32_path = model_path(name, "onnx", "fp32", model_dir)
+    _move(str(exported), fp32_path)
+
+    if not int8:
+        return fp32_path
+
+    # Static QDQ quantization, calibrated on real images. Dynamic quantization would turn the
+    # convolutions into ConvInteger, which the CPU provider runs slower than FP32.
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    input_name = onnxruntime.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self, paths: List[str]):
+            self._paths = iter(paths)
+
+        def get_next(self):
+            path = next(self._paths, None)
+            return None if path is None else {input_name: preprocess(path, imgsz)}
+
+    int8_path = model_path(name, "onnx", "int8", model_dir)
+    quantize_static(
+        fp32_path,
+        int8_path,
+        ImageReader(calibration_images(data, calibration_count)),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    return int8_path
+
+
+def export_openvino(name: str, model_dir: str, imgsz: int, int8: bool, data: str) -> str:
+    # INT8 uses NNCF post-training quantization, calibrated on `data`
+    options = {"int8": True, "data": data} if int8 else {}
+    exported = YOLO(f"{name}.pt").export(format="openvino", dynamic=True, imgsz=imgsz, **options)
+    target = model_path(name, "openvino", "int8" if int8 else "fp32", model_dir)
+    _move(str(exported), target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO models for CPU inference backends")
+    parser.add_argument("--backend", choices=["onnx", "openvino"], required=True)
+    parser.add_argument("--int8", action="store_true", help="Also quantize to INT8")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS, help="Model names, without .pt")
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR", "models"))
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--data", default="coco128.yaml", help="INT8 calibration images: dataset YAML or image directory")
+    parser.add_argument("--calibration-images", type=int, default=100, help="Images used for ONNX INT8 calibration")
+    args = parser.parse_args()
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    for name in args.models:
+        if args.backend == "onnx":
+            path = export_onnx(name, args.model_dir, args.imgsz, args.int8, args.data, args.calibration_images)
+        else:
+            path = export_openvino(name, args.model_dir, args.imgsz, args.int8, args.data)
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Binary WebSocket frame protocol
+A fixed little-endian header followed by the raw JPEG/PNG bytes
+
+    offset  size  field
+    0       4     magic b"EPXF"
+    4       1     version (1)
+    5       1     flags (reserved, 0)
+    6       2     padding
+    8       8     frame id (uint64)
+    16      8     capture timestamp, ms since epoch (float64)
+    24      16    camera id (UTF-8, NUL padded)
+    40      ...   encoded image
+"""
+
+import struct
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+FRAME_MAGIC = b"EPXF"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sBBxxQd16s")
+FRAME_HEADER_SIZE = FRAME_HEADER.size
+
+
+class FrameProtocolError(ValueError):
+    """Raised for binary messages that are not valid frames"""
+
+
+class FrameHeader(NamedTuple):
+    frame_id: int
+    timestamp_ms: float
+    camera_id: str
+
+
+def encode_frame_message(image_bytes: bytes, frame_id: int, timestamp_ms: float, camera_id: str = "") -> bytes:
+    """Build a binary frame message (used by Python clients and tests)"""
+    camera = camera_id.encode("utf-8")[:16]
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, frame_id, timestamp_ms, camera)
+    return header + image_bytes
+
+
+def parse_frame_message(message: bytes) -> Tuple[FrameHeader, np.ndarray]:
+    """
+    Split a binary frame message into its header and image payload
+    The payload is a zero-copy uint8 view over the received buffer
+    """
+    if len(message) <= FRAME_HEADER_SIZE:
+        raise FrameProtocolError("Binary frame is too short")
+
+    magic, version, _flags, frame_id, timestamp_ms, camera = FRAME_HEADER.unpack_from(message)
+    if magic != FRAME_MAGIC:
+        raise FrameProtocolError("Binary frame has an invalid magic number")
+    if version != FRAME_VERSION:
+        raise FrameProtocolError(f"Unsupported binary frame version {version}")
+
+    header = FrameHeader(
+        frame_id=frame_id,
+        timestamp_ms=timestamp_ms,
+        camera_id=camera.rstrip(b"\0").decode("utf-8", errors="replace"),
+    )
+    payload = np.frombuffer(message, dtype=np.uint8, offset=FRAME_HEADER_SIZE)
+    return header, payload
@@ -0,0 +1,88 @@
+"""
+Bounded inference worker pool
+Keeps blocking model inference off the asyncio event loop
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBusyError(RuntimeError):
+    """Raised when the inference queue is full and a frame is rejected"""
+
+
+class InferencePool:
+    """
+    Thread pool for frame inference with a bounded number of pending jobs
+
+    Models are shared by all workers (PyTorch and OpenCV release the GIL while
+    they compute). When `max_pending` jobs are already queued or running, new
+    submissions fail fast with InferenceBusyError instead of queueing forever.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 16):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a blocking call; raises InferenceBusyError when the queue is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise InferenceBusyError("Inference queue is full")
+
+        with self._lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(failed=True)
+            raise
+
+        future.add_done_callback(lambda f: self._release(failed=f.cancelled() or f.exception() is not None))
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a blocking call on the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self, failed: bool):
+        with self._lock:
+            self._pending -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+        self._slots.release()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,144 @@
+"""
+Per-stream frame ingestion
+Latest-frame-wins buffering with adaptive frame skipping, so live streams
+stay fresh when inference falls behind
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class AdaptiveStride:
+    """
+    Chooses how many incoming frames to skip between accepted frames
+
+    Only the time a frame waits for the processor can be reduced by
+    striding, not the processing time itself. The stride grows while the
+    latency is above `target_latency_ms` and frames are still waiting, but
+    never past the capacity stride (input FPS x processing time), beyond
+    which the processor would just sit idle. It shrinks once there is
+    latency headroom or the processor is idle between frames. With
+    `max_fps` set, the stride never lets more than `max_fps` frames per
+    second through.
+    """
+
+    def __init__(self, target_latency_ms: float = 500.0, max_fps: float = 0.0, max_stride: int = 30):
+        self.target_latency_ms = target_latency_ms
+        self.max_fps = max_fps
+        self.max_stride = max(1, max_stride)
+        self.stride = 1
+        self.latency_ms: Optional[float] = None
+        self.processing_ms: Optional[float] = None
+        self.wait_ms: Optional[float] = None
+        self.input_fps: Optional[float] = None
+        self._last_arrival: Optional[float] = None
+        self._smoothing = 0.2
+
+    def _ema(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self._smoothing * (sample - current)
+
+    def on_arrival(self, now: float):
+        """Track the incoming frame rate"""
+        if self._last_arrival is not None and now > self._last_arrival:
+            self.input_fps = self._ema(self.input_fps, 1.0 / (now - self._last_arrival))
+        self._last_arrival = now
+
+    def capacity_stride(self) -> int:
+        """Stride at which accepted frames arrive about as fast as they are processed"""
+        if not self.input_fps or self.processing_ms is None:
+            return self.max_stride
+        return max(1, min(self.max_stride, math.ceil(self.input_fps * self.processing_ms / 1000)))
+
+    def on_processed(self, latency_ms: float, processing_ms: float):
+        """Adjust the stride from a processed frame's latency and its processing time"""
+        self.latency_ms = self._ema(self.latency_ms, latency_ms)
+        self.processing_ms = self._ema(self.processing_ms, processing_ms)
+        self.wait_ms = self._ema(self.wait_ms, max(0.0, latency_ms - processing_ms))
+
+        idle = self.wait_ms < 0.1 * self.processing_ms
+        if self.latency_ms > self.target_latency_ms * 1.2 and not idle:
+            self.stride += 1
+        elif self.latency_ms < self.target_latency_ms * 0.6 or idle:
+            self.stride = max(1, self.stride - 1)
+        self.stride = min(self.stride, self.capacity_stride())
+
+        if self.max_fps > 0 and self.input_fps:
+            self.stride = max(self.stride, min(self.max_stride, math.ceil(self.input_fps / self.max_fps)))
+
+
+class StreamIngestion:
+    """
+    Ingestion buffer for one stream
+
+    `offer` is called for every received frame. Frames outside the current
+    stride are skipped; accepted frames replace whatever is still waiting,
+    so the processor always picks up the newest frame. All methods must be
+    called from the event loop.
+    """
+
+    def __init__(self, target_latency_ms: float = 500.0, max_fps: float = 0.0):
+        self.stride = AdaptiveStride(target_latency_ms=target_latency_ms, max_fps=max_fps)
+        self._item: Optional[Tuple[Any, float]] = None
+        self._ready = asyncio.Event()
+        self._sequence = 0
+
+        self.received = 0
+        self.processed = 0
+        self.dropped_stale = 0
+        self.skipped_stride = 0
+        self.rejected_busy = 0
+
+    def offer(self, item: Any):
+        """Add a received frame; returns immediately"""
+        now = time.perf_counter()
+        self.received += 1
+        self.stride.on_arrival(now)
+
+        self._sequence += 1
+        if self._sequence % self.stride.stride != 0:
+            self.skipped_stride += 1
+            return
+
+        if self._item is not None:
+            self.dropped_stale += 1
+        self._item = (item, now)
+        self._ready.set()
+
+    async def next(self) -> Tuple[Any, float]:
+        """Wait for the newest frame; returns (item, received_at)"""
+        await self._ready.wait()
+        item = self._item
+        self._item = None
+        self._ready.clear()
+        return item
+
+    def done(self, received_at: float, started_at: float):
+        """Record a processed frame (received and picked up at the given times) and adapt the stride"""
+        self.processed += 1
+        now = time.perf_counter()
+        self.stride.on_processed((now - received_at) * 1000, (now - started_at) * 1000)
+
+    def busy(self):
+        """Record a frame rejected because the inference pool was full"""
+        self.rejected_busy += 1
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_stale + self.skipped_stride + self.rejected_busy
+
+    def stats(self) -> Dict:
+        latency = self.stride.latency_ms
+        input_fps = self.stride.input_fps
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "droppedStale": self.dropped_stale,
+            "skippedStride": self.skipped_stride,
+            "rejectedBusy": self.rejected_busy,
+            "stride": self.stride.stride,
+            "latencyMs": round(latency, 1) if latency is not None else None,
+            "inputFps": round(input_fps, 1) if input_fps is not None else None,
+        }
@@ -6,18 +6,44 @@ Real-time person detection, tracking, and attribute extraction for Lost & Found
 import asyncio
 import base64
 import io
+import itertools
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
-import cv2
 import numpy as np
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from ultralytics import YOLO
-from PIL import Image
+
+from batching import DetectionBatcher
+from cameras import CameraReader, check_network_source, redact_source
+from clip_matching import ClipMatcher
+from dedup import MatchDeduplicator
+from event_bus import EventBus, Subscription
+from decoding import DECODE_SCALES, DecodedFrame, Frame, decode_for_detection, detection_image, full_resolution
+from frame_protocol import FrameProtocolError, parse_frame_message
+from inference_pool import InferenceBusyError, InferencePool
+from metrics import MetricsRegistry
+from ingestion import StreamIngestion
+from model_backends import load_yolo
+from motion import MotionGate
+from colors import ColorNamer, kmeans_dominant_color
+from pose import POSE_MODES, estimate_poses
+from profile_index import CompiledProfiles, ProfileIndex
+from sharding import ShardSupervisor
+from stage_timing import STAGES, add_observer, timed
+from tracker import PersonTracker
+from video_reader import VideoFrameReader
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,9 +65,99 @@ detector_model: Optional[YOLO] = None
 pose_model: Optional[YOLO] = None
 clip_model = None  # Will be loaded if CLIP is available
 clip_preprocess = None  # CLIP preprocessing function
+clip_matcher: Optional[ClipMatcher] = None  # CLIP with cached profile text features
+model_backend: Optional[Dict] = None  # Backend the YOLO models were loaded on
 
 # Track active video streams
 active_streams: Dict[str, Dict] = {}
+# Cameras pulled by the service itself (/api/cameras)
+cameras: Dict[str, Dict] = {}
+
+# YOLO models and inference backend: torch, onnx or openvino (fp32 or int8)
+DETECTOR_MODEL = os.getenv("DETECTOR_MODEL", "yolov8n")  # Nano model for speed
+POSE_MODEL = os.getenv("POSE_MODEL", "yolov8n-pose")
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "torch")
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+
+# Cross-stream detection batching (tune via environment)
+DETECT_MAX_BATCH_SIZE = int(os.getenv("DETECT_MAX_BATCH_SIZE", "8"))
+DETECT_MAX_WAIT_MS = float(os.getenv("DETECT_MAX_WAIT_MS", "10"))
+detection_batcher: Optional[DetectionBatcher] = None
+
+# Inference worker pool; the event loop only does I/O (tune via environment)
+# Each worker holds one frame in the detection batcher, so keep workers >= batch size
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(DETECT_MAX_BATCH_SIZE)))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", str(INFERENCE_WORKERS * 4)))
+inference_pool: Optional[InferencePool] = None
+
+# Detection input size and reduced-scale JPEG decoding ("auto", 1, 2, 4 or 8); both per stream too
+DETECT_IMGSZ = int(os.getenv("DETECT_IMGSZ", "640"))
+DECODE_SCALE = os.getenv("DECODE_SCALE", "auto")
+if DECODE_SCALE not in DECODE_SCALES:
+    raise ValueError(f"DECODE_SCALE must be one of {DECODE_SCALES}, got {DECODE_SCALE!r}")
+
+# Multi-process stream sharding: 0 = streams run on the in-process inference pool
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_MAX_IN_FLIGHT = int(os.getenv("SHARD_MAX_IN_FLIGHT", "2"))  # Frames queued or running per worker
+SHARD_TORCH_THREADS = int(os.getenv("SHARD_TORCH_THREADS", "1"))  # PyTorch threads per worker
+SHARD_FRAME_SLOT_MB = float(os.getenv("SHARD_FRAME_SLOT_MB", "8"))  # Shared-memory slot per decoded frame (1080p BGR fits)
+shard_supervisor: Optional[ShardSupervisor] = None
+
+# Live stream ingestion: newest frame wins, stride adapts to hit the latency / FPS budget
+STREAM_TARGET_LATENCY_MS = float(os.getenv("STREAM_TARGET_LATENCY_MS", "500"))
+STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "0"))  # 0 = no FPS cap
+STREAM_STATS_INTERVAL = float(os.getenv("STREAM_STATS_INTERVAL", "1.0"))  # seconds
+
+# Per-stream person tracking; attributes and matches are recomputed every N frames per track
+TRACK_REFRESH_INTERVAL = int(os.getenv("TRACK_REFRESH_INTERVAL", "15"))
+TRACK_MAX_AGE = int(os.getenv("TRACK_MAX_AGE", "30"))
+
+# Motion gating for live streams: skip static frames, detect only in changed regions
+MOTION_GATE = os.getenv("MOTION_GATE", "1").lower() not in ("0", "false", "no")
+MOTION_THRESHOLD = int(os.getenv("MOTION_THRESHOLD", "25"))  # grey levels
+MOTION_MIN_AREA = float(os.getenv("MOTION_MIN_AREA", "0.002"))  # fraction of the frame
+MOTION_MAX_REGION = float(os.getenv("MOTION_MAX_REGION", "0.6"))  # larger regions detect on the full frame
+MOTION_REFRESH_FRAMES = int(os.getenv("MOTION_REFRESH_FRAMES", "30"))
+
+# Match notification dedup: one notification per (profile, track) per TTL window
+MATCH_DEDUP_TTL = float(os.getenv("MATCH_DEDUP_TTL", "5"))
+MATCH_DEDUP_MAX_ENTRIES = int(os.getenv("MATCH_DEDUP_MAX_ENTRIES", "10000"))
+MATCH_DEDUP_BUCKET = int(os.getenv("MATCH_DEDUP_BUCKET", "64"))  # pixels, for untracked matches
+
+# Video file jobs (/api/process-video and video_job.py)
+VIDEO_JOB_ROOT = os.getenv("VIDEO_JOB_ROOT", "videos")  # Video paths must be inside this directory; empty disables file jobs
+VIDEO_JOB_MAX_CONCURRENT = int(os.getenv("VIDEO_JOB_MAX_CONCURRENT", "2"))
+VIDEO_JOB_QUEUE_SIZE = int(os.getenv("VIDEO_JOB_QUEUE_SIZE", "16"))  # Decoded frames buffered ahead
+VIDEO_JOB_PROGRESS_INTERVAL = float(os.getenv("VIDEO_JOB_PROGRESS_INTERVAL", "2.0"))  # seconds
+VIDEO_JOB_BUSY_RETRY = 0.05  # seconds a job frame waits before retrying a full inference pool
+
+video_job_slots = threading.BoundedSemaphore(max(1, VIDEO_JOB_MAX_CONCURRENT))
+
+# Native camera ingestion (/api/cameras): one capture thread per camera, newest frame wins
+CAMERA_MAX_FPS = float(os.getenv("CAMERA_MAX_FPS", "0"))  # 0 = as fast as inference keeps up
+CAMERA_STALE_SECONDS = float(os.getenv("CAMERA_STALE_SECONDS", "5"))  # No frame for this long = unhealthy
+CAMERA_RECONNECT_MAX_DELAY = float(os.getenv("CAMERA_RECONNECT_MAX_DELAY", "30"))  # seconds
+
+# Match event fan-out (/ws/matches); subscribers whose buffer fills up are disconnected
+EVENT_BUS_SUBSCRIBER_QUEUE = int(os.getenv("EVENT_BUS_SUBSCRIBER_QUEUE", "256"))
+
+event_bus = EventBus(max_queue=EVENT_BUS_SUBSCRIBER_QUEUE)
+
+# Prometheus /metrics: per-stage latency histograms (stream counters are always exported)
+METRICS_STAGE_TIMING = os.getenv("METRICS_STAGE_TIMING", "1").lower() not in ("0", "false", "no")
+
+# Pose estimation: "frame" (one pass per frame), "batch" (one pass over all crops) or "crop"
+POSE_MODE = os.getenv("POSE_MODE", "frame")
+POSE_MATCH_IOU = float(os.getenv("POSE_MATCH_IOU", "0.5"))
+if POSE_MODE not in POSE_MODES:
+    raise ValueError(f"POSE_MODE must be one of {POSE_MODES}, got {POSE_MODE!r}")
+
+# Colour extraction: "fast" (lookup-table histogram) or "accurate" (K-Means per crop)
+COLOR_MODE = os.getenv("COLOR_MODE", "fast")
+if COLOR_MODE not in ("fast", "accurate"):
+    raise ValueError(f"COLOR_MODE must be 'fast' or 'accurate', got {COLOR_MODE!r}")
+color_namer = ColorNamer()
 
 
 class MissingPersonProfile(BaseModel):
@@ -65,20 +181,37 @@ class MatchResult(BaseModel):
     timestamp: datetime
     imageUrl: Optional[str] = None
     location: Optional[str] = None
+    bbox: Optional[List[int]] = None  # [x1, y1, x2, y2] in frame pixels
+    frameIndex: Optional[int] = None  # Video file jobs only
+    videoTimestamp: Optional[float] = None  # Seconds from the start of the video file
+    frameId: Optional[int] = None  # Binary stream frames only: ids from the frame header
+    captureTimestamp: Optional[float] = None  # ms since epoch, as sent by the client
+    cameraId: Optional[str] = None
+    streamId: Optional[str] = None  # Live stream or camera the match came from
+    zone: Optional[str] = None  # Zone of that stream or camera, if configured
 
 
 def load_models():
     """Load YOLOv8 models for detection and pose estimation"""
-    global detector_model, pose_model, clip_model, clip_preprocess
+    global detector_model, pose_model, clip_model, clip_preprocess, clip_matcher, model_backend
     
     try:
+        logger.info(f"Inference backend: {MODEL_BACKEND} ({MODEL_PRECISION})")
+        
         logger.info("Loading YOLOv8 detection model...")
-        detector_model = YOLO('yolov8n.pt')  # Nano model for speed
-        logger.info("✓ Detection model loaded")
+        detector_model, detector_info = load_yolo(DETECTOR_MODEL, "detect", MODEL_BACKEND, MODEL_PRECISION, MODEL_DIR)
+        logger.info(f"✓ Detection model loaded from {detector_info['path']}")
         
         logger.info("Loading YOLOv8 pose estimation model...")
-        pose_model = YOLO('yolov8n-pose.pt')
-        logger.info("✓ Pose model loaded")
+        pose_model, pose_info = load_yolo(POSE_MODEL, "pose", MODEL_BACKEND, MODEL_PRECISION, MODEL_DIR)
+        logger.info(f"✓ Pose model loaded from {pose_info['path']}")
+        
+        model_backend = {
+            "backend": MODEL_BACKEND,
+            "precision": MODEL_PRECISION,
+            "detector": detector_info["path"],
+            "pose": pose_info["path"]
+        }
         
         # Optional: Load CLIP model if available
         try:
@@ -86,68 +219,27 @@ def load_models():
             import torch
             device = "cuda" if torch.cuda.is_available() else "cpu"
             clip_model, clip_preprocess = clip.load("ViT-B/32", device=device)
+            clip_matcher = ClipMatcher(clip_model, clip_preprocess, clip, torch, device)
             logger.info(f"✓ CLIP model loaded on {device}")
         except ImportError:
             logger.warning("CLIP not available. Install with: pip install git+https://github.com/openai/CLIP.git")
             clip_model = None
             clip_preprocess = None
+            clip_matcher = None
             
     except Exception as e:
         logger.error(f"Error loading models: {e}")
         raise
 
 
-def get_dominant_color(image: np.ndarray, k: int = 3) -> str:
-    """
-    Extract dominant color from image using K-Means clustering
-    Returns color name (e.g., "Red", "Blue", "Pink")
-    """
-    # Reshape image to be a list of pixels
-    pixels = image.reshape(-1, 3)
-    
-    # Convert to float32
-    pixels = np.float32(pixels)
-    
-    # Apply K-Means
-    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
-    _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
-    
-    # Get the most common cluster
-    unique, counts = np.unique(labels, return_counts=True)
-    dominant_cluster = unique[np.argmax(counts)]
-    dominant_color = centers[dominant_cluster].astype(int)
-    
-    # Map RGB to color name (simplified - can be enhanced)
-    return rgb_to_color_name(dominant_color)
-
-
-def rgb_to_color_name(rgb: np.ndarray) -> str:
-    """Map RGB values to color names"""
-    r, g, b = rgb[0], rgb[1], rgb[2]
-    
-    # Color name mapping (simplified - can use webcolors library for more accuracy)
-    color_ranges = {
-        "Red": ((200, 0, 0), (255, 100, 100)),
-        "Pink": ((200, 100, 150), (255, 200, 220)),
-        "Blue": ((0, 0, 150), (100, 100, 255)),
-        "Green": ((0, 150, 0), (100, 255, 100)),
-        "Yellow": ((200, 200, 0), (255, 255, 150)),
-        "Orange": ((200, 100, 0), (255, 200, 100)),
-        "Purple": ((100, 0, 150), (200, 100, 255)),
-        "Black": ((0, 0, 0), (50, 50, 50)),
-        "White": ((200, 200, 200), (255, 255, 255)),
-        "Gray": ((100, 100, 100), (150, 150, 150)),
-        "Brown": ((100, 50, 0), (150, 100, 50)),
-        "Khaki": ((180, 180, 120), (220, 220, 160)),
-    }
-    
-    for color_name, (lower, upper) in color_ranges.items():
-        if (lower[0] <= r <= upper[0] and 
-            lower[1] <= g <= upper[1] and 
-            lower[2] <= b <= upper[2]):
-            return color_name
-    
-    return "Unknown"
+def get_dominant_colors(images: List[Optional[np.ndarray]]) -> List[Optional[str]]:
+    """Dominant color names for all crops of a frame (None for missing crops)"""
+    if COLOR_MODE == "accurate":
+        return [
+            kmeans_dominant_color(image) if image is not None and image.size > 0 else None
+            for image in images
+        ]
+    return color_namer.name_many(images)
 
 
 def crop_torso(image: np.ndarray, keypoints: np.ndarray) -> Optional[np.ndarray]:
@@ -214,161 +306,685 @@ def crop_legs(image: np.ndarray, keypoints: np.ndarray) -> Optional[np.ndarray]:
     return None
 
 
-def process_frame(frame: np.ndarray, missing_persons: List[MissingPersonProfile]) -> List[MatchResult]:
+def detect_persons(frames: List[np.ndarray], imgsz: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Run person detection over a batch of frames in one forward pass
+    Returns one (N, 5) array of [x1, y1, x2, y2, confidence] per frame
+    """
+    with timed("detect"):
+        results = detector_model(frames, classes=[0], imgsz=imgsz or DETECT_IMGSZ, verbose=False)  # class 0 = person
+    
+    detections = []
+    for result in results:
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            detections.append(np.empty((0, 5), dtype=np.float32))
+            continue
+        
+        frame_detections = np.hstack([
+            boxes.xyxy.cpu().numpy(),
+            boxes.conf.cpu().numpy().reshape(-1, 1)
+        ]).astype(np.float32)
+        
+        # Confidence threshold
+        detections.append(frame_detections[frame_detections[:, 4] >= 0.5])
+    
+    return detections
+
+
+def decode_frame(image_data: str, decode_scale: str = "1", imgsz: Optional[int] = None) -> Optional[Frame]:
+    """
+    Decode a base64 (optionally data URL) image into a BGR frame
+    With a decode scale other than "1", JPEGs may come back as a reduced
+    DecodedFrame (see decoding.py)
+    """
+    # Remove data URL prefix if present
+    if "," in image_data:
+        image_data = image_data.split(",")[1]
+    
+    with timed("decode"):
+        image_bytes = base64.b64decode(image_data)
+        nparr = np.frombuffer(image_bytes, np.uint8)
+        return decode_for_detection(nparr, decode_scale, imgsz or DETECT_IMGSZ)
+
+
+def run_inference(
+    frame: Frame,
+    missing_persons: Union[List[MissingPersonProfile], ProfileIndex],
+    tracker: Optional[PersonTracker] = None,
+    motion_gate: Optional[MotionGate] = None,
+    imgsz: Optional[int] = None
+) -> List[MatchResult]:
+    """
+    Blocking inference for one frame, run on the inference pool
+    Detection goes through the shared batcher when it is running. With a
+    motion gate, static frames are skipped and only the changed region is
+    passed to the detector. Reduced-scale frames are detected (and motion
+    gated) at their reduced size; boxes are mapped back to full resolution.
+    """
+    image = detection_image(frame)
+    
+    region = None
+    if motion_gate is not None:
+        decision = motion_gate.check(image)
+        if not decision.run:
+            return []
+        region = decision.region
+    
+    detect_frame = image
+    if region is not None:
+        x1, y1, x2, y2 = region
+        detect_frame = image[y1:y2, x1:x2]
+    
+    detections = None
+    if detection_batcher is not None and detection_batcher.running:
+        detections = detection_batcher.submit(detect_frame, imgsz).result()
+    elif detector_model is not None:
+        detections = detect_persons([detect_frame], imgsz=imgsz)[0]
+    
+    if region is not None and detections is not None:
+        # Back to full-frame coordinates
+        detections = detections.copy()
+        detections[:, [0, 2]] += region[0]
+        detections[:, [1, 3]] += region[1]
+    
+    if isinstance(frame, DecodedFrame) and detections is not None:
+        detections = frame.to_full_resolution(detections)
+    
+    return process_frame(frame, missing_persons, detections=detections, tracker=tracker)
+
+
+def decode_and_process(
+    image_data: str,
+    missing_persons: Union[List[MissingPersonProfile], ProfileIndex],
+    tracker: Optional[PersonTracker] = None,
+    motion_gate: Optional[MotionGate] = None,
+    decode_scale: str = DECODE_SCALE,
+    imgsz: Optional[int] = None
+) -> Optional[List[MatchResult]]:
+    """Decode and process a base64 frame; returns None if the image is invalid"""
+    if not image_data:
+        return None
+    frame = decode_frame(image_data, decode_scale, imgsz)
+    if frame is None:
+        return None
+    return run_inference(frame, missing_persons, tracker, motion_gate, imgsz)
+
+
+def decode_binary_and_process(
+    message: bytes,
+    missing_persons: Union[List[MissingPersonProfile], ProfileIndex],
+    tracker: Optional[PersonTracker] = None,
+    motion_gate: Optional[MotionGate] = None,
+    decode_scale: str = DECODE_SCALE,
+    imgsz: Optional[int] = None
+) -> Optional[List[MatchResult]]:
+    """Decode and process a binary protocol frame; returns None if the image is invalid"""
+    _, payload = parse_frame_message(message)
+    with timed("decode"):
+        frame = decode_for_detection(payload, decode_scale, imgsz or DETECT_IMGSZ)
+    if frame is None:
+        return None
+    return run_inference(frame, missing_persons, tracker, motion_gate, imgsz)
+
+
+def create_stream_state(missing_persons: List[MissingPersonProfile], config: Dict) -> Dict:
+    """Per-stream inference state: profiles, tracker, motion gate and decode/detect sizes"""
+    decode_scale = str(config.get("decodeScale") or DECODE_SCALE)
+    if decode_scale not in DECODE_SCALES:
+        raise ValueError(f"decodeScale must be one of {DECODE_SCALES}, got {decode_scale!r}")
+    return {
+        "decodeScale": decode_scale,
+        "detectImgsz": int(config.get("detectImgsz") or DETECT_IMGSZ),
+        "profiles": ProfileIndex(missing_persons),
+        "tracker": PersonTracker(max_age=TRACK_MAX_AGE, refresh_interval=TRACK_REFRESH_INTERVAL),
+        "motion": MotionGate(
+            threshold=MOTION_THRESHOLD,
+            min_area=MOTION_MIN_AREA,
+            max_region=MOTION_MAX_REGION,
+            refresh_interval=MOTION_REFRESH_FRAMES
+        ) if config.get("motionGate", MOTION_GATE) else None
+    }
+
+
+def apply_profile_update(
+    profiles: ProfileIndex,
+    mode: str,
+    missing_persons: List[MissingPersonProfile],
+    removed_ids: List[str]
+):
+    """Apply an update_profiles message: "replace" (default), "upsert" or "remove" by id"""
+    if mode == "remove":
+        profiles.remove(removed_ids)
+        if clip_matcher is not None:
+            clip_matcher.forget(removed_ids)
+    elif mode == "upsert":
+        profiles.upsert(missing_persons)
+    else:
+        profiles.replace(missing_persons)
+
+
+def process_stream_item(state: Dict, kind: str, payload) -> Optional[List[MatchResult]]:
+    """Decode (unless already "decoded") and process one stream frame against the stream's state"""
+    if kind == "decoded":
+        return run_inference(payload, state["profiles"], state["tracker"], state["motion"], state["detectImgsz"])
+    process = decode_binary_and_process if kind == "binary" else decode_and_process
+    return process(
+        payload, state["profiles"], state["tracker"], state["motion"],
+        decode_scale=state["decodeScale"], imgsz=state["detectImgsz"]
+    )
+
+
+def stream_state_stats(state: Dict) -> Dict:
+    """Tracker and motion gate figures for stream stats messages"""
+    motion_gate = state["motion"]
+    return {
+        **(motion_gate.stats() if motion_gate is not None else {}),
+        "activeTracks": len(state["tracker"].tracks)
+    }
+
+
+def analyze_persons(
+    frame: np.ndarray,
+    boxes: List[Tuple[int, int, int, int]],
+    profiles: CompiledProfiles
+) -> List[Dict]:
+    """
+    Pose, colour, CLIP and matching for a set of person boxes
+    Returns per person: {"attributes": {...}, "matches": [(profile id, confidence), ...]}
+    """
+    # Pose estimation for attribute extraction (all persons at once)
+    with timed("pose"):
+        poses = estimate_poses(pose_model, frame, np.array(boxes), mode=POSE_MODE, iou_threshold=POSE_MATCH_IOU)
+    
+    # Torso (top) and legs (bottom) crops for every person
+    person_imgs = []
+    region_imgs = []
+    for (x1, y1, x2, y2), keypoints in zip(boxes, poses):
+        person_img = frame[y1:y2, x1:x2]
+        person_imgs.append(person_img)
+        if keypoints is not None:
+            region_imgs.extend([crop_torso(person_img, keypoints), crop_legs(person_img, keypoints)])
+        else:
+            region_imgs.extend([None, None])
+    
+    # Extract colors for all crops at once
+    with timed("color"):
+        region_colors = get_dominant_colors(region_imgs)
+    
+    with timed("candidates"):
+        detected_top = profiles.encode(region_colors[0::2])
+        detected_bottom = profiles.encode(region_colors[1::2])
+        
+        # Only profiles whose colours agree with some detection can pass the threshold
+        columns = profiles.candidates(detected_top, detected_bottom)
+    
+    # CLIP: one image batch for all persons against cached candidate text features
+    clip_scores = None
+    if clip_matcher is not None and person_imgs and len(columns) > 0:
+        with timed("clip"):
+            clip_scores = clip_matcher.similarity(person_imgs, [profiles.profiles[j] for j in columns])
+    
+    # Match against missing person profiles: one detections x candidates array operation
+    with timed("match"):
+        confidences = profiles.score(detected_top, detected_bottom, columns, clip_scores)
+    
+    analyses = []
+    for i in range(len(person_imgs)):
+        detected_attributes = {
+            "topColor": region_colors[2 * i],
+            "bottomColor": region_colors[2 * i + 1],
+            "accessories": []
+        }
+        person_matches = [
+            (profiles.ids[columns[c]], float(confidences[i, c]))
+            for c in np.flatnonzero(confidences[i] > 0.7)  # Confidence threshold
+        ]
+        analyses.append({"attributes": detected_attributes, "matches": person_matches})
+    
+    return analyses
+
+
+def process_frame(
+    frame: Frame,
+    missing_persons: Union[List[MissingPersonProfile], ProfileIndex],
+    detections: Optional[np.ndarray] = None,
+    tracker: Optional[PersonTracker] = None
+) -> List[MatchResult]:
     """
     Process a single video frame:
-    1. Detect persons
-    2. Extract attributes (colors, accessories)
-    3. Match against missing person profiles
+    1. Detect persons (skipped when batched detections are passed in)
+    2. Track persons, if a tracker is given
+    3. Extract attributes (colors, accessories) and match against missing person profiles
+       With a tracker this only runs for new tracks or every refresh interval;
+       other tracks reuse their cached results
+    A reduced-scale DecodedFrame is only decoded at full resolution when
+    some person needs analysing.
     """
     matches = []
     
-    if detector_model is None:
-        return matches
+    if not isinstance(missing_persons, ProfileIndex):
+        missing_persons = ProfileIndex(missing_persons)
+    profiles = missing_persons.compiled()
     
     # Step 1: Detect persons
-    results = detector_model(frame, classes=[0], verbose=False)  # class 0 = person
+    if detections is None:
+        if detector_model is None:
+            return matches
+        detections = detect_persons([full_resolution(frame)])[0]
     
-    for result in results:
-        boxes = result.boxes
-        if boxes is None:
-            continue
-            
-        for box in boxes:
-            # Extract bounding box
-            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-            confidence = float(box.conf[0].cpu().numpy())
-            
-            if confidence < 0.5:  # Confidence threshold
-                continue
-            
-            # Crop person from frame
-            person_img = frame[y1:y2, x1:x2]
-            if person_img.size == 0:
-                continue
-            
-            # Step 2: Pose estimation for attribute extraction
-            pose_results = pose_model(person_img, verbose=False) if pose_model else None
-            
-            detected_attributes = {
-                "topColor": None,
-                "bottomColor": None,
-                "accessories": []
-            }
-            
-            if pose_results and len(pose_results) > 0:
-                keypoints = pose_results[0].keypoints.data[0].cpu().numpy().flatten()
-                
-                # Extract top color (torso)
-                torso_img = crop_torso(person_img, keypoints)
-                if torso_img is not None and torso_img.size > 0:
-                    detected_attributes["topColor"] = get_dominant_color(torso_img)
-                
-                # Extract bottom color (legs)
-                legs_img = crop_legs(person_img, keypoints)
-                if legs_img is not None and legs_img.size > 0:
-                    detected_attributes["bottomColor"] = get_dominant_color(legs_img)
-            
-            # Step 3: Match against missing person profiles
-            for missing_person in missing_persons:
-                match_confidence = calculate_match_confidence(
-                    detected_attributes, 
-                    missing_person, 
-                    person_img
-                )
-                
-                if match_confidence > 0.7:  # Confidence threshold
-                    match = MatchResult(
-                        personId=f"person_{x1}_{y1}_{datetime.now().timestamp()}",
-                        missingPersonId=missing_person.id,
-                        confidence=match_confidence,
-                        attributes=detected_attributes,
-                        timestamp=datetime.now(),
-                        location=None  # Can be set from camera metadata
-                    )
-                    matches.append(match)
+    # Keep boxes that produce a non-empty crop
+    height, width = frame.shape[:2]
+    boxes = []
+    kept = []
+    for detection in detections:
+        x1, y1, x2, y2 = map(int, detection[:4])
+        if min(x2, width) > max(x1, 0) and min(y2, height) > max(y1, 0):
+            boxes.append((x1, y1, x2, y2))
+            kept.append(detection)
     
+    # Step 2: Persistent track ids
+    track_ids = tracker.update(np.array(kept)) if tracker is not None else [None] * len(boxes)
+    
+    # Step 3: Analyse only persons without a fresh cached result
+    stale = [
+        i for i, track_id in enumerate(track_ids)
+        if tracker is None or tracker.needs_refresh(track_id, profiles.version)
+    ]
+    analyses: List[Optional[Dict]] = [None] * len(boxes)
+    if stale:
+        image = full_resolution(frame)
+        for i, analysis in zip(stale, analyze_persons(image, [boxes[i] for i in stale], profiles)):
+            analyses[i] = analysis
+            if tracker is not None:
+                tracker.store(track_ids[i], profiles.version, analysis)
+    
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        analysis = analyses[i] if analyses[i] is not None else tracker.cached(track_ids[i])
+        
+        if track_ids[i] is not None:
+            person_id = f"track_{track_ids[i]}"
+        else:
+            person_id = f"person_{x1}_{y1}_{datetime.now().timestamp()}"
+        
+        for missing_person_id, match_confidence in analysis["matches"]:
+            match = MatchResult(
+                personId=person_id,
+                missingPersonId=missing_person_id,
+                confidence=match_confidence,
+                attributes=analysis["attributes"],
+                timestamp=datetime.now(),
+                location=None,  # Can be set from camera metadata
+                bbox=[x1, y1, x2, y2]
+            )
+            matches.append(match)
+
     return matches
 
 
-def calculate_match_confidence(
-    detected_attributes: Dict, 
-    missing_person: MissingPersonProfile,
-    person_image: np.ndarray
-) -> float:
+def match_subject(match: MatchResult) -> str:
+    """Dedup subject for a match: its track, or a coarse spatial bucket when untracked"""
+    if match.personId.startswith("track_") or not match.bbox:
+        return match.personId
+    x1, y1, x2, y2 = match.bbox
+    return f"bucket_{(x1 + x2) // 2 // MATCH_DEDUP_BUCKET}_{(y1 + y2) // 2 // MATCH_DEDUP_BUCKET}"
+
+
+def warm_clip_cache(missing_persons: List[MissingPersonProfile]):
+    """Encode CLIP text features for newly received profiles up front"""
+    if clip_matcher is None:
+        return
+    try:
+        clip_matcher.warm(missing_persons)
+    except Exception as e:
+        logger.warning(f"Could not cache CLIP text features: {e}")
+
+
+async def warm_clip_cache_async(missing_persons: List[MissingPersonProfile]):
+    """Warm the CLIP cache on the inference pool (falls back to lazy encoding if busy)"""
+    if clip_matcher is None or inference_pool is None:
+        return
+    try:
+        await inference_pool.run(warm_clip_cache, missing_persons)
+    except InferenceBusyError:
+        pass
+
+
+# Prometheus metrics; per-stream counters and gauges are read from live state at scrape time
+metrics_registry = MetricsRegistry()
+stage_seconds = metrics_registry.histogram(
+    "echoplex_stage_seconds",
+    "Time spent in each pipeline stage (" + ", ".join(STAGES) + ")"
+)
+
+
+def _stream_samples(value) -> List[Tuple[Dict[str, str], float]]:
+    return [({"stream": stream_id}, value(stream)) for stream_id, stream in list(active_streams.items())]
+
+
+def _dropped_samples() -> List[Tuple[Dict[str, str], float]]:
+    samples = []
+    for stream_id, stream in list(active_streams.items()):
+        ingestion = stream["ingestion"]
+        samples.extend([
+            ({"stream": stream_id, "reason": "stale"}, ingestion.dropped_stale),
+            ({"stream": stream_id, "reason": "stride"}, ingestion.skipped_stride),
+            ({"stream": stream_id, "reason": "busy"}, ingestion.rejected_busy)
+        ])
+    return samples
+
+
+metrics_registry.counter_callback(
+    "echoplex_stream_frames_received_total", "Frames received per stream",
+    lambda: _stream_samples(lambda stream: stream["ingestion"].received)
+)
+metrics_registry.counter_callback(
+    "echoplex_stream_frames_processed_total", "Frames processed per stream",
+    lambda: _stream_samples(lambda stream: stream["ingestion"].processed)
+)
+metrics_registry.counter_callback(
+    "echoplex_stream_frames_dropped_total", "Frames dropped per stream and reason",
+    _dropped_samples
+)
+metrics_registry.counter_callback(
+    "echoplex_stream_matches_total", "Match notifications sent per stream",
+    lambda: _stream_samples(lambda stream: stream["dedup"].sent)
+)
+metrics_registry.gauge_callback(
+    "echoplex_active_streams", "Connected video streams",
+    lambda: [({}, len(active_streams))]
+)
+metrics_registry.gauge_callback(
+    "echoplex_detection_queue_depth", "Frames waiting for batched detection",
+    lambda: [({}, detection_batcher.stats()["queue_depth"])] if detection_batcher else []
+)
+metrics_registry.gauge_callback(
+    "echoplex_inference_pending", "Frames queued or running on the inference pool",
+    lambda: [({}, inference_pool.pending)] if inference_pool else []
+)
+
+
+def _shard_samples(field: str) -> List[Tuple[Dict[str, str], float]]:
+    if shard_supervisor is None:
+        return []
+    return [({"worker": str(worker["worker"])}, worker[field]) for worker in shard_supervisor.stats()]
+
+
+metrics_registry.gauge_callback(
+    "echoplex_shard_worker_streams", "Streams assigned to each shard worker",
+    lambda: _shard_samples("streams")
+)
+metrics_registry.gauge_callback(
+    "echoplex_shard_worker_utilization", "Fraction of recent time each shard worker spent processing frames",
+    lambda: _shard_samples("utilization")
+)
+metrics_registry.counter_callback(
+    "echoplex_shard_worker_frames_total", "Frames processed by each shard worker",
+    lambda: _shard_samples("processed")
+)
+
+
+def _camera_samples(value) -> List[Tuple[Dict[str, str], float]]:
+    return [({"camera": camera_id}, value(camera)) for camera_id, camera in list(cameras.items())]
+
+
+metrics_registry.gauge_callback(
+    "echoplex_camera_fps", "Frames per second read from each camera",
+    lambda: _camera_samples(lambda camera: camera["reader"].fps or 0.0)
+)
+metrics_registry.counter_callback(
+    "echoplex_camera_frames_processed_total", "Frames processed per camera",
+    lambda: _camera_samples(lambda camera: camera["processed"])
+)
+metrics_registry.gauge_callback(
+    "echoplex_camera_healthy", "1 while a camera is delivering frames",
+    lambda: _camera_samples(lambda camera: float(camera_healthy(camera)))
+)
+metrics_registry.gauge_callback(
+    "echoplex_event_subscribers", "Connected match event subscribers",
+    lambda: [({}, event_bus.subscriber_count())]
+)
+metrics_registry.counter_callback(
+    "echoplex_events_published_total", "Match events published to the event bus",
+    lambda: [({}, event_bus.published)]
+)
+metrics_registry.counter_callback(
+    "echoplex_event_subscribers_dropped_total", "Event subscribers disconnected for falling behind",
+    lambda: [({}, event_bus.dropped_subscribers)]
+)
+
+if METRICS_STAGE_TIMING:
+    add_observer(lambda stage, seconds: stage_seconds.observe(seconds, stage=stage))
+
+
+def resolve_video_path(path: str) -> str:
     """
-    Calculate match confidence score between detected person and missing person profile
-    Combines color matching and CLIP-based description matching
+    Absolute video path (relative paths are taken from VIDEO_JOB_ROOT)
+    Raises ValueError when file jobs are disabled, outside VIDEO_JOB_ROOT or if missing
     """
-    score = 0.0
-    factors = 0
+    if not VIDEO_JOB_ROOT:
+        raise ValueError("Video files are disabled: set VIDEO_JOB_ROOT to the directory they may be read from")
+    root = os.path.realpath(VIDEO_JOB_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Video path must be inside {VIDEO_JOB_ROOT}")
+    if not os.path.isfile(resolved):
+        raise ValueError(f"Video file not found: {path}")
+    return resolved
+
+
+def run_video_job(
+    reader: VideoFrameReader,
+    missing_persons: List[MissingPersonProfile]
+) -> Iterator[Dict]:
+    """
+    Search a video file for missing persons; yields NDJSON-ready messages
+    Match results carry frameIndex and videoTimestamp; "progress" messages
+    are yielded periodically and a final "done" message ends the job.
+    With an inference pool (the API), each frame's detection and analysis
+    run as one pool job; otherwise (the CLI) detection for the next frames
+    is submitted to the batcher ahead of time. Tracking and matching run in
+    frame order either way.
+    """
+    started = time.perf_counter()
+    last_progress = started
+    profiles = ProfileIndex(missing_persons)
+    tracker = PersonTracker(max_age=TRACK_MAX_AGE, refresh_interval=TRACK_REFRESH_INTERVAL)
+    dedup = MatchDeduplicator(ttl_seconds=MATCH_DEDUP_TTL, max_entries=MATCH_DEDUP_MAX_ENTRIES)
+    warm_clip_cache(missing_persons)
     
-    # Factor 1: Top color match
-    if missing_person.topColor and detected_attributes.get("topColor"):
-        if missing_person.topColor.lower() == detected_attributes["topColor"].lower():
-            score += 0.4
-        factors += 0.4
+    batching = detection_batcher is not None and detection_batcher.running
+    pooled = inference_pool is not None
+    detect_ahead = DETECT_MAX_BATCH_SIZE if batching and not pooled else 1
+    pending = deque()
+    processed = 0
+    timestamp = 0.0
     
-    # Factor 2: Bottom color match
-    if missing_person.bottomColor and detected_attributes.get("bottomColor"):
-        if missing_person.bottomColor.lower() == detected_attributes["bottomColor"].lower():
-            score += 0.3
-        factors += 0.3
+    def detect_and_analyse(frame, future):
+        if future is None and batching:
+            future = detection_batcher.submit(frame)
+        detections = future.result() if future is not None else None
+        return process_frame(frame, profiles, detections=detections, tracker=tracker)
     
-    # Factor 3: CLIP-based description matching (if available)
-    if clip_model and missing_person.description:
-        try:
-            clip_score = match_with_clip(person_image, missing_person.description)
-            score += clip_score * 0.3
-            factors += 0.3
-        except Exception as e:
-            logger.warning(f"CLIP matching failed: {e}")
+    def analyse(frame, future):
+        # The whole frame is one pool job, like a live frame: a job holds one slot and waits while the pool is full
+        if not pooled:
+            return detect_and_analyse(frame, future)
+        while True:
+            try:
+                return inference_pool.submit(detect_and_analyse, frame, None).result()
+            except InferenceBusyError:
+                time.sleep(VIDEO_JOB_BUSY_RETRY)
+    
+    def finish(frame_index, frame_timestamp, frame, future):
+        for match in analyse(frame, future):
+            # Dedup on video time, so results do not depend on processing speed
+            if dedup.should_send(match.missingPersonId, match_subject(match), now=frame_timestamp):
+                match.frameIndex = frame_index
+                match.videoTimestamp = round(frame_timestamp, 3)
+                yield jsonable_encoder(match)
+    
+    def progress(message_type: str) -> Dict:
+        return {
+            "type": message_type,
+            "framesRead": reader.frames_read,
+            "framesProcessed": processed,
+            "videoTimestamp": round(timestamp, 3),
+            "matches": dedup.sent,
+            "elapsedSeconds": round(time.perf_counter() - started, 3)
+        }
+    
+    for frame_index, timestamp, frame in reader:
+        future = detection_batcher.submit(frame) if batching and not pooled else None
+        pending.append((frame_index, timestamp, frame, future))
+        if len(pending) < detect_ahead:
+            continue
+        
+        yield from finish(*pending.popleft())
+        processed += 1
+        
+        now = time.perf_counter()
+        if now - last_progress >= VIDEO_JOB_PROGRESS_INTERVAL:
+            last_progress = now
+            yield progress("progress")
     
-    # Normalize score
-    if factors > 0:
-        return min(1.0, score / factors)
-    return 0.0
+    while pending:
+        yield from finish(*pending.popleft())
+        processed += 1
+    
+    yield progress("done")
+
+
+def camera_healthy(camera: Dict) -> bool:
+    age = camera["reader"].stats()["lastFrameAgeSeconds"]
+    return camera["reader"].state == "running" and age is not None and age < CAMERA_STALE_SECONDS
 
 
-def match_with_clip(image: np.ndarray, description: str) -> float:
+def camera_info(camera_id: str) -> Dict:
+    """Camera definition plus capture, processing and notification stats"""
+    camera = cameras[camera_id]
+    reader = camera["reader"]
+    return {
+        "id": camera_id,
+        "name": camera["name"],
+        "source": redact_source(reader.source),
+        "location": camera["location"],
+        "zone": camera["zone"],
+        "maxFps": reader.max_fps,
+        "loop": reader.loop,
+        "profiles": len(camera["profiles"]),
+        "healthy": camera_healthy(camera),
+        **reader.stats(),
+        "framesProcessed": camera["processed"],
+        "processingFps": round(1.0 / camera["processInterval"], 1) if camera["processInterval"] else None,
+        "latencyMs": round(camera["latencyMs"], 1) if camera["latencyMs"] is not None else None,
+        "rejectedBusy": camera["rejectedBusy"],
+        "errors": camera["errors"],
+        **camera["stateStats"],
+        "notificationsSent": camera["dedup"].sent,
+        "notificationsSuppressed": camera["dedup"].suppressed,
+        "subscribers": len(camera["subscribers"])
+    }
+
+
+async def process_camera_frames(camera_id: str):
     """
-    Use CLIP to match image against text description
-    Returns confidence score between 0 and 1
+    Processing side of a camera: always takes the newest captured frame and
+    publishes deduplicated matches to the event bus
     """
-    if clip_model is None or clip_preprocess is None:
-        return 0.0
+    camera = cameras[camera_id]
+    reader = camera["reader"]
+    last_processed = None
     
-    try:
-        import clip
-        import torch
-        
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+    while True:
+        frame, captured_at = await reader.next()
         
-        # Preprocess image
-        pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-        image_tensor = clip_preprocess(pil_image).unsqueeze(0).to(device)
+        # On the camera's shard worker (through the shared-memory frame ring), or on the local pool
+        try:
+            if shard_supervisor is not None:
+                matches, camera["stateStats"] = await shard_supervisor.process(camera_id, "decoded", frame)
+                matches = [MatchResult(**match) for match in matches or []]
+            else:
+                matches = await inference_pool.run(process_stream_item, camera, "decoded", frame)
+                camera["stateStats"] = stream_state_stats(camera)
+        except InferenceBusyError:
+            camera["rejectedBusy"] += 1
+            continue
+        except Exception as e:
+            camera["errors"] += 1
+            logger.error(f"Camera {camera_id} processing error: {e}")
+            continue
         
-        # Preprocess text
-        text_tensor = clip.tokenize([f"A person {description}"]).to(device)
+        now = time.perf_counter()
+        camera["processed"] += 1
+        latency_ms = (now - captured_at) * 1000
+        camera["latencyMs"] = latency_ms if camera["latencyMs"] is None else camera["latencyMs"] + 0.2 * (latency_ms - camera["latencyMs"])
+        if last_processed is not None:
+            interval = now - last_processed
+            camera["processInterval"] = interval if camera["processInterval"] is None else camera["processInterval"] + 0.1 * (interval - camera["processInterval"])
+        last_processed = now
         
-        # Get embeddings
-        with torch.no_grad():
-            image_features = clip_model.encode_image(image_tensor)
-            text_features = clip_model.encode_text(text_tensor)
-            
-            # Calculate cosine similarity
-            similarity = torch.cosine_similarity(image_features, text_features)
-            return float(similarity.item())
-            
-    except Exception as e:
-        logger.error(f"CLIP matching error: {e}")
-        return 0.0
+        for match in matches:
+            if camera["dedup"].should_send(match.missingPersonId, match_subject(match)):
+                match.location = match.location or camera["location"]
+                match.streamId = camera_id
+                match.zone = camera["zone"]
+                event_bus.publish(jsonable_encoder(match))
+
+
+async def stop_camera(camera_id: str):
+    """Stop a camera's processing task and capture thread, and close its subscriptions"""
+    camera = cameras.pop(camera_id, None)
+    if camera is None:
+        return
+    camera["task"].cancel()
+    if shard_supervisor is not None:
+        shard_supervisor.close_stream(camera_id)
+    # Joining the capture thread can wait on a network read; keep it off the event loop
+    await asyncio.get_running_loop().run_in_executor(None, camera["reader"].stop)
+    for subscription in list(camera["subscribers"]):
+        event_bus.unsubscribe(subscription)
+    logger.info(f"Camera {camera_id} stopped")
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Load models on startup"""
+    """Load models, start the shared detection batcher and inference pool on startup"""
+    global detection_batcher, inference_pool, shard_supervisor
     load_models()
+    
+    detection_batcher = DetectionBatcher(
+        detect_persons,
+        max_batch_size=DETECT_MAX_BATCH_SIZE,
+        max_wait_ms=DETECT_MAX_WAIT_MS
+    )
+    detection_batcher.start()
+    
+    inference_pool = InferencePool(workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING)
+    logger.info(f"Inference pool started ({inference_pool.workers} workers, max {inference_pool.max_pending} pending)")
+    
+    if SHARD_WORKERS > 0:
+        shard_supervisor = ShardSupervisor(
+            workers=SHARD_WORKERS,
+            max_in_flight=SHARD_MAX_IN_FLIGHT,
+            torch_threads=SHARD_TORCH_THREADS,
+            frame_slot_bytes=int(SHARD_FRAME_SLOT_MB * 1024 * 1024)
+        )
+        shard_supervisor.start(asyncio.get_running_loop())
+        logger.info(f"Stream sharding across {SHARD_WORKERS} worker processes")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the cameras, shard workers, inference pool and detection batcher"""
+    for camera_id in list(cameras):
+        await stop_camera(camera_id)
+    if shard_supervisor is not None:
+        shard_supervisor.shutdown()
+    if inference_pool is not None:
+        inference_pool.shutdown()
+    if detection_batcher is not None:
+        detection_batcher.stop()
 
 
 @app.get("/")
@@ -382,56 +998,288 @@ async def health_check():
         "status": "healthy",
         "detector_loaded": detector_model is not None,
         "pose_loaded": pose_model is not None,
-        "clip_loaded": clip_model is not None
+        "clip_loaded": clip_model is not None,
+        "model_backend": model_backend,
+        "clip_cached_profiles": clip_matcher.cache_size() if clip_matcher else 0,
+        "detection_batching": detection_batcher.stats() if detection_batcher else None,
+        "inference_pool": inference_pool.stats() if inference_pool else None,
+        "shards": shard_supervisor.stats() if shard_supervisor else None,
+        "frame_ring": shard_supervisor.ring_stats() if shard_supervisor else None,
+        "cameras": len(cameras),
+        "event_bus": event_bus.stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in the text exposition format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/process-frame")
 async def process_frame_endpoint(data: dict):
     """
     Process a single frame (base64 encoded image)
     """
     try:
-        # Decode base64 image
         image_data = data.get("image")
         if not image_data:
             raise HTTPException(status_code=400, detail="No image data provided")
         
-        # Remove data URL prefix if present
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Invalid image data")
-        
         # Parse missing persons
         missing_persons_data = data.get("missingPersons", [])
         missing_persons = [MissingPersonProfile(**mp) for mp in missing_persons_data]
         
-        # Process frame
-        matches = process_frame(frame, missing_persons)
+        # Decode and process on the inference pool
+        try:
+            matches = await inference_pool.run(decode_and_process, image_data, missing_persons)
+        except InferenceBusyError:
+            raise HTTPException(status_code=503, detail="Inference queue is full, retry later")
+        
+        if matches is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
         
         return {
             "matches": [match.dict() for match in matches],
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing frame: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/process-video")
+async def process_video_endpoint(data: dict, request: Request):
+    """
+    Search a local video file for missing persons
+    Streams NDJSON: match results (with frameIndex and videoTimestamp),
+    periodic {"type": "progress"} lines and a final {"type": "done"} line
+    """
+    path = data.get("path")
+    if not path:
+        raise HTTPException(status_code=400, detail="No video path provided")
+    
+    try:
+        missing_persons = [MissingPersonProfile(**mp) for mp in data.get("missingPersons", [])]
+        reader = VideoFrameReader(
+            resolve_video_path(path),
+            stride=int(data.get("stride") or 1),
+            start_seconds=float(data.get("startSeconds") or 0.0),
+            end_seconds=float(data["endSeconds"]) if data.get("endSeconds") is not None else None,
+            queue_size=VIDEO_JOB_QUEUE_SIZE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not video_job_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many video jobs running, retry later")
+    
+    try:
+        reader.start()
+    except ValueError as e:
+        video_job_slots.release()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    logger.info(f"Video job started: {path}")
+    
+    async def ndjson():
+        # The job is a sync generator, advanced on the thread pool one message at a time. The reader
+        # is released here once the job ends or the client is gone, not when the generator is collected.
+        messages = run_video_job(reader, missing_persons)
+        try:
+            while not await request.is_disconnected():
+                message = await run_in_threadpool(next, messages, None)
+                if message is None:
+                    break
+                yield json.dumps(message) + "\n"
+        except Exception as e:
+            logger.error(f"Video job failed: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+        finally:
+            messages.close()
+            reader.stop()
+            video_job_slots.release()
+            logger.info(f"Video job finished: {path}")
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.post("/api/cameras", status_code=201)
+async def add_camera(data: dict):
+    """
+    Start pulling a camera: an RTSP/HTTP URL, a device index or a local video
+    file ("loop": true replays files, for testing)
+    """
+    source = str(data.get("source") or "")
+    if not source:
+        raise HTTPException(status_code=400, detail="No camera source provided")
+    camera_id = str(data.get("id") or next(f"camera-{i}" for i in itertools.count(1) if f"camera-{i}" not in cameras))
+    if camera_id in cameras or camera_id in active_streams:
+        raise HTTPException(status_code=409, detail=f"Camera or stream {camera_id} already exists")
+    
+    try:
+        if "://" in source:
+            check_network_source(source)
+        elif not source.isdigit():
+            source = resolve_video_path(source)
+        missing_persons = [MissingPersonProfile(**mp) for mp in data.get("missingPersons", [])]
+        camera_config = {
+            "motionGate": data.get("motionGate", MOTION_GATE),
+            "detectImgsz": data.get("detectImgsz")
+        }
+        if shard_supervisor is not None:
+            # Tracker and motion gate live on the worker; the profile index is kept for re-opening
+            state = {"profiles": ProfileIndex(missing_persons)}
+        else:
+            state = create_stream_state(missing_persons, camera_config)
+        reader = CameraReader(
+            camera_id,
+            source,
+            max_fps=float(data.get("maxFps") or CAMERA_MAX_FPS),
+            loop=bool(data.get("loop", False)),
+            max_reconnect_delay=CAMERA_RECONNECT_MAX_DELAY
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if shard_supervisor is None:
+        await warm_clip_cache_async(missing_persons)
+    else:
+        state["worker"] = shard_supervisor.open_stream(camera_id, state["profiles"], camera_config)
+    
+    cameras[camera_id] = {
+        **state,
+        "name": data.get("name") or camera_id,
+        "location": data.get("location"),
+        "zone": data.get("zone"),
+        "reader": reader,
+        "dedup": MatchDeduplicator(ttl_seconds=MATCH_DEDUP_TTL, max_entries=MATCH_DEDUP_MAX_ENTRIES),
+        "subscribers": set(),
+        "processed": 0,
+        "processInterval": None,  # Moving average of seconds between processed frames
+        "latencyMs": None,
+        "rejectedBusy": 0,
+        "errors": 0,
+        "stateStats": {}
+    }
+    reader.start(asyncio.get_running_loop())
+    cameras[camera_id]["task"] = asyncio.create_task(process_camera_frames(camera_id))
+    logger.info(f"Camera {camera_id} added ({redact_source(source)})")
+    return camera_info(camera_id)
+
+
+@app.get("/api/cameras")
+async def list_cameras():
+    return {"cameras": [camera_info(camera_id) for camera_id in list(cameras)]}
+
+
+@app.get("/api/cameras/{camera_id}")
+async def get_camera(camera_id: str):
+    if camera_id not in cameras:
+        raise HTTPException(status_code=404, detail=f"Camera {camera_id} not found")
+    return camera_info(camera_id)
+
+
+@app.post("/api/cameras/{camera_id}/profiles")
+async def update_camera_profiles(camera_id: str, data: dict):
+    """Same body as the update_profiles stream message: "replace" (default), "upsert" or "remove" by id"""
+    if camera_id not in cameras:
+        raise HTTPException(status_code=404, detail=f"Camera {camera_id} not found")
+    mode = data.get("mode", "replace")
+    removed_ids = data.get("ids", []) if mode == "remove" else []
+    missing_persons = [] if mode == "remove" else [MissingPersonProfile(**mp) for mp in data.get("missingPersons", [])]
+    if missing_persons and shard_supervisor is None:
+        await warm_clip_cache_async(missing_persons)
+    apply_profile_update(cameras[camera_id]["profiles"], mode, missing_persons, removed_ids)
+    if shard_supervisor is not None:
+        shard_supervisor.update_profiles(camera_id, mode, missing_persons, removed_ids)
+    return camera_info(camera_id)
+
+
+@app.delete("/api/cameras/{camera_id}")
+async def delete_camera(camera_id: str):
+    if camera_id not in cameras:
+        raise HTTPException(status_code=404, detail=f"Camera {camera_id} not found")
+    await stop_camera(camera_id)
+    return {"id": camera_id, "deleted": True}
+
+
+async def process_stream_frames(websocket: WebSocket, stream_id: str, ingestion: StreamIngestion):
+    """
+    Processing side of a video stream: always takes the newest buffered frame,
+    sends matches back and periodically reports ingestion stats
+    """
+    stream = active_streams[stream_id]
+    last_stats = time.perf_counter()
+    state_stats = {}
+    last_header = None
+    
+    while True:
+        (kind, payload), received_at = await ingestion.next()
+        started_at = time.perf_counter()
+        
+        # Decode and process on the stream's shard worker, or on the local inference pool
+        try:
+            header = parse_frame_message(payload)[0] if kind == "binary" else None
+            if shard_supervisor is not None:
+                matches, state_stats = await shard_supervisor.process(stream_id, kind, payload)
+                matches = [MatchResult(**match) for match in matches] if matches is not None else None
+            else:
+                matches = await inference_pool.run(process_stream_item, stream, kind, payload)
+                state_stats = stream_state_stats(stream)
+        except InferenceBusyError:
+            ingestion.busy()
+            await websocket.send_json({"type": "busy", "detail": "Inference queue is full, frame dropped"})
+            continue
+        except FrameProtocolError as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            continue
+        
+        ingestion.done(received_at, started_at)
+        if header is not None:
+            last_header = header
+        
+        # Send matches back and publish them (deduplicated per profile and track within the TTL window)
+        for match in matches or []:
+            if stream["dedup"].should_send(match.missingPersonId, match_subject(match)):
+                if header is not None:
+                    match.frameId = header.frame_id
+                    match.captureTimestamp = header.timestamp_ms
+                    match.cameraId = header.camera_id or None
+                match.streamId = stream_id
+                match.zone = stream["zone"]
+                message = jsonable_encoder(match)
+                await websocket.send_json(message)
+                event_bus.publish(message)
+        
+        # Report received / processed / dropped counts
+        now = time.perf_counter()
+        if now - last_stats >= STREAM_STATS_INTERVAL:
+            last_stats = now
+            await websocket.send_json({
+                "type": "stats",
+                "streamId": stream_id,
+                **ingestion.stats(),
+                **(state_stats or {}),
+                **({"lastFrameId": last_header.frame_id, "lastCaptureTimestamp": last_header.timestamp_ms}
+                   if last_header is not None else {}),
+                "notificationsSent": stream["dedup"].sent,
+                "notificationsSuppressed": stream["dedup"].suppressed
+            })
+
+
 @app.websocket("/ws/video-stream")
 async def websocket_video_stream(websocket: WebSocket):
     """
     WebSocket endpoint for real-time video stream processing
+    Receiving and processing run concurrently; only the newest frame waits for inference
     """
     await websocket.accept()
     stream_id = None
+    processor = None
     
     try:
         # Receive stream configuration
@@ -440,46 +1288,71 @@ async def websocket_video_stream(websocket: WebSocket):
         missing_persons_data = config.get("missingPersons", [])
         missing_persons = [MissingPersonProfile(**mp) for mp in missing_persons_data]
         
+        if shard_supervisor is None:
+            await warm_clip_cache_async(missing_persons)  # Shard workers warm their own cache
+        
+        ingestion = StreamIngestion(
+            target_latency_ms=float(config.get("targetLatencyMs") or STREAM_TARGET_LATENCY_MS),
+            max_fps=float(config.get("maxFps") or STREAM_MAX_FPS)
+        )
+        
+        stream_config = {
+            "motionGate": config.get("motionGate", MOTION_GATE),
+            "decodeScale": config.get("decodeScale"),
+            "detectImgsz": config.get("detectImgsz")
+        }
+        if shard_supervisor is not None:
+            # Tracker and motion gate live on the worker; the profile index is kept for re-opening
+            stream = {"profiles": ProfileIndex(missing_persons)}
+            stream["worker"] = shard_supervisor.open_stream(stream_id, stream["profiles"], stream_config)
+        else:
+            stream = create_stream_state(missing_persons, stream_config)
+        
         active_streams[stream_id] = {
-            "missing_persons": missing_persons,
-            "last_match_time": {}
+            **stream,
+            "zone": config.get("zone"),
+            "dedup": MatchDeduplicator(ttl_seconds=MATCH_DEDUP_TTL, max_entries=MATCH_DEDUP_MAX_ENTRIES),
+            "ingestion": ingestion
         }
         
         logger.info(f"Video stream {stream_id} connected")
         
+        processor = asyncio.create_task(process_stream_frames(websocket, stream_id, ingestion))
+        
         while True:
-            # Receive frame data
-            data = await websocket.receive_json()
+            # Receive frame data: binary frames or JSON messages
+            receive = asyncio.ensure_future(websocket.receive())
+            done, _ = await asyncio.wait({receive, processor}, return_when=asyncio.FIRST_COMPLETED)
+            if processor in done:
+                receive.cancel()
+                processor.result()  # Surface processing errors
+                break
+            
+            message = receive.result()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            if message.get("bytes") is not None:
+                ingestion.offer(("binary", message["bytes"]))
+                continue
+            
+            data = json.loads(message["text"])
             
             if data.get("type") == "frame":
-                # Decode image
-                image_data = data.get("image")
-                if "," in image_data:
-                    image_data = image_data.split(",")[1]
-                
-                image_bytes = base64.b64decode(image_data)
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                if frame is not None:
-                    # Process frame
-                    matches = process_frame(frame, missing_persons)
-                    
-                    # Send matches back (throttle to avoid spam)
-                    for match in matches:
-                        match_id = f"{match.missingPersonId}_{match.personId}"
-                        last_time = active_streams[stream_id]["last_match_time"].get(match_id, 0)
-                        
-                        # Only send if not sent in last 5 seconds
-                        if (datetime.now().timestamp() - last_time) > 5:
-                            await websocket.send_json(match.dict())
-                            active_streams[stream_id]["last_match_time"][match_id] = datetime.now().timestamp()
+                ingestion.offer(("base64", data.get("image")))
             
             elif data.get("type") == "update_profiles":
-                # Update missing persons list
-                missing_persons_data = data.get("missingPersons", [])
-                missing_persons = [MissingPersonProfile(**mp) for mp in missing_persons_data]
-                active_streams[stream_id]["missing_persons"] = missing_persons
+                # Update missing persons: "replace" the list (default), "upsert" or "remove" by id
+                mode = data.get("mode", "replace")
+                removed_ids = data.get("ids", []) if mode == "remove" else []
+                missing_persons = [] if mode == "remove" else [
+                    MissingPersonProfile(**mp) for mp in data.get("missingPersons", [])
+                ]
+                if missing_persons and shard_supervisor is None:
+                    await warm_clip_cache_async(missing_persons)
+                apply_profile_update(active_streams[stream_id]["profiles"], mode, missing_persons, removed_ids)
+                if shard_supervisor is not None:
+                    shard_supervisor.update_profiles(stream_id, mode, missing_persons, removed_ids)
             
             elif data.get("type") == "stop":
                 break
@@ -489,9 +1362,104 @@ async def websocket_video_stream(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
+        if processor is not None:
+            processor.cancel()
         if stream_id and stream_id in active_streams:
             del active_streams[stream_id]
+            if shard_supervisor is not None:
+                shard_supervisor.close_stream(stream_id)
+
+
+
+async def serve_subscription(websocket: WebSocket, subscription: Subscription, stats=None):
+    """
+    Forward a subscription's events to a WebSocket until either side closes
+    `stats` returns a periodic stats message (or None to skip); a subscriber
+    dropped for falling behind gets an error message before the close.
+    """
+    receive = asyncio.ensure_future(websocket.receive())
+    last_stats = time.perf_counter()
+    try:
+        while True:
+            get = asyncio.ensure_future(subscription.get())
+            timeout = max(0.0, last_stats + STREAM_STATS_INTERVAL - time.perf_counter()) if stats else None
+            done, _ = await asyncio.wait({receive, get}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            
+            if get in done:
+                message = get.result()
+                if message is None:  # Closed by the server
+                    if subscription.dropped:
+                        await websocket.send_json({"type": "error", "detail": "Subscriber fell behind, disconnected"})
+                    await websocket.close()
+                    break
+                await websocket.send_json(message)
+            else:
+                get.cancel()
+            
+            if receive in done:
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                receive = asyncio.ensure_future(websocket.receive())  # Clients have nothing to say; ignore
+            
+            now = time.perf_counter()
+            if stats and now - last_stats >= STREAM_STATS_INTERVAL:
+                last_stats = now
+                message = stats()
+                if message is not None:
+                    await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        event_bus.unsubscribe(subscription)
+
+
+def _query_list(websocket: WebSocket, name: str) -> Optional[List[str]]:
+    value = websocket.query_params.get(name)
+    return [item for item in value.split(",") if item] if value else None
+
+
+@app.websocket("/ws/matches")
+async def websocket_matches(websocket: WebSocket):
+    """
+    Subscribe to match results from every live stream and camera
+    Optional comma-separated filters: ?streams=a,b&zones=north&profiles=MP-001
+    """
+    await websocket.accept()
+    subscription = event_bus.subscribe(
+        streamId=_query_list(websocket, "streams"),
+        zone=_query_list(websocket, "zones"),
+        missingPersonId=_query_list(websocket, "profiles")
+    )
+    await serve_subscription(websocket, subscription)
+
 
+@app.websocket("/ws/cameras/{camera_id}")
+async def websocket_camera_matches(websocket: WebSocket, camera_id: str):
+    """
+    Subscribe to one camera's match results
+    Sends match results and periodic {"type": "stats"} messages; clients never send frames
+    """
+    await websocket.accept()
+    camera = cameras.get(camera_id)
+    if camera is None:
+        await websocket.send_json({"type": "error", "detail": f"Camera {camera_id} not found"})
+        await websocket.close()
+        return
+    
+    subscription = event_bus.subscribe(
+        streamId=[camera_id],
+        missingPersonId=_query_list(websocket, "profiles")
+    )
+    camera["subscribers"].add(subscription)
+    try:
+        await serve_subscription(
+            websocket,
+            subscription,
+            stats=lambda: {"type": "stats", **camera_info(camera_id)} if camera_id in cameras else None
+        )
+    finally:
+        camera["subscribers"].discard(subscription)
 
 if __name__ == "__main__":
     import uvicorn
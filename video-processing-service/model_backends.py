@@ -0,0 +1,59 @@
+"""
+YOLO inference backends
+Loads the detection and pose models on PyTorch or from exported ONNX Runtime /
+OpenVINO graphs, optionally INT8-quantized. Every backend is wrapped in an
+ultralytics YOLO object, so callers see the same API and results.
+"""
+
+import os
+from typing import Dict, Tuple
+
+from ultralytics import YOLO
+
+MODEL_BACKENDS = ("torch", "onnx", "openvino")
+MODEL_PRECISIONS = ("fp32", "int8")
+
+
+def model_path(name: str, backend: str = "torch", precision: str = "fp32", model_dir: str = "models") -> str:
+    """
+    Where a model lives for a backend
+    torch loads (and downloads) `<name>.pt`; exported graphs are read from
+    `model_dir`, as written by export_models.py
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}', expected one of {MODEL_BACKENDS}")
+    if precision not in MODEL_PRECISIONS:
+        raise ValueError(f"Unknown model precision '{precision}', expected one of {MODEL_PRECISIONS}")
+
+    if backend == "torch":
+        if precision == "int8":
+            raise ValueError("INT8 precision needs an exported backend (onnx or openvino)")
+        return f"{name}.pt"
+    suffix = "-int8" if precision == "int8" else ""
+    if backend == "onnx":
+        return os.path.join(model_dir, f"{name}{suffix}.onnx")
+    return os.path.join(model_dir, f"{name}{suffix}_openvino_model")
+
+
+def load_yolo(
+    name: str,
+    task: str,
+    backend: str = "torch",
+    precision: str = "fp32",
+    model_dir: str = "models"
+) -> Tuple[YOLO, Dict]:
+    """
+    Load one YOLO model on the requested backend
+    Returns the model and a description of what was loaded. Raises
+    FileNotFoundError when an exported graph has not been created yet.
+    """
+    path = model_path(name, backend, precision, model_dir)
+    if backend != "torch" and not os.path.exists(path):
+        int8_flag = " --int8" if precision == "int8" else ""
+        raise FileNotFoundError(
+            f"{path} not found. Export it with: python export_models.py --backend {backend}{int8_flag}"
+        )
+
+    # Exported graphs do not carry enough metadata for ultralytics to infer the task
+    model = YOLO(path) if backend == "torch" else YOLO(path, task=task)
+    return model, {"backend": backend, "precision": precision, "path": path}
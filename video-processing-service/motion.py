@@ -0,0 +1,110 @@
+"""
+Motion gating for live streams
+Cheap frame differencing on a downscaled frame decides whether a frame needs
+detection at all, and if so which part of it
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class MotionDecision(NamedTuple):
+    run: bool  # False: nothing changed, skip inference
+    region: Optional[Tuple[int, int, int, int]]  # (x1, y1, x2, y2) to detect in; None = full frame
+
+
+class MotionGate:
+    """
+    Per-stream background model over a small greyscale copy of each frame
+
+    Pixels that differ from the running-average background by more than
+    `threshold` count as motion. Frames where less than `min_area` of the
+    image changed are skipped; otherwise the detector only sees the padded
+    bounding box of the changed pixels, unless that box covers more than
+    `max_region` of the frame. Every `refresh_interval` frames the full
+    frame is processed anyway so people standing still are re-checked.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        threshold: int = 25,
+        min_area: float = 0.002,
+        max_region: float = 0.6,
+        padding: float = 0.1,
+        learning_rate: float = 0.05,
+        refresh_interval: int = 30
+    ):
+        self.width = width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.max_region = max_region
+        self.padding = padding
+        self.learning_rate = learning_rate
+        self.refresh_interval = max(1, refresh_interval)
+        self._background: Optional[np.ndarray] = None
+        self._since_full = 0
+        self._kernel = np.ones((3, 3), dtype=np.uint8)
+
+        self.frames = 0
+        self.skipped = 0
+        self.cropped = 0
+
+    def _small(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        height = max(1, round(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def check(self, frame: np.ndarray) -> MotionDecision:
+        """Update the background with a frame and decide what to run on it"""
+        self.frames += 1
+        small = self._small(frame)
+
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small.astype(np.float32)
+            self._since_full = 0
+            return MotionDecision(True, None)
+
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self._background))
+        cv2.accumulateWeighted(small, self._background, self.learning_rate)
+        mask = cv2.dilate((diff > self.threshold).astype(np.uint8), self._kernel)
+
+        self._since_full += 1
+        if self._since_full >= self.refresh_interval:
+            self._since_full = 0
+            return MotionDecision(True, None)
+
+        if np.count_nonzero(mask) < self.min_area * mask.size:
+            self.skipped += 1
+            return MotionDecision(False, None)
+
+        # Bounding box of the changed pixels, padded and scaled back to the frame
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        small_h, small_w = mask.shape
+        pad_y = self.padding * small_h
+        pad_x = self.padding * small_w
+        y1 = max(0.0, rows[0] - pad_y) / small_h
+        y2 = min(small_h, rows[-1] + 1 + pad_y) / small_h
+        x1 = max(0.0, cols[0] - pad_x) / small_w
+        x2 = min(small_w, cols[-1] + 1 + pad_x) / small_w
+
+        if (x2 - x1) * (y2 - y1) > self.max_region:
+            self._since_full = 0
+            return MotionDecision(True, None)
+
+        h, w = frame.shape[:2]
+        self.cropped += 1
+        return MotionDecision(True, (int(x1 * w), int(y1 * h), int(np.ceil(x2 * w)), int(np.ceil(y2 * h))))
+
+    def stats(self) -> Dict:
+        return {
+            "motionSkipped": self.skipped,
+            "motionCropped": self.cropped,
+            "motionSkipRate": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+        }
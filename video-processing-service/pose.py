@@ -0,0 +1,133 @@
+"""
+Pose estimation helpers
+Runs the pose model once per frame (or once over all person crops) and maps
+keypoints back onto detector boxes
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# "crop":  one pose inference per person crop (original behaviour)
+# "batch": one pose inference over a batch of all person crops
+# "frame": one pose inference over the whole frame, matched to boxes by IoU
+POSE_MODES = ("crop", "batch", "frame")
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of [x1, y1, x2, y2] boxes
+    Returns an (A, B) matrix
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def match_boxes(boxes_a: np.ndarray, boxes_b: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    """
+    Greedy one-to-one matching of boxes_a to boxes_b by highest IoU
+    Returns, for each box in boxes_a, the index of its match in boxes_b or -1
+    """
+    assignment = np.full(len(boxes_a), -1, dtype=np.int64)
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return assignment
+
+    iou = box_iou(boxes_a, boxes_b)
+    pairs = np.argwhere(iou >= iou_threshold)
+    if len(pairs) == 0:
+        return assignment
+
+    # Best pairs first; each box may be used once
+    order = np.argsort(-iou[pairs[:, 0], pairs[:, 1]], kind="stable")
+    used_b = set()
+    for a, b in pairs[order]:
+        if assignment[a] == -1 and b not in used_b:
+            assignment[a] = b
+            used_b.add(b)
+
+    return assignment
+
+
+def _first_person_keypoints(result) -> Optional[np.ndarray]:
+    """Flattened [x, y, conf] * 17 keypoints of the first person in a pose result"""
+    keypoints = result.keypoints
+    if keypoints is None or len(keypoints.data) == 0:
+        return None
+    return keypoints.data[0].cpu().numpy().flatten()
+
+
+def _poses_per_crop(pose_model, crops: List[np.ndarray], batched: bool) -> List[Optional[np.ndarray]]:
+    if not crops:
+        return []
+
+    if batched:
+        results = pose_model(crops, verbose=False)
+    else:
+        results = [pose_model(crop, verbose=False)[0] for crop in crops]
+
+    return [_first_person_keypoints(result) for result in results]
+
+
+def estimate_poses(
+    pose_model,
+    frame: np.ndarray,
+    boxes: np.ndarray,
+    mode: str = "frame",
+    iou_threshold: float = 0.5
+) -> List[Optional[np.ndarray]]:
+    """
+    Estimate keypoints for every detector box in a frame
+    Returns flattened keypoints per box in that box's crop coordinates
+    (so crop_torso/crop_legs work unchanged), or None where no pose was found
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    if pose_model is None or len(boxes) == 0:
+        return [None] * len(boxes)
+
+    crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+
+    if mode == "crop":
+        return _poses_per_crop(pose_model, crops, batched=False)
+    if mode == "batch":
+        return _poses_per_crop(pose_model, crops, batched=True)
+    if mode != "frame":
+        raise ValueError(f"Unknown pose mode: {mode}")
+
+    # Single pass over the whole frame
+    result = pose_model(frame, verbose=False)[0]
+    poses: List[Optional[np.ndarray]] = [None] * len(boxes)
+
+    if result.boxes is not None and result.keypoints is not None and len(result.boxes) > 0:
+        pose_boxes = result.boxes.xyxy.cpu().numpy()
+        pose_keypoints = result.keypoints.data.cpu().numpy()
+        assignment = match_boxes(boxes, pose_boxes, iou_threshold)
+
+        for i, pose_index in enumerate(assignment):
+            if pose_index < 0:
+                continue
+            keypoints = pose_keypoints[pose_index].copy()
+            # Shift into the detector box's crop coordinates
+            keypoints[:, 0] -= boxes[i, 0]
+            keypoints[:, 1] -= boxes[i, 1]
+            poses[i] = keypoints.flatten()
+
+    # Persons the frame-level pass missed get one batched crop pass
+    missed = [i for i, keypoints in enumerate(poses) if keypoints is None]
+    if missed:
+        for i, keypoints in zip(missed, _poses_per_crop(pose_model, [crops[i] for i in missed], batched=True)):
+            poses[i] = keypoints
+
+    return poses
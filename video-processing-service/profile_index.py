@@ -0,0 +1,168 @@
+"""
+Missing-person profile index
+Compiles profiles into integer colour codes with an inverted index so a frame
+is scored as one detections x profiles array operation
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Score weights of the top colour, bottom colour and CLIP description factors
+TOP_WEIGHT = 0.4
+BOTTOM_WEIGHT = 0.3
+CLIP_WEIGHT = 0.3
+
+NO_COLOR = -1  # attribute missing: factor not compared
+OTHER_COLOR = -2  # detected colour that no profile uses: compared, never equal
+
+
+class CompiledProfiles:
+    """
+    Immutable, array-based snapshot of a ProfileIndex
+
+    Colours are lower-cased and mapped to integer codes. Inverted indexes map
+    each top/bottom colour code to the profiles wearing it.
+    """
+
+    def __init__(self, profiles: List, version: int):
+        self.version = version
+        self.profiles = profiles
+        self.ids = [profile.id for profile in profiles]
+
+        self.vocab: Dict[str, int] = {}
+        self.top = self._encode_profiles([profile.topColor for profile in profiles])
+        self.bottom = self._encode_profiles([profile.bottomColor for profile in profiles])
+        self.has_description = np.array([bool(profile.description) for profile in profiles], dtype=bool)
+
+        self.top_postings, self.top_wildcards = self._postings(self.top)
+        self.bottom_postings, self.bottom_wildcards = self._postings(self.bottom)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def _encode_profiles(self, colors: Sequence[Optional[str]]) -> np.ndarray:
+        codes = np.full(len(colors), NO_COLOR, dtype=np.int32)
+        for i, color in enumerate(colors):
+            if color:
+                codes[i] = self.vocab.setdefault(color.lower(), len(self.vocab))
+        return codes
+
+    @staticmethod
+    def _postings(codes: np.ndarray):
+        postings = {int(code): np.flatnonzero(codes == code) for code in np.unique(codes[codes >= 0])}
+        return postings, np.flatnonzero(codes == NO_COLOR)
+
+    def encode(self, colors: Sequence[Optional[str]]) -> np.ndarray:
+        """Integer codes for detected colour names"""
+        return np.array(
+            [self.vocab.get(color.lower(), OTHER_COLOR) if color else NO_COLOR for color in colors],
+            dtype=np.int32
+        )
+
+    def _column_candidates(self, detected: np.ndarray, postings: Dict[int, np.ndarray], wildcards: np.ndarray) -> np.ndarray:
+        # A detection without this colour cannot rule any profile out
+        if np.any(detected == NO_COLOR):
+            return np.arange(len(self.profiles))
+        hits = [postings[code] for code in np.unique(detected) if code in postings]
+        return np.unique(np.concatenate(hits + [wildcards]))
+
+    def candidates(self, detected_top: np.ndarray, detected_bottom: np.ndarray) -> np.ndarray:
+        """
+        Profiles that can still reach the match threshold for some detection
+        Any compared colour that differs caps the score at 0.7 or below,
+        so only profiles whose colours agree with (or are missing from) a
+        detection are kept.
+        """
+        if len(self.profiles) == 0 or len(detected_top) == 0:
+            return np.empty(0, dtype=np.int64)
+        top = self._column_candidates(detected_top, self.top_postings, self.top_wildcards)
+        bottom = self._column_candidates(detected_bottom, self.bottom_postings, self.bottom_wildcards)
+        return np.intersect1d(top, bottom, assume_unique=True)
+
+    def score(
+        self,
+        detected_top: np.ndarray,
+        detected_bottom: np.ndarray,
+        columns: np.ndarray,
+        clip_scores: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Match confidence for every detection against the profiles in `columns`
+        clip_scores is an optional (detections, columns) matrix with NaN
+        where no CLIP score is available. Each factor that can be compared adds
+        its weight to the total; the score is the weight earned over that total.
+        """
+        top = self.top[columns]
+        bottom = self.bottom[columns]
+
+        top_compared = (detected_top[:, None] != NO_COLOR) & (top[None, :] != NO_COLOR)
+        bottom_compared = (detected_bottom[:, None] != NO_COLOR) & (bottom[None, :] != NO_COLOR)
+
+        score = TOP_WEIGHT * (top_compared & (detected_top[:, None] == top[None, :]))
+        score = score + BOTTOM_WEIGHT * (bottom_compared & (detected_bottom[:, None] == bottom[None, :]))
+        factors = TOP_WEIGHT * top_compared + BOTTOM_WEIGHT * bottom_compared
+
+        if clip_scores is not None:
+            clip_available = ~np.isnan(clip_scores)
+            score = score + CLIP_WEIGHT * np.where(clip_available, clip_scores, 0.0)
+            factors = factors + CLIP_WEIGHT * clip_available
+
+        return np.where(factors > 0, np.minimum(1.0, score / np.where(factors > 0, factors, 1.0)), 0.0)
+
+
+class ProfileIndex:
+    """
+    Mutable set of missing-person profiles keyed by id
+
+    Profiles can be replaced wholesale, upserted or removed one by one.
+    `compiled()` returns a cached CompiledProfiles snapshot, rebuilt only
+    after a change, so inference threads never see a half-applied update.
+    """
+
+    def __init__(self, profiles: Iterable = ()):
+        self._profiles: Dict[str, object] = {profile.id: profile for profile in profiles}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._compiled: Optional[CompiledProfiles] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._profiles)
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def profiles(self) -> List:
+        with self._lock:
+            return list(self._profiles.values())
+
+    def replace(self, profiles: Iterable):
+        with self._lock:
+            self._profiles = {profile.id: profile for profile in profiles}
+            self._changed()
+
+    def upsert(self, profiles: Iterable):
+        with self._lock:
+            for profile in profiles:
+                self._profiles[profile.id] = profile
+            self._changed()
+
+    def remove(self, profile_ids: Iterable[str]):
+        with self._lock:
+            for profile_id in profile_ids:
+                self._profiles.pop(profile_id, None)
+            self._changed()
+
+    def _changed(self):
+        self._version += 1
+        self._compiled = None
+
+    def compiled(self) -> CompiledProfiles:
+        with self._lock:
+            if self._compiled is None:
+                self._compiled = CompiledProfiles(list(self._profiles.values()), self._version)
+            return self._compiled
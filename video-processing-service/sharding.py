@@ -0,0 +1,371 @@
+"""
+Multi-process stream sharding
+A supervisor starts N inference worker processes, each with its own models,
+and pins every live stream to one of them. Frames go to workers and results
+come back over multiprocessing queues, so streams use all CPU cores instead
+of sharing one GIL. Decoded frames (cameras) travel through a shared-memory
+frame ring; only the slot index goes over the queue.
+"""
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from frame_protocol import FrameProtocolError
+from inference_pool import InferenceBusyError
+from shm_ring import FrameSlot, SharedFrameRing
+
+logger = logging.getLogger(__name__)
+
+UTILIZATION_WINDOW = 10.0  # seconds
+WORKER_CHECK_INTERVAL = 1.0  # seconds between worker liveness checks
+
+
+def _profile_dicts(profiles: List) -> List[Dict]:
+    # Plain dicts, so workers never unpickle the parent's model classes
+    return [profile.dict() for profile in profiles]
+
+
+def _worker_main(worker_id: int, requests, results, torch_threads: int, ring_spec: Optional[Tuple[str, int, int]]):
+    """
+    Worker process: load the models once, keep per-stream state, process
+    frames in arrival order
+    """
+    if torch_threads > 0:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+    import main  # Deferred so the heavy imports and model loading happen in the child only
+
+    main.load_models()
+    ring = SharedFrameRing.attach(*ring_spec) if ring_spec is not None else None
+    streams: Dict[str, Dict] = {}
+    results.put(("ready", worker_id, os.getpid()))
+
+    while True:
+        message = requests.get()
+        op = message[0]
+
+        if op == "stop":
+            if ring is not None:
+                ring.close()
+            break
+
+        if op == "open":
+            _, stream_id, profiles, config = message
+            missing_persons = [main.MissingPersonProfile(**profile) for profile in profiles]
+            main.warm_clip_cache(missing_persons)
+            streams[stream_id] = main.create_stream_state(missing_persons, config)
+
+        elif op == "close":
+            streams.pop(message[1], None)
+
+        elif op == "profiles":
+            _, stream_id, mode, profiles, removed_ids = message
+            missing_persons = [main.MissingPersonProfile(**profile) for profile in profiles]
+            if stream_id in streams:
+                main.warm_clip_cache(missing_persons)
+                main.apply_profile_update(streams[stream_id]["profiles"], mode, missing_persons, removed_ids)
+
+        elif op == "frame":
+            _, request_id, stream_id, kind, payload = message
+            started = time.perf_counter()
+            matches, stats, error = None, None, None
+            try:
+                state = streams.get(stream_id)
+                if state is None:
+                    raise RuntimeError(f"Stream {stream_id} is not open on worker {worker_id}")
+                if kind == "shm":
+                    # Read the frame in place; the slot is reused once the result is sent
+                    kind, payload = "decoded", ring.view(FrameSlot(*payload))
+                found = main.process_stream_item(state, kind, payload)
+                matches = [match.dict() for match in found] if found is not None else None
+                stats = main.stream_state_stats(state)
+            except Exception as e:
+                error = (type(e).__name__, str(e))
+            payload = None  # Drop any ring view before the parent reuses the slot
+            results.put(("result", worker_id, request_id, matches, stats, error, time.perf_counter() - started))
+
+
+class _Worker:
+    """Supervisor-side bookkeeping for one worker process"""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process: Optional[multiprocessing.Process] = None
+        self.requests = None
+        self.ready = False
+        self.pid: Optional[int] = None
+        self.streams = set()
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.busy = deque()  # (finished_at, busy seconds) within the utilization window
+
+
+class ShardSupervisor:
+    """
+    Runs live-stream inference on `workers` processes
+
+    Each stream is assigned to the worker with the fewest streams (then the
+    fewest frames in flight) and stays there, so its tracker and motion
+    state live in one process. Each worker accepts at most
+    `max_in_flight` frames at a time; beyond that `process` raises
+    InferenceBusyError, like the in-process pool. A worker that dies is
+    restarted and its streams are re-opened with their current profiles.
+
+    Decoded frames (kind "decoded") are copied into a SharedFrameRing with
+    one `frame_slot_bytes` slot per frame that can be in flight, so a slot
+    is always free; larger frames fall back to pickling.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_in_flight: int = 2,
+        torch_threads: int = 1,
+        frame_slot_bytes: int = 0,
+        start_method: str = "spawn"
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.torch_threads = torch_threads
+        self.frame_slot_bytes = frame_slot_bytes
+        self._ring: Optional[SharedFrameRing] = None
+        self.pickled_frames = 0  # Decoded frames sent pickled: too large for a slot, or no slot free
+        self._context = multiprocessing.get_context(start_method)
+        self._results = self._context.Queue()
+        self._workers = [_Worker(i) for i in range(max(1, workers))]
+        self._streams: Dict[str, Dict[str, Any]] = {}  # stream id -> worker, profiles, config
+        self._pending: Dict[int, Tuple[int, asyncio.Future, Optional[FrameSlot]]] = {}
+        self._request_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        """Spawn the worker processes; results are delivered on `loop`"""
+        self._loop = loop
+        if self.frame_slot_bytes > 0:
+            self._ring = SharedFrameRing.create(len(self._workers) * self.max_in_flight, self.frame_slot_bytes)
+        for worker in self._workers:
+            worker.requests = self._context.Queue()
+            self._spawn(worker)
+        self._listener = threading.Thread(target=self._listen, name="shard-results", daemon=True)
+        self._listener.start()
+
+    def _spawn(self, worker: _Worker):
+        """Start a process reading worker.requests"""
+        worker.ready = False
+        ring_spec = (self._ring.name, self._ring.slots, self._ring.slot_bytes) if self._ring is not None else None
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.requests, self._results, self.torch_threads, ring_spec),
+            name=f"shard-worker-{worker.worker_id}",
+            daemon=True
+        )
+        worker.process.start()
+        logger.info(f"Shard worker {worker.worker_id} started (pid {worker.process.pid})")
+
+    def open_stream(self, stream_id: str, profiles, config: Dict) -> int:
+        """Pin a stream to the least-loaded worker; returns the worker id"""
+        with self._lock:
+            existing = self._streams.get(stream_id)
+            if existing is not None:
+                worker = self._workers[existing["worker"]]
+            else:
+                worker = min(self._workers, key=lambda w: (len(w.streams), w.in_flight, w.worker_id))
+            worker.streams.add(stream_id)
+            self._streams[stream_id] = {"worker": worker.worker_id, "profiles": profiles, "config": config}
+        worker.requests.put(("open", stream_id, _profile_dicts(profiles.profiles()), config))
+        return worker.worker_id
+
+    def update_profiles(self, stream_id: str, mode: str, missing_persons: List, removed_ids: List[str]):
+        with self._lock:
+            stream = self._streams.get(stream_id)
+        if stream is not None:
+            message = ("profiles", stream_id, mode, _profile_dicts(missing_persons), removed_ids)
+            self._workers[stream["worker"]].requests.put(message)
+
+    def close_stream(self, stream_id: str):
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+            if stream is None:
+                return
+            worker = self._workers[stream["worker"]]
+            worker.streams.discard(stream_id)
+        worker.requests.put(("close", stream_id))
+
+    async def process(self, stream_id: str, kind: str, payload) -> Tuple[Optional[List[Dict]], Dict]:
+        """
+        Process one frame on the stream's worker
+        `kind` is "binary", "base64" (encoded frames) or "decoded" (a BGR
+        array). Returns (match dicts or None for an invalid image, stream stats)
+        """
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                raise RuntimeError(f"Stream {stream_id} is not open")
+            worker = self._workers[stream["worker"]]
+            if worker.in_flight >= self.max_in_flight:
+                raise InferenceBusyError(f"Shard worker {worker.worker_id} is busy")
+            worker.in_flight += 1
+            request_id = next(self._request_ids)
+            # Registered with the in_flight increment, so a restart from here on fails this frame too
+            self._pending[request_id] = (worker.worker_id, future, None)
+
+        slot = None
+        if kind == "decoded" and self._ring is not None:
+            # One slot per in-flight frame, but a restart resets in_flight while slots are held
+            slot = self._ring.write(payload) if self._ring.fits(payload) else None
+            if slot is not None:
+                kind, payload = "shm", tuple(slot)
+            else:
+                self.pickled_frames += 1
+
+        with self._lock:
+            sending = request_id in self._pending
+            if sending:
+                self._pending[request_id] = (worker.worker_id, future, slot)
+                requests = worker.requests  # The current process's queue, if it was restarted
+        if sending:
+            requests.put(("frame", request_id, stream_id, kind, payload))
+        else:
+            self._release(slot)  # The worker was restarted meanwhile and the future already failed
+        matches, stats, error = await future
+
+        if error is not None:
+            name, detail = error
+            if name == "FrameProtocolError":
+                raise FrameProtocolError(detail)
+            raise RuntimeError(f"Shard worker {worker.worker_id} failed: {name}: {detail}")
+        return matches, stats
+
+    def _resolve(self, future: asyncio.Future, value):
+        if not future.done():
+            future.set_result(value)
+
+    def _listen(self):
+        """Deliver worker results to the event loop and restart dead workers"""
+        last_check = time.monotonic()
+        while not self._stopping.is_set():
+            # Liveness runs on a clock: under load the results queue is never empty
+            now = time.monotonic()
+            if now - last_check >= WORKER_CHECK_INTERVAL:
+                last_check = now
+                self._check_workers()
+
+            try:
+                message = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+
+            if message[0] == "ready":
+                _, worker_id, pid = message
+                self._workers[worker_id].ready = True
+                self._workers[worker_id].pid = pid
+                logger.info(f"Shard worker {worker_id} ready")
+                continue
+
+            _, worker_id, request_id, matches, stats, error, busy_seconds = message
+            worker = self._workers[worker_id]
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+                worker.in_flight = max(0, worker.in_flight - 1)
+                worker.processed += 1
+                worker.failed += error is not None
+                worker.busy.append((time.monotonic(), busy_seconds))
+            if pending is not None:
+                self._release(pending[2])
+                self._loop.call_soon_threadsafe(self._resolve, pending[1], (matches, stats, error))
+
+    def _release(self, slot: Optional[FrameSlot]):
+        if slot is not None:
+            self._ring.release(slot)
+
+    def _check_workers(self):
+        for worker in self._workers:
+            if self._stopping.is_set() or worker.process is None or worker.process.is_alive():
+                continue
+
+            logger.error(f"Shard worker {worker.worker_id} exited ({worker.process.exitcode}), restarting")
+            with self._lock:
+                lost = [self._pending.pop(rid) for rid, (wid, _, _) in list(self._pending.items()) if wid == worker.worker_id]
+                futures = [future for _, future, _ in lost]
+                for _, _, slot in lost:
+                    self._release(slot)
+                worker.in_flight = 0
+                worker.restarts += 1
+                # Frames sent from now on go to the new process's queue, after its streams are reopened
+                worker.requests = self._context.Queue()
+                for stream_id, stream in self._streams.items():
+                    if stream["worker"] == worker.worker_id:
+                        worker.requests.put(("open", stream_id, _profile_dicts(stream["profiles"].profiles()), stream["config"]))
+
+            error = ("WorkerExited", f"exit code {worker.process.exitcode}")
+            for future in futures:
+                self._loop.call_soon_threadsafe(self._resolve, future, (None, None, error))
+
+            self._spawn(worker)
+
+    def stats(self) -> List[Dict]:
+        """Per-worker stream count, load and utilization over the last UTILIZATION_WINDOW seconds"""
+        now = time.monotonic()
+        report = []
+        with self._lock:
+            for worker in self._workers:
+                while worker.busy and now - worker.busy[0][0] > UTILIZATION_WINDOW:
+                    worker.busy.popleft()
+                report.append({
+                    "worker": worker.worker_id,
+                    "pid": worker.pid,
+                    "alive": worker.process is not None and worker.process.is_alive(),
+                    "ready": worker.ready,
+                    "streams": len(worker.streams),
+                    "in_flight": worker.in_flight,
+                    "processed": worker.processed,
+                    "failed": worker.failed,
+                    "restarts": worker.restarts,
+                    "utilization": round(min(1.0, sum(b for _, b in worker.busy) / UTILIZATION_WINDOW), 3),
+                })
+        return report
+
+    def ring_stats(self) -> Optional[Dict]:
+        if self._ring is None:
+            return None
+        return {
+            "slots": self._ring.slots,
+            "slot_bytes": self._ring.slot_bytes,
+            "free_slots": self._ring.free_slots,
+            "pickled_frames": self.pickled_frames,
+        }
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop all workers, terminating any that do not exit in time"""
+        self._stopping.set()
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.requests.put(("stop",))
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        if self._listener is not None:
+            self._listener.join(timeout)
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
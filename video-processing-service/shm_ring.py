@@ -0,0 +1,87 @@
+"""
+Shared-memory frame ring
+Preallocated frame slots in one multiprocessing.shared_memory block, so
+decoded frames cross process boundaries without pickling: the producer
+copies a frame into a free slot and sends only the slot index, shape and
+dtype over a queue; the consumer wraps the slot as a numpy view.
+"""
+
+import threading
+from multiprocessing import shared_memory
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class FrameSlot(NamedTuple):
+    """What goes over the queue instead of the frame"""
+    index: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedFrameRing:
+    """
+    `slots` fixed-size frame buffers in shared memory
+
+    The creating process owns slot allocation: `write` takes a free slot
+    and `release` returns it once the consumer is done with the frame, so
+    a slot is never written while another process reads it. Other
+    processes `attach` by name and only read slots with `view`.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, slot_bytes: int, owner: bool):
+        self._shm = shm
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = owner
+        self._free: List[int] = list(range(slots))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, slots: int, slot_bytes: int) -> "SharedFrameRing":
+        shm = shared_memory.SharedMemory(create=True, size=max(1, slots * slot_bytes))
+        return cls(shm, slots, slot_bytes, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, slots: int, slot_bytes: int) -> "SharedFrameRing":
+        return cls(shared_memory.SharedMemory(name=name), slots, slot_bytes, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def free_slots(self) -> int:
+        with self._lock:
+            return len(self._free)
+
+    def fits(self, frame: np.ndarray) -> bool:
+        return frame.nbytes <= self.slot_bytes
+
+    def write(self, frame: np.ndarray) -> Optional[FrameSlot]:
+        """Copy a frame into a free slot; returns None if all slots are in use"""
+        if not self.fits(frame):
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit a {self.slot_bytes}-byte slot")
+        with self._lock:
+            if not self._free:
+                return None
+            index = self._free.pop()
+        slot = FrameSlot(index, tuple(frame.shape), frame.dtype.str)
+        np.copyto(self.view(slot), frame)
+        return slot
+
+    def view(self, slot: FrameSlot) -> np.ndarray:
+        """The slot's frame as a numpy array backed by shared memory (no copy)"""
+        return np.ndarray(slot.shape, dtype=np.dtype(slot.dtype), buffer=self._shm.buf, offset=slot.index * self.slot_bytes)
+
+    def release(self, slot: FrameSlot):
+        with self._lock:
+            if slot.index not in self._free:
+                self._free.append(slot.index)
+
+    def close(self):
+        """Detach from the block; the owner also frees it"""
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
@@ -0,0 +1,42 @@
+"""
+Pipeline stage timing
+The pipeline wraps each stage in `timed(stage)`; registered observers (the
+replay benchmark, metrics) receive the stage name and its duration. With no
+observers registered the hooks cost next to nothing.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, List
+
+STAGES = ("decode", "detect", "pose", "color", "candidates", "clip", "match")
+
+StageObserver = Callable[[str, float], None]
+
+_observers: List[StageObserver] = []
+
+
+def add_observer(observer: StageObserver):
+    """Call `observer(stage, seconds)` after every timed stage"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_observer(observer: StageObserver):
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+@contextmanager
+def timed(stage: str):
+    if not _observers:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        for observer in list(_observers):
+            observer(stage, elapsed)
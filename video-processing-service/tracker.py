@@ -0,0 +1,144 @@
+"""
+Lightweight multi-object person tracker
+ByteTrack-style two-stage IoU association with constant-velocity prediction,
+CPU only. Tracks carry cached attributes and match results so expensive
+per-person work runs once per track instead of once per frame.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pose import match_boxes
+
+
+class Track:
+    """A tracked person and its cached analysis"""
+
+    def __init__(self, track_id: int, box: np.ndarray, score: float, frame_index: int):
+        self.track_id = track_id
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.score = score
+        self.hits = 1
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+
+        # Cached analysis (attributes, match results) and when it was computed
+        self.cache: Optional[Dict[str, Any]] = None
+        self.cache_frame = -1
+        self.cache_profiles_version = -1
+
+    def predict(self, frame_index: int) -> np.ndarray:
+        """Box extrapolated to the given frame"""
+        return self.box + self.velocity * (frame_index - self.last_frame)
+
+    def update(self, box: np.ndarray, score: float, frame_index: int):
+        steps = max(1, frame_index - self.last_frame)
+        self.velocity = 0.5 * self.velocity + 0.5 * (box - self.box) / steps
+        self.box = box.astype(np.float32)
+        self.score = score
+        self.hits += 1
+        self.last_frame = frame_index
+
+
+class PersonTracker:
+    """
+    Assigns persistent ids to person detections across frames
+
+    High-confidence detections are associated with predicted track boxes
+    first, then low-confidence detections with the tracks left over.
+    Unmatched detections start new tracks; tracks unseen for `max_age`
+    frames are dropped.
+    """
+
+    def __init__(
+        self,
+        high_threshold: float = 0.6,
+        match_iou: float = 0.3,
+        max_age: int = 30,
+        refresh_interval: int = 15
+    ):
+        self.high_threshold = high_threshold
+        self.match_iou = match_iou
+        self.max_age = max_age
+        self.refresh_interval = max(1, refresh_interval)
+        self.tracks: Dict[int, Track] = {}
+        self.frame_index = 0
+        self._next_id = 1
+
+    def update(self, detections: np.ndarray) -> List[int]:
+        """
+        Associate one frame of [x1, y1, x2, y2, conf] detections with tracks
+        Returns the track id of every detection, in order
+        """
+        self.frame_index += 1
+        detections = np.asarray(detections, dtype=np.float32).reshape(-1, 5)
+        track_ids = [-1] * len(detections)
+
+        tracks = list(self.tracks.values())
+        unmatched_tracks = list(range(len(tracks)))
+        predicted = np.array([track.predict(self.frame_index) for track in tracks], dtype=np.float32).reshape(-1, 4)
+
+        high = np.flatnonzero(detections[:, 4] >= self.high_threshold)
+        low = np.flatnonzero(detections[:, 4] < self.high_threshold)
+
+        # Stage 1: high-confidence detections, then Stage 2: low-confidence ones
+        for stage in (high, low):
+            if len(stage) == 0 or not unmatched_tracks:
+                continue
+            assignment = match_boxes(detections[stage, :4], predicted[unmatched_tracks], self.match_iou)
+            matched = set()
+            for det_index, column in zip(stage, assignment):
+                if column < 0:
+                    continue
+                track = tracks[unmatched_tracks[column]]
+                track.update(detections[det_index, :4], float(detections[det_index, 4]), self.frame_index)
+                track_ids[det_index] = track.track_id
+                matched.add(column)
+            unmatched_tracks = [t for column, t in enumerate(unmatched_tracks) if column not in matched]
+
+        # New tracks for anything left unmatched
+        for det_index, track_id in enumerate(track_ids):
+            if track_id == -1:
+                track = Track(self._next_id, detections[det_index, :4], float(detections[det_index, 4]), self.frame_index)
+                self.tracks[track.track_id] = track
+                track_ids[det_index] = track.track_id
+                self._next_id += 1
+
+        # Drop tracks that have been lost for too long
+        for track_id in [tid for tid, track in self.tracks.items() if self.frame_index - track.last_frame > self.max_age]:
+            del self.tracks[track_id]
+
+        return track_ids
+
+    def needs_refresh(self, track_id: int, profiles_version: int) -> bool:
+        """
+        Whether a track's cached analysis must be recomputed this frame
+        True for new tracks, every `refresh_interval` frames, and whenever the
+        profile set has changed since the cache was filled
+        """
+        track = self.tracks.get(track_id)
+        if track is None or track.cache is None:
+            return True
+        if track.cache_profiles_version != profiles_version:
+            return True
+        return self.frame_index - track.cache_frame >= self.refresh_interval
+
+    def cached(self, track_id: int) -> Optional[Dict[str, Any]]:
+        track = self.tracks.get(track_id)
+        return track.cache if track else None
+
+    def store(self, track_id: int, profiles_version: int, cache: Dict[str, Any]):
+        track = self.tracks.get(track_id)
+        if track is not None:
+            track.cache = cache
+            track.cache_frame = self.frame_index
+            track.cache_profiles_version = profiles_version
+
+    def stats(self) -> Dict:
+        return {
+            "active_tracks": len(self.tracks),
+            "total_tracks": self._next_id - 1,
+            "frame_index": self.frame_index,
+        }
@@ -0,0 +1,64 @@
+"""
+Search a recorded video file for missing persons from the command line
+Same pipeline and NDJSON output as POST /api/process-video
+
+Usage:
+    python video_job.py clip.mp4 --profiles profiles.json
+    python video_job.py clip.mp4 --profiles profiles.json --stride 5 --start 60 --end 300 > matches.ndjson
+
+profiles.json holds a list of missing-person profiles, in the same shape as
+the API's `missingPersons` field.
+"""
+
+import argparse
+import json
+import sys
+
+import main
+from batching import DetectionBatcher
+from video_reader import VideoFrameReader
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Search a video file for missing persons (NDJSON output)")
+    parser.add_argument("video", help="Local video file")
+    parser.add_argument("--profiles", required=True, help="JSON file with a list of missing-person profiles")
+    parser.add_argument("--stride", type=int, default=1, help="Process every Nth frame")
+    parser.add_argument("--start", type=float, default=0.0, help="Start time in seconds")
+    parser.add_argument("--end", type=float, default=None, help="End time in seconds")
+    parser.add_argument("--output", help="Write NDJSON here instead of stdout")
+    args = parser.parse_args()
+
+    with open(args.profiles) as f:
+        missing_persons = [main.MissingPersonProfile(**mp) for mp in json.load(f)]
+
+    main.load_models()
+    main.detection_batcher = DetectionBatcher(
+        main.detect_persons,
+        max_batch_size=main.DETECT_MAX_BATCH_SIZE,
+        max_wait_ms=main.DETECT_MAX_WAIT_MS
+    )
+    main.detection_batcher.start()
+
+    reader = VideoFrameReader(
+        args.video,
+        stride=args.stride,
+        start_seconds=args.start,
+        end_seconds=args.end,
+        queue_size=main.VIDEO_JOB_QUEUE_SIZE
+    )
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        reader.start()
+        for message in main.run_video_job(reader, missing_persons):
+            output.write(json.dumps(message) + "\n")
+            output.flush()
+    finally:
+        reader.stop()
+        main.detection_batcher.stop()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,120 @@
+"""
+Threaded video file reader
+Decodes a local video in a background thread into a small bounded queue, so
+decoding overlaps inference and the file is never held in memory
+"""
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+_END = object()
+
+
+class VideoFrameReader:
+    """
+    Iterates (frame index, timestamp in seconds, BGR frame) over a video file
+
+    Only every `stride`-th frame between `start_seconds` and `end_seconds`
+    is decoded; skipped frames are grabbed without decoding. The reader
+    thread blocks once `queue_size` frames are waiting.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stride: int = 1,
+        start_seconds: float = 0.0,
+        end_seconds: Optional[float] = None,
+        queue_size: int = 16
+    ):
+        self.path = path
+        self.stride = max(1, stride)
+        self.start_seconds = max(0.0, start_seconds or 0.0)
+        self.end_seconds = end_seconds
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._capture: Optional[cv2.VideoCapture] = None
+        self._error: Optional[BaseException] = None
+
+        self.fps = 0.0
+        self.frame_count = 0
+        self.frames_read = 0
+        self.frames_decoded = 0
+
+    def start(self) -> "VideoFrameReader":
+        """Open the video and start decoding; raises ValueError if it cannot be opened"""
+        capture = cv2.VideoCapture(self.path)
+        if not capture.isOpened():
+            capture.release()
+            raise ValueError(f"Cannot open video {self.path}")
+
+        self._capture = capture
+        self.fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        self._thread = threading.Thread(target=self._run, name="video-reader", daemon=True)
+        self._thread.start()
+        return self
+
+    def _timestamp(self, index: int) -> float:
+        if self.fps > 0:
+            return index / self.fps
+        return self._capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        capture = self._capture
+        try:
+            if self.start_seconds > 0:
+                capture.set(cv2.CAP_PROP_POS_MSEC, self.start_seconds * 1000.0)
+            index = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+            first = index
+
+            while not self._stop.is_set():
+                if not capture.grab():
+                    break
+                timestamp = self._timestamp(index)
+                if self.end_seconds is not None and timestamp > self.end_seconds:
+                    break
+                self.frames_read += 1
+
+                if (index - first) % self.stride == 0:
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        self.frames_decoded += 1
+                        if not self._put((index, timestamp, frame)):
+                            break
+                index += 1
+        except Exception as e:
+            self._error = e
+        finally:
+            capture.release()
+            self._put(_END)
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+    def stop(self):
+        """Stop decoding and wait for the reader thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None